@@ -69,6 +69,12 @@ class ExtraServiceNotFoundException(HTTPException):
             detail=f"Servicio extra en índice {service_index} no encontrado"
         )
 
+class ServiceNotAvailableException(BookingException):
+    """Excepción cuando un servicio extra no existe en el catálogo o no está disponible"""
+    def __init__(self, service_ids: list):
+        detail = f"Servicios no disponibles: {', '.join(service_ids)}"
+        super().__init__(detail)
+
 class PaymentRequiredException(HTTPException):
     """Excepción cuando se requiere pago antes de confirmar"""
     def __init__(self):
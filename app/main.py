@@ -2,7 +2,9 @@ from fastapi import FastAPI
 
 
 from app.database import connect_db
-from app.routers import rooms, users, auth, hotel, amenity, bookings
+from app.routers import rooms, users, auth, hotel, amenity, bookings, payments, reports, services, waitlist, admin
+from app.utils.email_worker import outbox_worker
+from app.utils.notification_coalescer import notification_coalescer
 
 app = FastAPI(title="Hotel Management API")
 
@@ -15,6 +17,25 @@ app.include_router(users.router)
 app.include_router(hotel.router)
 app.include_router(amenity.router)
 app.include_router(bookings.router)
+app.include_router(payments.router)
+app.include_router(reports.router)
+app.include_router(services.router)
+app.include_router(waitlist.router)
+app.include_router(admin.router)
+
+
+@app.on_event("startup")
+def start_background_workers():
+    outbox_worker.start()
+    notification_coalescer.start()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    # Primero el coalescer, que aún puede encolar emails pendientes
+    notification_coalescer.stop()
+    outbox_worker.stop()
+
 
 print("Hotel Management API is running...")
 
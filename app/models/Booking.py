@@ -1,18 +1,28 @@
 from datetime import datetime
 
 from mongoengine import Document, EmbeddedDocument, StringField, FloatField, ReferenceField, DateTimeField, ListField, \
-    EmbeddedDocumentField
+    EmbeddedDocumentField, ObjectIdField, IntField
 
 
 class ExtraService(EmbeddedDocument):
-    name = StringField(required=True)
-    price = FloatField(required=True, min_value=0.0)
+    service_id = ObjectIdField()  # Servicio del catálogo
+    price = FloatField(required=True, min_value=0.0)  # Precio en el momento de la reserva
+    # Solo en reservas anteriores al catálogo; las nuevas los resuelven por service_id
+    name = StringField()
     description = StringField()
 
 
 class ReserveStatus(EmbeddedDocument):
     reserve_status = StringField(choices=['pending', 'confirmed', 'cancelled', 'completed'], default='pending')
     trade_date = DateTimeField(default=datetime.now)
+    # Importe sumado (o restado) a los rollups de ingresos por esta transición
+    amount = FloatField()
+
+
+class RevenueAdjustment(EmbeddedDocument):
+    # Cambio de total de una reserva confirmada (extras añadidos o eliminados)
+    amount = FloatField(required=True)
+    date = DateTimeField(required=True)
 
 
 class Booking(Document):
@@ -24,11 +34,20 @@ class Booking(Document):
     total = FloatField(required=True)
     status = ListField(EmbeddedDocumentField(ReserveStatus), default=list)
     opinions = StringField()
+    # Se incrementa en cada actualización atómica (control de concurrencia optimista)
+    version = IntField(default=0)
+    # Reservas creadas juntas en POST /bookings/batch
+    group_id = StringField()
+    # Importe que cuentan ahora los rollups de ingresos (0 fuera de confirmed/completed)
+    booked_amount = FloatField()
+    revenue_adjustments = ListField(EmbeddedDocumentField(RevenueAdjustment), default=list)
     meta = {
         'collection': 'bookings',
         'indexes': [
-            'room',
+            # También sirve a las consultas por habitación; la auditoría recorre este orden
+            ('room', 'check_in'),
             'user',('check_in', 'check_out'),
             'status.reserve_status',
+            {'fields': ['group_id'], 'sparse': True},
         ]
     }
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from mongoengine import Document, ReferenceField, DateTimeField
+
+
+class BookingHold(Document):
+    # Bloqueo temporal de las noches de una habitación durante el checkout
+    room = ReferenceField("Room", required=True)
+    user = ReferenceField("User", required=True)
+    check_in = DateTimeField(required=True)
+    check_out = DateTimeField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    expires_at = DateTimeField(required=True)  # UTC, como exige el índice TTL
+    meta = {
+        'collection': 'booking_holds',
+        'indexes': [
+            ('room', 'check_in', 'check_out'),
+            'user',
+            # MongoDB elimina el bloqueo al caducar; las consultas filtran
+            # además por expires_at porque el borrado puede tardar hasta un minuto
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from mongoengine import Document, StringField, IntField, DateTimeField
+
+
+class EmailOutbox(Document):
+    to_email = StringField(required=True)
+    subject = StringField(required=True)
+    body = StringField(required=True)
+    html_body = StringField()
+    status = StringField(choices=['pending', 'sending', 'sent', 'dead'], default='pending')
+    attempts = IntField(default=0)
+    next_attempt_at = DateTimeField(default=datetime.utcnow)
+    # Mientras status='sending', fecha a partir de la cual otro worker puede reclamarlo
+    locked_until = DateTimeField()
+    last_error = StringField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    sent_at = DateTimeField()
+    # Clave opcional que impide encolar dos veces el mismo aviso
+    dedupe_key = StringField()
+    meta = {
+        'collection': 'email_outbox',
+        'indexes': [
+            ('status', 'next_attempt_at'),
+            ('status', 'locked_until'),
+            {'fields': ['dedupe_key'], 'unique': True, 'sparse': True},
+            # Los enviados se purgan solos al cabo de 7 días
+            {'fields': ['sent_at'], 'expireAfterSeconds': 7 * 24 * 3600}
+        ]
+    }
@@ -24,7 +24,9 @@ class Hotel(Document):
     rating = FloatField(min_value=0.0, max_value=5.0, default=0.0)
     images = ListField(StringField())
     amenities = ListField(EmbeddedDocumentField(Amenity))
-    rooms = ListField(ReferenceField(Room))  # Referencias a habitaciones
+    # Obsoleto: la relación vive en Room.hotel. Se mantiene declarado para
+    # poder leer hoteles aún no migrados (ver app/utils/hotel_rooms_migration.py)
+    rooms = ListField(ReferenceField(Room))
 
     meta = {
         'collection': 'hotels',
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from mongoengine import Document, StringField, IntField, DateTimeField, DictField
+
+
+class IdempotencyRecord(Document):
+    # _id = "<ámbito>:<usuario>:<Idempotency-Key>"
+    id = StringField(primary_key=True)
+    request_hash = StringField(required=True)
+    status = StringField(choices=['processing', 'completed'], default='processing')
+    # Mientras está en 'processing', otro proceso puede retomarlo pasado este instante
+    locked_until = DateTimeField()
+    status_code = IntField()
+    response = DictField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    expires_at = DateTimeField(required=True)
+    meta = {
+        'collection': 'idempotency_records',
+        'indexes': [
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from mongoengine import Document, StringField, ReferenceField, DateTimeField
+
+
+class PasswordResetToken(Document):
+    # Solo se guarda el hash SHA-256 del token enviado al usuario
+    token_hash = StringField(required=True, unique=True)
+    user = ReferenceField("User", required=True)
+    expires_at = DateTimeField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    meta = {
+        'collection': 'password_reset_tokens',
+        'indexes': [
+            'user',
+            # MongoDB elimina el documento en cuanto pasa expires_at
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
@@ -1,14 +1,16 @@
 from datetime import datetime
 
-from mongoengine import Document, ReferenceField, StringField, DateTimeField
+from mongoengine import Document, ReferenceField, StringField, DateTimeField, FloatField
 
 
 class Payment(Document):
     reservation = ReferenceField("Booking", required=True)
+    amount = FloatField(min_value=0.0)
     method = StringField(required=True, choices=['credit_card', 'cash', 'transfer'])
     status = StringField(required=True, choices=['pending', 'completed', 'failed'], default='pending')
     transaction_id = StringField(unique=True, required=True)
     date = DateTimeField(default=datetime.now)
+    settled_at = DateTimeField()
     meta = {
         'collection': 'payments',
         'indexes': [
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from mongoengine import Document, StringField, IntField, DateTimeField
+
+
+class RateLimitBucket(Document):
+    # _id = "<clave>:<índice de ventana>"
+    id = StringField(primary_key=True)
+    count = IntField(default=0)
+    expires_at = DateTimeField(default=datetime.utcnow)
+    meta = {
+        'collection': 'rate_limit_buckets',
+        'indexes': [
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from mongoengine import Document, StringField, BooleanField, DateTimeField
+
+
+class RefreshToken(Document):
+    # Solo se guarda el hash SHA-256 del token opaco entregado al cliente
+    token_hash = StringField(required=True, unique=True)
+    # Todos los tokens obtenidos por rotación desde un mismo login
+    family_id = StringField(required=True)
+    # Datos necesarios para emitir el access token sin consultar User
+    user_id = StringField(required=True)
+    email = StringField(required=True)
+    used = BooleanField(default=False)
+    revoked = BooleanField(default=False)
+    created_at = DateTimeField(default=datetime.utcnow)
+    used_at = DateTimeField()
+    expires_at = DateTimeField(required=True)
+    meta = {
+        'collection': 'refresh_tokens',
+        'indexes': [
+            'family_id',
+            'user_id',
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
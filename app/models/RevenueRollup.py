@@ -0,0 +1,22 @@
+from mongoengine import Document, StringField, FloatField, IntField, DateTimeField
+
+
+class RevenueRollup(Document):
+    day = DateTimeField(required=True)  # Medianoche del día
+    room_type = StringField(required=True)
+    # Método de pago, o "booking" para los importes de reservas confirmadas
+    method = StringField(required=True)
+    collected = FloatField(default=0.0)  # Pagos completados
+    payments = IntField(default=0)
+    booked = FloatField(default=0.0)  # Reservas confirmadas (netas de cancelaciones)
+    bookings = IntField(default=0)
+    meta = {
+        'collection': 'revenue_rollups',
+        'indexes': [
+            {
+                'fields': ['day', 'room_type', 'method'],
+                'unique': True,
+                'name': 'idx_day_type_method'
+            }
+        ]
+    }
@@ -1,7 +1,7 @@
 from mongoengine import (
     Document, IntField, StringField, FloatField,
     EmbeddedDocument, ListField, EmbeddedDocumentListField,
-    BooleanField, EmbeddedDocumentField
+    BooleanField, EmbeddedDocumentField, ReferenceField
 )
 
 
@@ -26,6 +26,7 @@ class Room(Document):
     availability = BooleanField(default=True)
     images = ListField(StringField())
     description = StringField()
+    hotel = ReferenceField("Hotel")  # Hotel al que pertenece la habitación
 
     meta = {
         'collection': 'rooms',
@@ -36,6 +37,11 @@ class Room(Document):
             {
                 'fields': ['type', 'price_per_night'],
                 'name': 'idx_type_price'
+            },
+            {
+                # _id al final cubre el desempate del listado de habitaciones por hotel
+                'fields': ['hotel', 'type', 'price_per_night', 'id'],
+                'name': 'idx_hotel_type_price_id'
             }
         ]
     }
\ No newline at end of file
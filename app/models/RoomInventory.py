@@ -0,0 +1,19 @@
+from mongoengine import Document, StringField, IntField, DateTimeField
+
+
+class RoomInventory(Document):
+    # Contadores por tipo de habitación y noche (medianoche del día de la noche)
+    room_type = StringField(required=True)
+    night = DateTimeField(required=True)
+    sold = IntField(default=0)
+    capacity = IntField(default=0)  # Habitaciones disponibles de ese tipo
+    meta = {
+        'collection': 'room_inventory',
+        'indexes': [
+            {
+                'fields': ['room_type', 'night'],
+                'unique': True,
+                'name': 'idx_type_night'
+            }
+        ]
+    }
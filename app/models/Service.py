@@ -1,11 +1,15 @@
+from datetime import datetime
+
 from mongoengine import FloatField, Document, StringField, EmbeddedDocument, EmbeddedDocumentField, ListField, \
-    BooleanField
+    BooleanField, DateTimeField
+
+TIME_REGEX = "^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$"
 
 
 class HourService(EmbeddedDocument):
     day = StringField(choices=["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
-    start_time = StringField(regex="^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$")
-    end_time = StringField()
+    start_time = StringField(regex=TIME_REGEX)
+    end_time = StringField(regex=TIME_REGEX)  # Si es <= start_time, el horario cruza la medianoche
 
 class Service(Document):
     name = StringField(required=True, unique=True)
@@ -13,8 +17,19 @@ class Service(Document):
     price = FloatField(required=True)
     category = StringField(choices=['spa', 'restaurante', 'gym', 'pool', 'other'])
     schedule = ListField(EmbeddedDocumentField(HourService))
-    availability  = BooleanField(default=True)
+    availability = BooleanField(default=True)
+    # Sello de versión para las cachés del catálogo
+    updated_at = DateTimeField(default=datetime.now)
     meta = {
         'collection': 'services',
-        'indexes': ['name', 'category', 'availability ']
-    }
\ No newline at end of file
+        'indexes': [
+            'name',
+            'availability',
+            # Consulta del catálogo: disponibles, opcionalmente por categoría
+            ('availability', 'category'),
+            'updated_at'
+        ]
+    }
+
+    def clean(self):
+        self.updated_at = datetime.now()
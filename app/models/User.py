@@ -1,3 +1,4 @@
+import unicodedata
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -7,6 +8,38 @@ from mongoengine import (
 )
 
 
+def normalize_search_text(text: str) -> str:
+    """Normaliza texto para búsqueda: minúsculas, sin acentos y espacios simples"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.lower().split())
+
+
+def build_search_keys(name: str, email: str) -> list:
+    """
+    Genera las claves indexadas para búsqueda por prefijo.
+
+    Incluye el nombre completo, cada palabra del nombre, el email completo
+    y su parte local, de modo que una búsqueda por prefijo anclado sobre
+    cualquiera de ellas se resuelve con un rango del índice.
+    """
+    keys = []
+    full_name = normalize_search_text(name)
+    if full_name:
+        keys.append(full_name)
+        keys.extend(full_name.split(" "))
+
+    full_email = normalize_search_text(email)
+    if full_email:
+        keys.append(full_email)
+        keys.append(full_email.split("@", 1)[0])
+
+    # Eliminar duplicados conservando el orden
+    return list(dict.fromkeys(keys))
+
+
 class RolUser(EmbeddedDocument):
     name = StringField(required=True, choices=["admin", "employee", "client"])
     permissions = ListField(StringField(choices=[
@@ -28,14 +61,23 @@ class User(Document):
     # Campos adicionales para autenticación
     last_login = DateTimeField()
     is_verified = BooleanField(default=False)
+    # Obsoletos: los tokens de reset viven en PasswordResetToken. Se mantienen
+    # declarados para poder cargar documentos antiguos que aún los contengan.
     reset_token = StringField()
     reset_token_expires = DateTimeField()
 
+    # Claves normalizadas para búsqueda por prefijo (ver build_search_keys)
+    search_keys = ListField(StringField())
+
     meta = {
         'collection': 'users',
-        'indexes': ['email', 'active', 'creation_date']
+        'indexes': ['email', 'active', 'creation_date', 'search_keys']
     }
 
+    def clean(self):
+        """Mantiene las claves de búsqueda sincronizadas con nombre y email"""
+        self.search_keys = build_search_keys(self.name, self.email)
+
     def set_password(self, password: str):
         """Genera hash de la contraseña"""
         self.hashed_password = generate_password_hash(password)
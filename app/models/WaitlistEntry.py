@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from mongoengine import Document, StringField, ReferenceField, DateTimeField, BooleanField, ObjectIdField
+
+
+class WaitlistEntry(Document):
+    user = ReferenceField("User", required=True)
+    room_type = StringField(required=True)
+    check_in = DateTimeField(required=True)
+    check_out = DateTimeField(required=True)
+    # Si es True, al liberarse la habitación se crea un bloqueo a su nombre
+    auto_hold = BooleanField(default=True)
+    status = StringField(choices=['waiting', 'notified', 'held', 'booked', 'cancelled'], default='waiting')
+    hold_id = ObjectIdField()
+    created_at = DateTimeField(default=datetime.now)
+    matched_at = DateTimeField()
+    meta = {
+        'collection': 'waitlist',
+        'indexes': [
+            # El matcher busca por tipo, estado y rango de check_in
+            ('room_type', 'status', 'check_in'),
+            'user'
+        ]
+    }
@@ -0,0 +1,73 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.models.User import User
+from app.utils.auth import get_current_active_user, require_permissions
+from app.utils.booking_audit import find_double_bookings, to_ndjson
+from app.utils.exports import EXPORTS, stream_export
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# Permiso necesario para cada exportación
+EXPORT_PERMISSIONS = {
+    'bookings': "view_reports",
+    'rooms': "view_reports",
+    'users': "manage_users"
+}
+
+
+@router.get("/audit/double-bookings")
+def audit_double_bookings(current_user: User = Depends(require_permissions(["view_reports"]))):
+    """
+    Reservas solapadas de una misma habitación, en NDJSON (una línea por par).
+
+    La respuesta se va enviando mientras se recorre el cursor, sin cargar
+    todas las reservas en memoria.
+    """
+    return StreamingResponse(to_ndjson(find_double_bookings()), media_type="application/x-ndjson")
+
+
+@router.get("/exports/{resource}")
+def export_collection(
+        resource: str,
+        export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        compress: bool = Query(True, alias="gzip", description="Comprimir la salida con gzip"),
+        date_from: Optional[datetime] = Query(None, alias="from", description="Desde (incluido)"),
+        date_to: Optional[datetime] = Query(None, alias="to", description="Hasta (excluido)"),
+        current_user: User = Depends(get_current_active_user)
+):
+    """
+    Exporta reservas, habitaciones o usuarios en NDJSON o CSV.
+
+    Los documentos salen de un cursor por lotes con proyección y se envían
+    según se leen, así que la memoria no depende del número de registros.
+    El rango de fechas filtra por check_in en reservas y por fecha de alta
+    en usuarios.
+    """
+    spec = EXPORTS.get(resource)
+    if spec is None:
+        raise HTTPException(status_code=404, detail="Unknown export")
+
+    permission = EXPORT_PERMISSIONS[resource]
+    if not current_user.has_permission(permission):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Permiso requerido: {permission}"
+        )
+    if (date_from or date_to) and not spec.date_field:
+        raise HTTPException(status_code=400, detail=f"'{resource}' cannot be filtered by date")
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+
+    filename = f"{resource}-{datetime.now():%Y%m%d%H%M%S}.{export_format}" + (".gz" if compress else "")
+    media_type = "application/gzip" if compress else (
+        "text/csv" if export_format == "csv" else "application/x-ndjson"
+    )
+    return StreamingResponse(
+        stream_export(spec, export_format, compress, date_from, date_to),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
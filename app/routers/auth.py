@@ -4,15 +4,19 @@ from fastapi.logger import logger
 from fastapi.security import OAuth2PasswordRequestForm
 from mongoengine import DoesNotExist
 
+from app.models.PasswordResetToken import PasswordResetToken
 from app.models.User import User, RolUser
 from app.schemas.user_schema import (
     UserCreate, UserResponse, UserLogin, TokenResponse,
-    PasswordResetRequest, PasswordReset
+    PasswordResetRequest, PasswordReset, RefreshTokenRequest, TokenRefreshResponse
 )
 from app.utils.auth import (
     authenticate_user, create_access_token, get_current_active_user,
-    generate_reset_token
+    generate_reset_token, hash_token, issue_refresh_token, rotate_refresh_token,
+    revoke_user_refresh_tokens, ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.utils.rate_limit import login_rate_limiter, password_reset_rate_limiter
+from app.utils.user_stats import user_stats_cache
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -42,6 +46,7 @@ def register_user(user_data: UserCreate):
 
         # Guardar en base de datos
         new_user.save()
+        user_stats_cache.on_register([role.name for role in new_user.roles], new_user.active)
 
         print(f"Usuario registrado: {new_user.email}")
         return new_user.to_dict()
@@ -54,7 +59,7 @@ def register_user(user_data: UserCreate):
         )
 
 
-@router.post("/login", response_model=TokenResponse)
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(login_rate_limiter)])
 def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
     user = authenticate_user(form_data.username, form_data.password)
 
@@ -76,19 +81,19 @@ def login_user(form_data: OAuth2PasswordRequestForm = Depends()):
     print(f"🔍 Roles: {[role.name for role in user.roles]}")
     print(f"🔍 Permisos: {[perm for role in user.roles for perm in role.permissions]}")
 
-    # Crear token de acceso
-    access_token_expires = timedelta(minutes=1440)  # 24 horas
+    # Crear token de acceso de vida corta y refresh token rotatorio
     access_token = create_access_token(
-        data={"sub": user.email, "user_id": str(user.id)},
-        expires_delta=access_token_expires
+        data={"sub": user.email, "user_id": str(user.id)}
     )
+    refresh_token = issue_refresh_token(str(user.id), user.email)
 
     print(f"Usuario autenticado: {user.email}")
 
     return {
         "access_token": access_token,
+        "refresh_token": refresh_token,
         "token_type": "bearer",
-        "expires_in": 86400,  # 24 horas en segundos
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         "user": user.to_dict()
     }
 
@@ -98,16 +103,23 @@ def get_current_user_info(current_user: User = Depends(get_current_active_user))
     return current_user.to_dict()
 
 
-@router.post("/forgot-password", status_code=status.HTTP_200_OK)
+@router.post(
+    "/forgot-password",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(password_reset_rate_limiter)]
+)
 def send_password_reset_email(request: PasswordResetRequest):
     try:
         user = User.objects.get(email=request.email, active=True)
 
-        # Generar token de reset
+        # Generar token de reset; solo se persiste su hash
         reset_token = generate_reset_token()
-        user.reset_token = reset_token
-        user.reset_token_expires = datetime.utcnow() + timedelta(hours=1)  # 1 hora
-        user.save()
+        PasswordResetToken.objects(user=user).delete()
+        PasswordResetToken(
+            token_hash=hash_token(reset_token),
+            user=user,
+            expires_at=datetime.utcnow() + timedelta(hours=1)  # 1 hora
+        ).save()
 
         # TODO: Implementar envío de email
         # send_reset_email(user.email, reset_token)
@@ -132,18 +144,22 @@ def send_password_reset_email(request: PasswordResetRequest):
 @router.post("/reset-password", status_code=status.HTTP_200_OK)
 def reset_password(reset_data: PasswordReset):
     try:
-        user = User.objects.get(
-            reset_token=reset_data.token,
-            reset_token_expires__gte=datetime.utcnow(),
-            active=True
+        # Búsqueda por índice único; el TTL puede tardar en borrar, así
+        # que la expiración se comprueba también aquí
+        reset_token = PasswordResetToken.objects.no_dereference().get(
+            token_hash=hash_token(reset_data.token),
+            expires_at__gte=datetime.utcnow()
         )
+        user = User.objects.get(id=reset_token.user.id, active=True)
 
         # Cambiar contraseña
         user.set_password(reset_data.new_password)
-        user.reset_token = None
-        user.reset_token_expires = None
         user.save()
 
+        # Invalidar tokens de reset pendientes y sesiones abiertas
+        PasswordResetToken.objects(user=user).delete()
+        revoke_user_refresh_tokens(str(user.id))
+
         print(f"Contraseña reseteada para: {user.email}")
 
         return {"message": "Contraseña actualizada exitosamente"}
@@ -157,25 +173,26 @@ def reset_password(reset_data: PasswordReset):
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
 def logout_user(current_user: User = Depends(get_current_active_user)):
-    # En JWT stateless, el logout se maneja en el frontend eliminando el token
-    # Aquí podrías implementar una blacklist de tokens si fuera necesario
+    # El access token caduca en minutos; basta con revocar los refresh tokens
+    revoke_user_refresh_tokens(str(current_user.id))
 
     print(f"Usuario desconectado: {current_user.email}")
 
     return {"message": "Sesión cerrada exitosamente"}
 
 
-@router.post("/refresh", response_model=TokenResponse)
-def refresh_token(current_user: User = Depends(get_current_active_user)):
-    access_token_expires = timedelta(minutes=1440)  # 24 horas
+@router.post("/refresh", response_model=TokenRefreshResponse)
+def refresh_token(refresh_data: RefreshTokenRequest):
+    # Una sola operación atómica sobre refresh_tokens, sin consultar User
+    new_refresh_token, consumed = rotate_refresh_token(refresh_data.refresh_token)
+
     access_token = create_access_token(
-        data={"sub": current_user.email, "user_id": str(current_user.id)},
-        expires_delta=access_token_expires
+        data={"sub": consumed.email, "user_id": consumed.user_id}
     )
 
     return {
         "access_token": access_token,
+        "refresh_token": new_refresh_token,
         "token_type": "bearer",
-        "expires_in": 86400,
-        "user": current_user.to_dict()
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
     }
\ No newline at end of file
@@ -1,27 +1,63 @@
 from datetime import datetime
+from functools import partial
 from typing import List, Optional
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response, status
 from mongoengine import ValidationError, DoesNotExist
 
 from app.models.Booking import Booking, ExtraService, ReserveStatus
 from app.models.Room import Room
 from app.models.User import User
 from app.schemas.booking_schema import (
+    BookingBatchCreate,
+    BookingBatchResponse,
     BookingCreate,
+    BookingHoldConfirm,
+    BookingHoldCreate,
+    BookingHoldResponse,
     BookingResponse,
     BookingUpdate,
     ExtraServiceCreate,
     ReservationDetails
 )
 from app.utils.auth import get_current_user
-from app.exceptions.booking_exception import BookingException
-from app.utils.email import send_confirmation_email
+from app.exceptions.booking_exception import BookingException, ServiceNotAvailableException
+from app.utils.booking_holds import (
+    create_hold,
+    get_active_hold,
+    held_rooms,
+    hold_doc_to_response,
+    hold_intervals,
+    release_hold,
+    release_holds
+)
+from app.utils.email import send_confirmation_email, send_group_confirmation_email
+from app.utils.group_bookings import find_booked_conflicts, find_internal_conflicts, insert_group, new_group_id
+from app.utils.idempotency import run_idempotent
+from app.utils.notification_coalescer import notification_coalescer
+from app.utils.revenue_rollups import REVENUE_STATUSES, record_booking_adjustment, record_booking_transition
+from app.utils.room_inventory import add_stay, move_stay, room_type_of
+from app.utils.room_utils import get_hotels_by_room
+from app.utils.service_catalog import service_catalog
+from app.utils.waitlist import close_claim, match_waitlist_safely
+from app.utils.booking_updates import (
+    CANCELLATION_NOTICE_HOURS,
+    MODIFIABLE_STATUSES,
+    apply_booking_changes,
+    booking_doc_to_response,
+    cancellation_query,
+    last_status,
+    pull_extra_service,
+    push_extra_service,
+    push_status,
+    raise_update_rejected
+)
 from app.utils.booking_utils import (
+    added_intervals,
     validate_room_availability,
     calculate_total_price,
-    can_cancel_reservation
+    build_booking_email_context
 )
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
@@ -30,11 +66,25 @@ router = APIRouter(prefix="/bookings", tags=["Bookings"])
 @router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
 async def create_reservation(
         reservation: BookingCreate,
+        response: Response,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
         current_user: User = Depends(get_current_user)
 ):
     """
     Crea una nueva reserva validando disponibilidad y calculando precio total.
+
+    Con la cabecera Idempotency-Key, los reintentos devuelven la respuesta
+    original sin volver a crear la reserva ni a enviar el email.
     """
+    return await run_idempotent(
+        idempotency_key, "bookings", str(current_user.id), reservation, response,
+        partial(_create_reservation, reservation, current_user),
+        success_status=status.HTTP_201_CREATED
+    )
+
+
+async def _create_reservation(reservation: BookingCreate, current_user: User,
+                              hold_id: Optional[str] = None) -> BookingResponse:
     try:
         # 1. Validar que la habitación existe
         try:
@@ -58,23 +108,20 @@ async def create_reservation(
                 detail="No se pueden hacer reservas para fechas pasadas"
             )
 
-        # 3. Validar disponibilidad de la habitación
-        if not validate_room_availability(reservation.room_id, reservation.check_in, reservation.check_out):
+        # 3. Validar disponibilidad de la habitación (sin contar el bloqueo propio)
+        if not validate_room_availability(reservation.room_id, reservation.check_in, reservation.check_out,
+                                          exclude_hold=hold_id):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="La habitación no está disponible en las fechas seleccionadas"
             )
 
-        # 4. Preparar servicios extras
-        extra_services = []
-        if reservation.additional_services:
-            for service in reservation.additional_services:
-                extra_service = ExtraService(
-                    name=service.name,
-                    price=service.price,
-                    description=service.description
-                )
-                extra_services.append(extra_service)
+        # 4. Preparar servicios extras (precio del catálogo)
+        extra_services, invalid_services = service_catalog.build_extras(
+            service.service_id for service in reservation.additional_services
+        )
+        if invalid_services:
+            raise ServiceNotAvailableException(invalid_services)
 
         # 5. Calcular precio total
         nights = (reservation.check_out.date() - reservation.check_in.date()).days
@@ -93,9 +140,19 @@ async def create_reservation(
 
         booking.save()
 
-        # 7. Enviar email de confirmación
+        add_stay(room.type, booking.check_in, booking.check_out)
+
+        # El bloqueo se libera después de guardar, para no dejar un hueco entre ambos
+        if hold_id:
+            release_hold(hold_id, current_user.id)
+            close_claim(hold_id, 'booked')
+
+        # 7. Encolar email de confirmación (se entrega en segundo plano)
         try:
-            send_confirmation_email(current_user.email, str(booking.id))
+            send_confirmation_email(
+                current_user.email,
+                build_booking_email_context(booking, user=current_user, room=room)
+            )
         except Exception as e:
             # Log error but don't fail the reservation
             print(f"Error sending confirmation email: {e}")
@@ -110,6 +167,8 @@ async def create_reservation(
             status=booking.status[-1].reserve_status
         )
 
+    except HTTPException:
+        raise
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -122,6 +181,228 @@ async def create_reservation(
         )
 
 
+@router.post("/batch", response_model=BookingBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_group_reservation(
+        batch: BookingBatchCreate,
+        response: Response,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Crea varias reservas a la vez con semántica de todo o nada.
+
+    Valida todas las habitaciones con una consulta, comprueba la
+    disponibilidad del lote completo con otra, inserta con insert_many bajo
+    un group_id común y envía un único email consolidado.
+    """
+    return await run_idempotent(
+        idempotency_key, "bookings-batch", str(current_user.id), batch, response,
+        partial(_create_group_reservation, batch, current_user),
+        success_status=status.HTTP_201_CREATED
+    )
+
+
+async def _create_group_reservation(batch: BookingBatchCreate, current_user: User) -> dict:
+    try:
+        items = batch.reservations
+        now = datetime.now()
+
+        # 1. Validar IDs y fechas
+        invalid_ids = [item.room_id for item in items if not ObjectId.is_valid(item.room_id)]
+        if invalid_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"IDs de habitación inválidos: {', '.join(invalid_ids)}"
+            )
+        if any(item.check_in < now for item in items):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No se pueden hacer reservas para fechas pasadas"
+            )
+
+        # 2. Todas las habitaciones en una sola consulta
+        room_ids = {ObjectId(item.room_id) for item in items}
+        rooms = {
+            doc['_id']: doc
+            for doc in Room.objects(id__in=list(room_ids)).only(
+                'number_room', 'price_per_night', 'type'
+            ).as_pymongo()
+        }
+        missing = [str(room_id) for room_id in room_ids if room_id not in rooms]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Habitaciones no encontradas: {', '.join(missing)}"
+            )
+
+        # 3. Disponibilidad del lote: solapes internos y con reservas existentes
+        stays = [(ObjectId(item.room_id), item.check_in, item.check_out) for item in items]
+        conflicts = sorted(
+            set(find_internal_conflicts(stays)) | set(find_booked_conflicts(stays)) | set(held_rooms(stays))
+        )
+        if conflicts:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": "Algunas habitaciones no están disponibles en las fechas seleccionadas",
+                    "conflicts": [{"index": position, "room_id": items[position].room_id}
+                                  for position in conflicts]
+                }
+            )
+
+        # 4. Precios del lote (extras del catálogo en memoria)
+        group_id = new_group_id()
+        documents = []
+        for item, (room_id, check_in, check_out) in zip(items, stays):
+            extra_services, invalid_services = service_catalog.build_extras(
+                service.service_id for service in item.additional_services
+            )
+            if invalid_services:
+                raise ServiceNotAvailableException(invalid_services)
+
+            nights = (check_out.date() - check_in.date()).days
+            documents.append({
+                '_id': ObjectId(),
+                'room': room_id,
+                'user': current_user.id,
+                'check_in': check_in,
+                'check_out': check_out,
+                'extra_services': [extra.to_mongo().to_dict() for extra in extra_services],
+                'total': calculate_total_price(rooms[room_id]['price_per_night'], extra_services, nights),
+                'status': [{'reserve_status': 'pending', 'trade_date': now}],
+                'version': 0,
+                'group_id': group_id
+            })
+
+        # 5. Insertar todo o nada
+        if not insert_group(documents, group_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Otra reserva ocupó alguna de las habitaciones; no se ha creado ninguna"
+            )
+
+        total_price = sum(doc['total'] for doc in documents)
+
+        for doc in documents:
+            add_stay(rooms[doc['room']]['type'], doc['check_in'], doc['check_out'])
+
+        # 6. Un único email para todo el grupo
+        try:
+            hotels = get_hotels_by_room(room_ids)
+            send_group_confirmation_email(current_user.email, {
+                'group_id': group_id,
+                'user_name': current_user.name,
+                'total': total_price,
+                'reservations': [
+                    {
+                        'reservation_id': str(doc['_id']),
+                        'hotel_name': hotels[str(doc['room'])].name if str(doc['room']) in hotels else None,
+                        'room_name': f"Habitación {rooms[doc['room']]['number_room']}",
+                        'check_in': doc['check_in'],
+                        'check_out': doc['check_out'],
+                        'total': doc['total']
+                    }
+                    for doc in documents
+                ]
+            })
+        except Exception as e:
+            # Log error but don't fail the reservation
+            print(f"Error sending group confirmation email: {e}")
+
+        return {
+            'group_id': group_id,
+            'reservations': [booking_doc_to_response(doc) for doc in documents],
+            'total_price': total_price
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear la reserva de grupo: {str(e)}"
+        )
+
+
+@router.post("/holds", response_model=BookingHoldResponse, status_code=status.HTTP_201_CREATED)
+async def create_booking_hold(
+        hold: BookingHoldCreate,
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Bloquea temporalmente las noches de una habitación durante el checkout.
+
+    El bloqueo cuenta como ocupación hasta que caduca (MongoDB lo elimina
+    solo mediante el índice TTL) o se confirma con /holds/{id}/confirm.
+    """
+    if not ObjectId.is_valid(hold.room_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de habitación inválido")
+
+    if not Room.objects(id=hold.room_id).only('id').first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habitación no encontrada")
+
+    created = create_hold(hold.room_id, current_user.id, hold.check_in, hold.check_out, hold.minutes)
+    if created is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La habitación no está disponible en las fechas seleccionadas"
+        )
+
+    return hold_doc_to_response(created)
+
+
+@router.post("/holds/{hold_id}/confirm", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+async def confirm_booking_hold(
+        hold_id: str,
+        confirmation: BookingHoldConfirm,
+        response: Response,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+        current_user: User = Depends(get_current_user)
+):
+    """Convierte un bloqueo vigente en reserva en un solo paso"""
+    if not ObjectId.is_valid(hold_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de bloqueo inválido")
+
+    async def confirm():
+        hold = get_active_hold(hold_id, current_user.id)
+        if hold is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Bloqueo no encontrado o caducado"
+            )
+
+        # Sin validación de pydantic: las fechas ya se validaron al crear el bloqueo
+        reservation = BookingCreate.model_construct(
+            room_id=str(hold['room']),
+            check_in=hold['check_in'],
+            check_out=hold['check_out'],
+            additional_services=confirmation.additional_services
+        )
+        return await _create_reservation(reservation, current_user, hold_id=hold_id)
+
+    return await run_idempotent(
+        idempotency_key, "bookings-hold", str(current_user.id),
+        {'hold_id': hold_id, 'confirmation': confirmation}, response, confirm,
+        success_status=status.HTTP_201_CREATED
+    )
+
+
+@router.delete("/holds/{hold_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_booking_hold(
+        hold_id: str,
+        current_user: User = Depends(get_current_user)
+):
+    """Libera un bloqueo antes de que caduque"""
+    if not ObjectId.is_valid(hold_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID de bloqueo inválido")
+
+    if not release_hold(hold_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bloqueo no encontrado")
+    # Si el bloqueo venía de la lista de espera, el usuario rechazó la oferta
+    close_claim(hold_id, 'notified')
+    return None
+
+
 @router.get("/", response_model=List[BookingResponse])
 async def get_user_reservations(
         current_user: User = Depends(get_current_user),
@@ -208,14 +489,7 @@ async def get_reservation_details(
             user_id=str(booking.user.id),
             check_in=booking.check_in,
             check_out=booking.check_out,
-            extra_services=[
-                {
-                    "name": service.name,
-                    "price": service.price,
-                    "description": service.description
-                }
-                for service in booking.extra_services
-            ],
+            extra_services=[service_catalog.describe(service) for service in booking.extra_services],
             total_price=booking.total,
             status=current_status,
             status_history=[
@@ -245,6 +519,10 @@ async def update_reservation(
 ):
     """
     Actualiza una reserva existente (solo si está en estado 'pending').
+
+    Al cambiar fechas solo se comprueban las noches añadidas, que se
+    reclaman con bloqueos breves hasta que el cambio se aplica de forma
+    atómica condicionado a la versión leída.
     """
     try:
         # Validar ObjectId
@@ -255,31 +533,33 @@ async def update_reservation(
             )
 
         # Obtener reserva
-        try:
-            booking = Booking.objects.get(id=reservation_id)
-        except DoesNotExist:
+        booking = Booking.objects(id=reservation_id).only(
+            'room', 'user', 'check_in', 'check_out', 'extra_services', 'total', 'status', 'version'
+        ).as_pymongo().first()
+        if booking is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Reserva no encontrada"
             )
 
         # Verificar permisos
-        if str(booking.user.id) != str(current_user.id):
+        if str(booking['user']) != str(current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="No tienes permisos para modificar esta reserva"
             )
 
         # Verificar que se puede modificar
-        current_status = booking.status[-1].reserve_status if booking.status else 'pending'
-        if current_status not in ['pending']:
+        if last_status(booking) not in ['pending']:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Solo se pueden modificar reservas en estado 'pending'"
             )
 
         # Actualizar campos permitidos
-        updated = False
+        changes = {}
+        check_in = reservation_update.check_in or booking['check_in']
+        check_out = reservation_update.check_out or booking['check_out']
 
         if reservation_update.check_in:
             if reservation_update.check_in < datetime.now():
@@ -287,48 +567,59 @@ async def update_reservation(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="No se puede cambiar a una fecha pasada"
                 )
-            booking.check_in = reservation_update.check_in
-            updated = True
-
-        if reservation_update.check_out:
-            booking.check_out = reservation_update.check_out
-            updated = True
-
-        if reservation_update.additional_services is not None:
-            # Actualizar servicios extras
-            extra_services = []
-            for service in reservation_update.additional_services:
-                extra_service = ExtraService(
-                    name=service.name,
-                    price=service.price,
-                    description=service.description
-                )
-                extra_services.append(extra_service)
-            booking.extra_services = extra_services
-            updated = True
-
-        if updated:
-            # Recalcular precio si hubo cambios
-            nights = (booking.check_out.date() - booking.check_in.date()).days
-            booking.total = calculate_total_price(booking.room.price_per_night, booking.extra_services, nights)
-
-            # Agregar nuevo estado de actualización
-            booking.status.append(ReserveStatus(
-                reserve_status='pending',
-                trade_date=datetime.now()
-            ))
+        if check_in >= check_out:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La fecha de salida debe ser posterior a la fecha de entrada"
+            )
 
-            booking.save()
+        hold_ids = []
+        if check_in != booking['check_in'] or check_out != booking['check_out']:
+            # Solo las noches añadidas pueden chocar con otras reservas; se reclaman
+            # con bloqueos para que nadie las ocupe antes de escribir el cambio
+            new_intervals = added_intervals(booking['check_in'], booking['check_out'], check_in, check_out)
+            hold_ids = hold_intervals(booking['room'], current_user.id, new_intervals)
+            if hold_ids is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="La habitación no está disponible en las nuevas fechas"
+                )
+            changes['check_in'] = check_in
+            changes['check_out'] = check_out
 
-        return BookingResponse(
-            id=str(booking.id),
-            room_id=str(booking.room.id),
-            user_id=str(booking.user.id),
-            check_in=booking.check_in,
-            check_out=booking.check_out,
-            total_price=booking.total,
-            status=current_status
-        )
+        try:
+            extra_services = [ExtraService._from_son(extra) for extra in booking.get('extra_services', [])]
+            if reservation_update.additional_services is not None:
+                # Actualizar servicios extras
+                extra_services, invalid_services = service_catalog.build_extras(
+                    service.service_id for service in reservation_update.additional_services
+                )
+                if invalid_services:
+                    raise ServiceNotAvailableException(invalid_services)
+                changes['extra_services'] = [extra.to_mongo().to_dict() for extra in extra_services]
+
+            if changes:
+                # Recalcular precio si hubo cambios
+                room = Room.objects(id=booking['room']).only('price_per_night').as_pymongo().first()
+                nights = (check_out.date() - check_in.date()).days
+                changes['total'] = calculate_total_price(room['price_per_night'], extra_services, nights)
+
+                updated = apply_booking_changes(reservation_id, booking.get('version', 0), changes)
+                if updated is None:
+                    raise_update_rejected(
+                        reservation_id, str(current_user.id), ['pending'], booking.get('version', 0),
+                        "modificar", "La reserva ha cambiado; vuelve a cargarla antes de modificarla"
+                    )
+
+                if 'check_in' in changes:
+                    move_stay(room_type_of(booking['room']), booking['check_in'], booking['check_out'],
+                              check_in, check_out)
+                booking = updated
+        finally:
+            # El cambio ya está escrito (o descartado): las noches quedan cubiertas por la reserva
+            release_holds(hold_ids)
+
+        return booking_doc_to_response(booking)
 
     except HTTPException:
         raise
@@ -342,6 +633,7 @@ async def update_reservation(
 @router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def cancel_reservation(
         reservation_id: str,
+        background_tasks: BackgroundTasks,
         current_user: User = Depends(get_current_user)
 ):
     """
@@ -355,36 +647,25 @@ async def cancel_reservation(
                 detail="ID de reserva inválido"
             )
 
-        # Obtener reserva
-        try:
-            booking = Booking.objects.get(id=reservation_id)
-        except DoesNotExist:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Reserva no encontrada"
-            )
-
-        # Verificar permisos
-        if str(booking.user.id) != str(current_user.id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permisos para cancelar esta reserva"
+        # Permisos, estado y antelación se comprueban en el filtro de la propia actualización
+        now = datetime.now()
+        previous = push_status(
+            reservation_id, 'cancelled', MODIFIABLE_STATUSES,
+            user_id=str(current_user.id), extra_query=cancellation_query(now), when=now
+        )
+        if previous is None:
+            raise_update_rejected(
+                reservation_id, str(current_user.id), MODIFIABLE_STATUSES, None, "cancelar",
+                f"Solo se puede cancelar con más de {CANCELLATION_NOTICE_HOURS} horas de antelación"
             )
 
-        # Verificar que se puede cancelar
-        if not can_cancel_reservation(booking):
-            current_status = booking.status[-1].reserve_status if booking.status else 'pending'
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"No se puede cancelar una reserva en estado '{current_status}'"
-            )
+        record_booking_transition(previous, last_status(previous), 'cancelled', now)
+        add_stay(room_type_of(previous['room']), previous['check_in'], previous['check_out'], sign=-1)
 
-        # Cancelar reserva
-        booking.status.append(ReserveStatus(
-            reserve_status='cancelled',
-            trade_date=datetime.now()
-        ))
-        booking.save()
+        # Ofrecer las noches liberadas a la lista de espera tras responder
+        background_tasks.add_task(
+            match_waitlist_safely, previous['room'], previous['check_in'], previous['check_out']
+        )
 
         return None
 
@@ -401,10 +682,14 @@ async def cancel_reservation(
 async def add_extra_service(
         reservation_id: str,
         extra_service: ExtraServiceCreate,
+        version: Optional[int] = Query(None, ge=0, description="Versión esperada de la reserva"),
         current_user: User = Depends(get_current_user)
 ):
     """
     Añade un servicio extra a una reserva existente.
+
+    La comprobación y la escritura son una única operación atómica; con
+    `version` se rechaza (409) si la reserva cambió desde que se leyó.
     """
     try:
         # Validar ObjectId
@@ -414,54 +699,27 @@ async def add_extra_service(
                 detail="ID de reserva inválido"
             )
 
-        # Obtener reserva
-        try:
-            booking = Booking.objects.get(id=reservation_id)
-        except DoesNotExist:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Reserva no encontrada"
-            )
-
-        # Verificar permisos
-        if str(booking.user.id) != str(current_user.id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permisos para modificar esta reserva"
-            )
-
-        # Verificar que se puede modificar
-        current_status = booking.status[-1].reserve_status if booking.status else 'pending'
-        if current_status not in ['pending', 'confirmed']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Solo se pueden añadir servicios a reservas pendientes o confirmadas"
+        # Precio vigente del catálogo
+        new_services, invalid_services = service_catalog.build_extras([extra_service.service_id])
+        if invalid_services:
+            raise ServiceNotAvailableException(invalid_services)
+        new_service = new_services[0]
+
+        now = datetime.now()
+        booking = push_extra_service(reservation_id, str(current_user.id), new_service, version, when=now)
+        if booking is None:
+            raise_update_rejected(
+                reservation_id, str(current_user.id), MODIFIABLE_STATUSES, version,
+                "modificar", "No se pudo añadir el servicio extra"
             )
+        if last_status(booking) in REVENUE_STATUSES:
+            record_booking_adjustment(booking, new_service.price, now)
 
-        # Añadir servicio extra
-        new_service = ExtraService(
-            name=extra_service.name,
-            price=extra_service.price,
-            description=extra_service.description
+        notification_coalescer.record(
+            reservation_id, f"Servicio añadido: {service_catalog.describe(new_service)['name']}"
         )
 
-        booking.extra_services.append(new_service)
-
-        # Recalcular precio total
-        nights = (booking.check_out.date() - booking.check_in.date()).days
-        booking.total = calculate_total_price(booking.room.price_per_night, booking.extra_services, nights)
-
-        booking.save()
-
-        return BookingResponse(
-            id=str(booking.id),
-            room_id=str(booking.room.id),
-            user_id=str(booking.user.id),
-            check_in=booking.check_in,
-            check_out=booking.check_out,
-            total_price=booking.total,
-            status=current_status
-        )
+        return booking_doc_to_response(booking)
 
     except HTTPException:
         raise
@@ -476,10 +734,14 @@ async def add_extra_service(
 async def remove_extra_service(
         reservation_id: str,
         extra_index: int,
+        version: Optional[int] = Query(None, ge=0, description="Versión esperada de la reserva"),
         current_user: User = Depends(get_current_user)
 ):
     """
     Elimina un servicio extra de una reserva por su índice.
+
+    Como el índice depende de la versión leída por el cliente, conviene
+    enviar `version` para no eliminar otro extra tras un cambio concurrente.
     """
     try:
         # Validar ObjectId
@@ -489,60 +751,34 @@ async def remove_extra_service(
                 detail="ID de reserva inválido"
             )
 
-        # Obtener reserva
-        try:
-            booking = Booking.objects.get(id=reservation_id)
-        except DoesNotExist:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Reserva no encontrada"
-            )
-
-        # Verificar permisos
-        if str(booking.user.id) != str(current_user.id):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permisos para modificar esta reserva"
-            )
-
-        # Verificar índice válido
-        if extra_index < 0 or extra_index >= len(booking.extra_services):
+        if extra_index < 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Índice de servicio extra inválido"
             )
 
-        # Verificar que se puede modificar
-        current_status = booking.status[-1].reserve_status if booking.status else 'pending'
-        if current_status not in ['pending', 'confirmed']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Solo se pueden eliminar servicios de reservas pendientes o confirmadas"
+        now = datetime.now()
+        result = pull_extra_service(reservation_id, str(current_user.id), extra_index, version, when=now)
+        if result is None:
+            raise_update_rejected(
+                reservation_id, str(current_user.id), MODIFIABLE_STATUSES, version,
+                "modificar", "Índice de servicio extra inválido"
             )
+        booking, removed_service = result
+        if last_status(booking) in REVENUE_STATUSES:
+            record_booking_adjustment(booking, -removed_service.get('price', 0.0), now)
 
-        # Eliminar servicio extra
-        booking.extra_services.pop(extra_index)
-
-        # Recalcular precio total
-        nights = (booking.check_out.date() - booking.check_in.date()).days
-        booking.total = calculate_total_price(booking.room.price_per_night, booking.extra_services, nights)
-
-        booking.save()
-
-        return BookingResponse(
-            id=str(booking.id),
-            room_id=str(booking.room.id),
-            user_id=str(booking.user.id),
-            check_in=booking.check_in,
-            check_out=booking.check_out,
-            total_price=booking.total,
-            status=current_status
+        notification_coalescer.record(
+            reservation_id,
+            f"Servicio eliminado: {service_catalog.describe(ExtraService._from_son(removed_service))['name']}"
         )
 
+        return booking_doc_to_response(booking)
+
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al eliminar servicio extra: {str(e)}"
-        )
\ No newline at end of file
+        )
@@ -1,13 +1,24 @@
+import os
 from typing import List, Optional
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from mongoengine import DoesNotExist
 
 from app.models.Hotel import Hotel
+from app.models.Room import Room
+from app.models.User import User
+from app.schemas.bulk_schema import BulkImportResponse
 from app.schemas.hotel_schema import HotelResponse, HotelCreate, HotelListResponse
+from app.schemas.room_schema import HotelRoomsResponse
+from app.utils.auth import require_permissions
+from app.utils.bulk_import import import_ndjson
+from app.utils.room_utils import hotel_rooms_filter, room_to_dict
 
 router = APIRouter(prefix="/hotels", tags=["hotels"])
 
+# Máximo de habitaciones a contar por listado; por encima el total es aproximado
+HOTEL_ROOMS_COUNT_CAP = int(os.getenv("HOTEL_ROOMS_COUNT_CAP", "1000"))
+
 
 @router.post("/create", response_model=HotelResponse)
 def create_hotel(hotel: HotelCreate):
@@ -21,6 +32,16 @@ def create_hotel(hotel: HotelCreate):
     return hotel_dict
 
 
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_create_hotels(
+        request: Request,
+        current_user: User = Depends(require_permissions(["manage_rooms"]))
+):
+    """Alta masiva de hoteles desde un cuerpo NDJSON (un HotelCreate por línea)"""
+    result = await import_ndjson(request.stream(), HotelCreate, Hotel)
+    return result.to_response()
+
+
 @router.get("/", response_model=List[HotelListResponse])
 def get_all_hotels(
         city: Optional[str] = Query(None, description="Filtrar por ciudad"),
@@ -36,7 +57,7 @@ def get_all_hotels(
     if min_rating is not None:
         filters['rating__gte'] = min_rating
 
-    hotels = Hotel.objects.filter(**filters)
+    hotels = Hotel.objects.filter(**filters).exclude('rooms')
 
     # Convertir a formato de respuesta
     hotels_list = []
@@ -57,17 +78,58 @@ def get_hotel(hotel_id: str):
         raise HTTPException(status_code=400, detail="Invalid ObjectId format")
 
     try:
-        hotel = Hotel.objects.get(id=hotel_oid)
+        # Las habitaciones se consultan en GET /hotels/{hotel_id}/rooms
+        hotel = Hotel.objects.exclude('rooms').get(id=hotel_oid)
 
         # Convertir a dict y cambiar _id por id
         hotel_dict = hotel.to_mongo().to_dict()
         hotel_dict['id'] = str(hotel_dict.pop('_id'))
 
-        # Convertir room references a strings
-        if 'rooms' in hotel_dict:
-            hotel_dict['rooms'] = [str(room_id) for room_id in hotel_dict['rooms']]
-
         return hotel_dict
 
     except DoesNotExist:
-        raise HTTPException(status_code=404, detail="Hotel not found")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Hotel not found")
+
+
+@router.get("/{hotel_id}/rooms", response_model=HotelRoomsResponse)
+def get_hotel_rooms(
+        hotel_id: str,
+        page: int = Query(1, ge=1, description="Número de página"),
+        limit: int = Query(20, ge=1, le=100, description="Habitaciones por página"),
+        room_type: Optional[str] = Query(None, description="Tipo de habitación"),
+        max_price: Optional[float] = Query(None, ge=0, description="Precio máximo por noche")
+):
+    """
+    Habitaciones de un hotel, paginadas.
+
+    Filtro y orden van sobre el índice (hotel, type, price_per_night, _id);
+    los hoteles aún sin migrar incluyen además las habitaciones de Hotel.rooms.
+    El total se cuenta hasta HOTEL_ROOMS_COUNT_CAP, como en la búsqueda de usuarios.
+    """
+    try:
+        hotel_oid = ObjectId(hotel_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid ObjectId format")
+
+    raw_filter = hotel_rooms_filter(hotel_oid)
+    if raw_filter is None:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+
+    filters = {'__raw__': raw_filter}
+    if room_type:
+        filters['type'] = room_type
+    if max_price is not None:
+        filters['price_per_night__lte'] = max_price
+
+    rooms_query = Room.objects(**filters).order_by('type', 'price_per_night', 'id')
+    total = rooms_query.clone().limit(HOTEL_ROOMS_COUNT_CAP + 1).count(with_limit_and_skip=True)
+    total_capped = total > HOTEL_ROOMS_COUNT_CAP
+    rooms = rooms_query.skip((page - 1) * limit).limit(limit)
+
+    return {
+        "rooms": [room_to_dict(room) for room in rooms],
+        "total": min(total, HOTEL_ROOMS_COUNT_CAP),
+        "total_capped": total_capped,
+        "page": page,
+        "limit": limit
+    }
@@ -0,0 +1,143 @@
+import io
+import json
+import shutil
+import tempfile
+from functools import partial
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+
+from app.models.Booking import Booking
+from app.models.Payment import Payment
+from app.models.User import User
+from app.schemas.payment_schema import PaymentCreate, PaymentResponse
+from app.utils.auth import require_permissions
+from app.utils.idempotency import run_idempotent
+from app.utils.payment_utils import (
+    upsert_payment,
+    is_same_payment,
+    payment_to_response,
+    reconcile_settlements
+)
+from app.utils.revenue_rollups import record_payment_completed
+
+router = APIRouter(prefix="/payments", tags=["payments"])
+
+
+@router.post("/", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
+async def create_payment(
+        payment: PaymentCreate,
+        response: Response,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+        current_user: User = Depends(require_permissions(["process_payments"]))
+):
+    """
+    Registra un pago. Es idempotente por transaction_id: un reintento con los
+    mismos datos devuelve el pago existente con 200. Con Idempotency-Key el
+    reintento se responde desde el almacén sin volver a la colección de pagos.
+    """
+    return await run_idempotent(
+        idempotency_key, "payments", str(current_user.id), payment, response,
+        partial(_create_payment, payment, response),
+        success_status=status.HTTP_201_CREATED
+    )
+
+
+def _create_payment(payment: PaymentCreate, response: Response) -> dict:
+    if not ObjectId.is_valid(payment.reservation_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ID de reserva inválido"
+        )
+
+    if not Booking.objects(id=payment.reservation_id).only('id').first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reserva no encontrada"
+        )
+
+    doc, created = upsert_payment(
+        reservation_id=payment.reservation_id,
+        transaction_id=payment.transaction_id,
+        amount=payment.amount,
+        method=payment.method.value,
+        status=payment.status.value
+    )
+
+    if not created:
+        if not is_same_payment(doc, payment.reservation_id, payment.amount, payment.method.value):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Ya existe un pago con ese transaction_id y datos distintos"
+            )
+        response.status_code = status.HTTP_200_OK
+    elif doc['status'] == 'completed':
+        record_payment_completed(payment.reservation_id, doc['amount'], doc['method'], doc['date'])
+
+    return payment_to_response(doc)
+
+
+@router.get("/", response_model=List[PaymentResponse])
+def get_payments(
+        reservation_id: Optional[str] = Query(None, description="Filtrar por reserva"),
+        payment_status: Optional[str] = Query(None, alias="status", description="Filtrar por estado"),
+        limit: int = Query(50, ge=1, le=500),
+        skip: int = Query(0, ge=0),
+        current_user: User = Depends(require_permissions(["process_payments"]))
+):
+    filters = {}
+    if reservation_id:
+        if not ObjectId.is_valid(reservation_id):
+            raise HTTPException(status_code=400, detail="ID de reserva inválido")
+        filters['reservation'] = ObjectId(reservation_id)
+    if payment_status:
+        filters['status'] = payment_status
+
+    payments = Payment.objects(**filters).order_by('-date').skip(skip).limit(limit).as_pymongo()
+    return [payment_to_response(doc) for doc in payments]
+
+
+@router.get("/{payment_id}", response_model=PaymentResponse)
+def get_payment(
+        payment_id: str,
+        current_user: User = Depends(require_permissions(["process_payments"]))
+):
+    if not ObjectId.is_valid(payment_id):
+        raise HTTPException(status_code=400, detail="Invalid ObjectId format")
+
+    doc = Payment.objects(id=payment_id).as_pymongo().first()
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Pago no encontrado")
+
+    return payment_to_response(doc)
+
+
+@router.post("/reconcile")
+def reconcile_payments(
+        file: UploadFile = File(..., description="Liquidación de la pasarela (NDJSON o CSV)"),
+        current_user: User = Depends(require_permissions(["process_payments"]))
+):
+    """
+    Concilia un fichero de liquidación de la pasarela.
+
+    Devuelve un NDJSON con una línea por discrepancia y un resumen final.
+    """
+    is_csv = (file.filename or "").lower().endswith(".csv") or file.content_type == "text/csv"
+
+    # FastAPI cierra el UploadFile al terminar el handler, antes de que se
+    # consuma la respuesta; se copia a un temporal propio (en disco si es grande)
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    shutil.copyfileobj(file.file, spool)
+    spool.seek(0)
+    stream = io.TextIOWrapper(spool, encoding="utf-8", newline="" if is_csv else None)
+
+    def report():
+        try:
+            for entry in reconcile_settlements(stream, is_csv=is_csv):
+                yield json.dumps(entry, default=str) + "\n"
+        finally:
+            stream.close()
+
+    return StreamingResponse(report(), media_type="application/x-ndjson")
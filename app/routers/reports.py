@@ -0,0 +1,37 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.models.User import User
+from app.utils.auth import require_permissions
+from app.utils.revenue_rollups import get_revenue_report
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+# Límite del rango para que el informe siga siendo barato
+MAX_REPORT_DAYS = 366
+
+
+@router.get("/revenue")
+def get_revenue(
+        date_from: date = Query(..., alias="from", description="Primer día (YYYY-MM-DD)"),
+        date_to: date = Query(..., alias="to", description="Último día (YYYY-MM-DD)"),
+        current_user: User = Depends(require_permissions(["view_reports"]))
+):
+    """
+    Ingresos diarios por tipo de habitación y método de pago.
+
+    Lee solo los rollups precalculados; no recorre pagos ni reservas.
+    """
+    if date_to < date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha final debe ser posterior a la inicial"
+        )
+    if (date_to - date_from).days >= MAX_REPORT_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango máximo es de {MAX_REPORT_DAYS} días"
+        )
+
+    return get_revenue_report(date_from, date_to)
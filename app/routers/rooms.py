@@ -1,26 +1,78 @@
 # app/routers/room.py - Versión completa
+from functools import partial
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from mongoengine import DoesNotExist
 
+from app.models.Hotel import Hotel
 from app.models.Room import Room
-from app.schemas.room_schema import RoomResponse, RoomCreate, RoomUpdate
+from app.models.User import User
+from app.schemas.bulk_schema import BulkImportResponse
+from app.schemas.room_schema import (
+    RoomAllocationRequest,
+    RoomAllocationResponse,
+    RoomCreate,
+    RoomResponse,
+    RoomTypeAvailability,
+    RoomUpdate
+)
+from app.utils.auth import require_permissions
+from app.utils.bulk_import import import_ndjson
+from app.utils.room_allocation import available_rooms, cheapest_allocation
+from app.utils.room_inventory import get_type_availability, move_room_type, refresh_capacity
+from app.utils.room_utils import get_available_room_types, room_document_data, room_to_dict
 
 router = APIRouter(prefix="/rooms", tags=["rooms"])
 
 
 @router.post("/create", response_model=RoomResponse)
 def create_room(room: RoomCreate):
-    room_data = room.dict()
+    try:
+        room_data = room_document_data(room.dict())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid ObjectId format")
+    if 'hotel' in room_data and not Hotel.objects(id=room_data['hotel']).count():
+        raise HTTPException(status_code=404, detail="Hotel not found")
+
     new_room = Room(**room_data).save()
+    refresh_capacity(new_room.type)
+
+    return room_to_dict(new_room)
+
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_create_rooms(
+        request: Request,
+        hotel_id: Optional[str] = Query(None, description="Hotel al que se enlazan las habitaciones"),
+        current_user: User = Depends(require_permissions(["manage_rooms"]))
+):
+    """
+    Alta masiva de habitaciones desde un cuerpo NDJSON (un RoomCreate por línea).
+
+    Las líneas inválidas o duplicadas (number_room) se devuelven como
+    errores sin detener la importación. hotel_id se asigna a las líneas
+    que no indiquen su propio hotel.
+    """
+    if hotel_id is not None:
+        try:
+            hotel_oid = ObjectId(hotel_id)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid ObjectId format")
+        if not Hotel.objects(id=hotel_oid).count():
+            raise HTTPException(status_code=404, detail="Hotel not found")
 
-    # Convertir a dict y cambiar _id por id
-    room_dict = new_room.to_mongo().to_dict()
-    room_dict['id'] = str(room_dict.pop('_id'))
+    result = await import_ndjson(
+        request.stream(), RoomCreate, Room,
+        prepare=partial(room_document_data, default_hotel_id=hotel_id)
+    )
 
-    return room_dict
+    if result.inserted:
+        for room_type in get_available_room_types():
+            refresh_capacity(room_type)
+
+    return result.to_response()
 
 
 @router.get("/", response_model=List[RoomResponse])
@@ -63,13 +115,84 @@ def get_available_rooms(
         rooms = available_rooms
 
     # Convertir a formato de respuesta
-    rooms_list = []
-    for room in rooms:
-        room_dict = room.to_mongo().to_dict()
-        room_dict['id'] = str(room_dict.pop('_id'))
-        rooms_list.append(room_dict)
+    return [room_to_dict(room) for room in rooms]
+
 
-    return rooms_list
+@router.get("/availability/types", response_model=List[RoomTypeAvailability])
+def get_room_type_availability(
+        check_in: datetime = Query(..., description="Fecha de entrada (YYYY-MM-DD)"),
+        check_out: datetime = Query(..., description="Fecha de salida (YYYY-MM-DD)"),
+        room_type: Optional[str] = Query(None, description="Tipo de habitación (por defecto, todos)")
+):
+    """
+    ¿Queda alguna habitación de este tipo libre en estas fechas?
+
+    Se responde con los contadores de inventario por tipo y noche, sin
+    revisar habitaciones ni reservas una a una.
+    """
+    if check_in >= check_out:
+        raise HTTPException(
+            status_code=400,
+            detail="Check-in date must be before check-out date"
+        )
+
+    room_types = get_available_room_types()
+    if room_type:
+        if room_type not in room_types:
+            raise HTTPException(status_code=400, detail="Invalid room type")
+        room_types = [room_type]
+
+    return get_type_availability(room_types, check_in, check_out)
+
+
+@router.post("/allocate", response_model=RoomAllocationResponse)
+def allocate_rooms(request: RoomAllocationRequest):
+    """
+    Combinación de habitaciones más barata para un grupo.
+
+    Las habitaciones libres salen de una sola lectura masiva (más dos
+    consultas distinct de reservas y bloqueos); el reparto se resuelve en
+    memoria con una mochila acotada sobre la capacidad, cuyo coste depende
+    del tamaño del grupo y no del número de habitaciones.
+    """
+    if request.check_in >= request.check_out:
+        raise HTTPException(
+            status_code=400,
+            detail="Check-in date must be before check-out date"
+        )
+    if request.room_type and request.room_type not in get_available_room_types():
+        raise HTTPException(status_code=400, detail="Invalid room type")
+
+    rooms = available_rooms(request.check_in, request.check_out, request.room_type)
+    allocation = cheapest_allocation(rooms, request.party_size)
+    if allocation is None:
+        raise HTTPException(status_code=404, detail="Not enough free capacity for this party")
+
+    nights = (request.check_out.date() - request.check_in.date()).days
+    price_per_night = sum(room['price_per_night'] for room in allocation)
+    total_price = round(price_per_night * nights, 2)
+    if request.budget is not None and total_price > request.budget:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Cheapest allocation costs {total_price}, above the budget of {request.budget}"
+        )
+
+    return {
+        'rooms': [
+            {
+                'id': str(room['_id']),
+                'number_room': room['number_room'],
+                'type': room['type'],
+                'capacity': room['capacity'],
+                'price_per_night': room['price_per_night']
+            }
+            for room in sorted(allocation, key=lambda room: room['number_room'])
+        ],
+        'total_capacity': sum(room['capacity'] for room in allocation),
+        'price_per_night': price_per_night,
+        'nights': nights,
+        'total_price': total_price
+    }
 
 
 @router.get("/{room_id}", response_model=RoomResponse)
@@ -83,12 +206,7 @@ def get_room_details(room_id: str):
 
     try:
         room = Room.objects.get(id=room_oid)
-
-        # Convertir a dict y cambiar _id por id
-        room_dict = room.to_mongo().to_dict()
-        room_dict['id'] = str(room_dict.pop('_id'))
-
-        return room_dict
+        return room_to_dict(room)
 
     except DoesNotExist:
         raise HTTPException(status_code=404, detail="Room not found")
@@ -107,17 +225,30 @@ def update_room(room_id: str, room_update: RoomUpdate):
         room = Room.objects.get(id=room_oid)
 
         # Actualizar campos
+        previous_type = room.type
         update_data = room_update.dict(exclude_unset=True)
+        try:
+            update_data = room_document_data(update_data)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid ObjectId format")
+        if 'hotel' in update_data and not Hotel.objects(id=update_data['hotel']).count():
+            raise HTTPException(status_code=404, detail="Hotel not found")
         for field, value in update_data.items():
             setattr(room, field, value)
 
         room.save()
 
-        # Convertir a dict y cambiar _id por id
-        room_dict = room.to_mongo().to_dict()
-        room_dict['id'] = str(room_dict.pop('_id'))
+        # Las noches vendidas siguen a la habitación al cambiar de tipo
+        if previous_type != room.type:
+            move_room_type(room.id, previous_type, room.type)
+
+        # La capacidad por tipo cambia al cambiar el tipo o la disponibilidad
+        if 'type' in update_data or 'availability' in update_data:
+            refresh_capacity(room.type)
+            if previous_type != room.type:
+                refresh_capacity(previous_type)
 
-        return room_dict
+        return room_to_dict(room)
 
     except DoesNotExist:
         raise HTTPException(status_code=404, detail="Room not found")
@@ -135,6 +266,7 @@ def delete_room(room_id: str):
     try:
         room = Room.objects.get(id=room_oid)
         room.delete()
+        refresh_capacity(room.type)
         return {"message": "Room deleted successfully"}
 
     except DoesNotExist:
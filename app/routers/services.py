@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from mongoengine import DoesNotExist, NotUniqueError
+
+from app.models.Service import HourService, Service
+from app.models.User import User
+from app.schemas.service_schema import ServiceCategory, ServiceCreate, ServiceResponse, ServiceUpdate
+from app.utils.auth import require_permissions
+from app.utils.service_catalog import service_catalog
+from app.utils.service_schedule import schedule_index, service_to_dict
+
+router = APIRouter(prefix="/services", tags=["services"])
+
+
+def _get_service(service_id: str) -> Service:
+    if not ObjectId.is_valid(service_id):
+        raise HTTPException(status_code=400, detail="Invalid ObjectId format")
+    try:
+        return Service.objects.get(id=service_id)
+    except DoesNotExist:
+        raise HTTPException(status_code=404, detail="Servicio no encontrado")
+
+
+@router.get("/", response_model=List[ServiceResponse])
+def get_services(
+        category: Optional[ServiceCategory] = Query(None, description="Filtrar por categoría"),
+        include_unavailable: bool = Query(False, description="Incluir servicios no disponibles")
+):
+    """Catálogo de servicios (usa el índice availability + category)"""
+    filters = {}
+    if not include_unavailable:
+        filters['availability'] = True
+    if category:
+        filters['category'] = category.value
+
+    services = Service.objects(**filters).order_by('name').as_pymongo()
+    return [service_to_dict(doc) for doc in services]
+
+
+@router.get("/open", response_model=List[ServiceResponse])
+def get_open_services(
+        at: Optional[datetime] = Query(None, description="Instante a consultar (por defecto, ahora)"),
+        category: Optional[ServiceCategory] = Query(None, description="Filtrar por categoría")
+):
+    """Servicios abiertos ahora o en el instante indicado (hora local del hotel)"""
+    return schedule_index.open_at(at or datetime.now(), category.value if category else None)
+
+
+@router.post("/", response_model=ServiceResponse, status_code=status.HTTP_201_CREATED)
+def create_service(
+        service: ServiceCreate,
+        current_user: User = Depends(require_permissions(["manage_rooms"]))
+):
+    data = service.dict()
+    data['schedule'] = [HourService(**slot) for slot in data['schedule']]
+
+    try:
+        new_service = Service(**data).save()
+    except NotUniqueError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ya existe un servicio con ese nombre"
+        )
+
+    schedule_index.invalidate()
+    service_catalog.invalidate()
+    return service_to_dict(new_service.to_mongo().to_dict())
+
+
+@router.get("/{service_id}", response_model=ServiceResponse)
+def get_service(service_id: str):
+    return service_to_dict(_get_service(service_id).to_mongo().to_dict())
+
+
+@router.put("/{service_id}", response_model=ServiceResponse)
+def update_service(
+        service_id: str,
+        service_update: ServiceUpdate,
+        current_user: User = Depends(require_permissions(["manage_rooms"]))
+):
+    service = _get_service(service_id)
+
+    update_data = service_update.dict(exclude_unset=True)
+    if 'schedule' in update_data:
+        update_data['schedule'] = [HourService(**slot) for slot in update_data['schedule'] or []]
+    for field, value in update_data.items():
+        setattr(service, field, value)
+
+    try:
+        service.save()
+    except NotUniqueError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Ya existe un servicio con ese nombre"
+        )
+
+    schedule_index.invalidate()
+    service_catalog.invalidate()
+    return service_to_dict(service.to_mongo().to_dict())
+
+
+@router.delete("/{service_id}")
+def delete_service(
+        service_id: str,
+        current_user: User = Depends(require_permissions(["manage_rooms"]))
+):
+    _get_service(service_id).delete()
+    schedule_index.invalidate()
+    service_catalog.invalidate()
+    return {"message": "Servicio eliminado"}
@@ -8,8 +8,11 @@ from app.schemas.user_schema import (
     UserResponse, UserUpdate, UserListResponse, UserRole
 )
 from app.utils.auth import (
-    get_current_active_user, require_permissions, require_roles, oauth2_scheme
+    get_current_active_user, require_permissions, require_roles, oauth2_scheme,
+    revoke_user_refresh_tokens
 )
+from app.utils.user_search import build_search_filter, count_users
+from app.utils.user_stats import user_stats_cache
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -127,19 +130,17 @@ def get_all_users(
         if active is not None:
             query['active'] = active
 
+        raw_query = {}
         if search:
-            # Búsqueda en nombre o email (insensible a mayúsculas)
-            query['$or'] = [
-                {'name': {'$regex': search, '$options': 'i'}},
-                {'email': {'$regex': search, '$options': 'i'}}
-            ]
+            # Búsqueda por prefijo sobre claves normalizadas e indexadas
+            raw_query = build_search_filter(search) or {}
 
         # Calcular offset
         offset = (page - 1) * limit
 
         # Obtener usuarios
-        users_query = User.objects.filter(**query)
-        total = users_query.count()
+        users_query = User.objects(__raw__=raw_query).filter(**query)
+        total, total_capped = count_users(users_query, has_filters=bool(query or raw_query))
         users = users_query.skip(offset).limit(limit)
 
         # Convertir a dict
@@ -148,6 +149,7 @@ def get_all_users(
         return {
             "users": users_data,
             "total": total,
+            "total_capped": total_capped,
             "page": page,
             "limit": limit
         }
@@ -182,9 +184,14 @@ def deactivate_user(
 
     try:
         user = User.objects.get(id=user_oid)
+        was_active = user.active
         user.active = False
         user.save()
 
+        if was_active:
+            user_stats_cache.on_deactivate(role.name for role in user.roles)
+        revoke_user_refresh_tokens(user_id)
+
         print(f"Usuario desactivado: {user.email}")
         return {"message": "Usuario desactivado exitosamente"}
 
@@ -210,9 +217,13 @@ def activate_user(
 
     try:
         user = User.objects.get(id=user_oid)
+        was_active = user.active
         user.active = True
         user.save()
 
+        if not was_active:
+            user_stats_cache.on_activate(role.name for role in user.roles)
+
         print(f"Usuario activado: {user.email}")
         return {"message": "Usuario activado exitosamente"}
 
@@ -228,22 +239,8 @@ def get_user_stats(
         current_user: User = Depends(require_permissions(["view_reports"]))
 ):
     try:
-        total_users = User.objects.count()
-        active_users = User.objects.filter(active=True).count()
-        inactive_users = total_users - active_users
-
-        # Estadísticas por rol
-        role_stats = {}
-        for role in ["admin", "employee", "client"]:
-            count = User.objects.filter(roles__name=role, active=True).count()
-            role_stats[role] = count
-
-        return {
-            "total_users": total_users,
-            "active_users": active_users,
-            "inactive_users": inactive_users,
-            "role_distribution": role_stats
-        }
+        # Lectura en memoria; la agregación solo se ejecuta al expirar el TTL
+        return user_stats_cache.get()
 
     except Exception as e:
         print(f"Error al obtener estadísticas: {e}")
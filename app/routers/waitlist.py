@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.models.User import User
+from app.models.WaitlistEntry import WaitlistEntry
+from app.schemas.waitlist_schema import WaitlistCreate, WaitlistResponse
+from app.utils.auth import get_current_user
+from app.utils.room_utils import get_available_room_types
+from app.utils.waitlist import WAITLIST_MAX_NIGHTS
+
+router = APIRouter(prefix="/waitlist", tags=["waitlist"])
+
+
+def _entry_to_response(entry: WaitlistEntry) -> dict:
+    return {
+        'id': str(entry.id),
+        'room_type': entry.room_type,
+        'check_in': entry.check_in,
+        'check_out': entry.check_out,
+        'auto_hold': entry.auto_hold,
+        'status': entry.status,
+        'hold_id': str(entry.hold_id) if entry.hold_id else None,
+        'created_at': entry.created_at
+    }
+
+
+@router.post("/", response_model=WaitlistResponse, status_code=status.HTTP_201_CREATED)
+def join_waitlist(
+        request: WaitlistCreate,
+        current_user: User = Depends(get_current_user)
+):
+    """Apunta al usuario a la lista de espera de un tipo de habitación y fechas"""
+    if request.room_type not in get_available_room_types():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tipo de habitación inválido")
+
+    if request.check_in < datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se pueden hacer reservas para fechas pasadas"
+        )
+
+    if request.check_out - request.check_in > timedelta(days=WAITLIST_MAX_NIGHTS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"La estancia en lista de espera no puede exceder {WAITLIST_MAX_NIGHTS} noches"
+        )
+
+    entry = WaitlistEntry(
+        user=current_user,
+        room_type=request.room_type,
+        check_in=request.check_in,
+        check_out=request.check_out,
+        auto_hold=request.auto_hold
+    ).save()
+
+    return _entry_to_response(entry)
+
+
+@router.get("/", response_model=List[WaitlistResponse])
+def get_my_waitlist(current_user: User = Depends(get_current_user)):
+    entries = WaitlistEntry.objects(user=current_user, status__ne='cancelled').order_by('-created_at')
+    return [_entry_to_response(entry) for entry in entries]
+
+
+@router.delete("/{entry_id}", status_code=status.HTTP_204_NO_CONTENT)
+def leave_waitlist(
+        entry_id: str,
+        current_user: User = Depends(get_current_user)
+):
+    if not ObjectId.is_valid(entry_id):
+        raise HTTPException(status_code=400, detail="Invalid ObjectId format")
+
+    updated = WaitlistEntry.objects(id=entry_id, user=current_user).update(set__status='cancelled')
+    if not updated:
+        raise HTTPException(status_code=404, detail="Entrada de lista de espera no encontrada")
+    return None
@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 
 class BookingStatus(str, Enum):
     PENDING = "pending"
@@ -14,11 +14,12 @@ class ExtraServiceBase(BaseModel):
     price: float
     description: Optional[str] = None
 
-class ExtraServiceCreate(ExtraServiceBase):
-    pass
+class ExtraServiceCreate(BaseModel):
+    """El precio lo fija el catálogo, no el cliente"""
+    service_id: str
 
 class ExtraServiceResponse(ExtraServiceBase):
-    pass
+    service_id: Optional[str] = None
 
 class BookingBase(BaseModel):
     room_id: str
@@ -59,10 +60,33 @@ class BookingResponse(BookingBase):
     user_id: str
     total_price: float
     status: BookingStatus
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class BookingBatchCreate(BaseModel):
+    """Reserva de grupo: todas las habitaciones o ninguna"""
+    reservations: List[BookingCreate] = Field(..., min_length=1, max_length=50)
+
+class BookingBatchResponse(BaseModel):
+    group_id: str
+    reservations: List[BookingResponse]
+    total_price: float
+
+class BookingHoldCreate(BookingBase):
+    minutes: int = Field(10, ge=1, le=30, description="Duración del bloqueo en minutos")
+
+class BookingHoldConfirm(BaseModel):
+    additional_services: List[ExtraServiceCreate] = []
+
+class BookingHoldResponse(BaseModel):
+    id: str
+    room_id: str
+    check_in: datetime
+    check_out: datetime
+    expires_at: datetime
+
 class StatusHistory(BaseModel):
     status: BookingStatus
     date: datetime
@@ -30,7 +30,6 @@ class HotelResponse(HotelBase):
     rating: float = 0.0
     amenities: List[AmenityBase]
     images: List[str] = []
-    rooms: List[str] = []  # Lista de IDs de habitaciones
 
     class Config:
         from_attributes = True
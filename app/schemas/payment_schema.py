@@ -1,5 +1,6 @@
 from datetime import datetime
 from enum import Enum
+from typing import Optional
 
 from pydantic import BaseModel, Field
 
@@ -19,9 +20,15 @@ class PaymentBase(BaseModel):
     amount: float = Field(..., gt=0)
     method: PaymentMethod
 
+class PaymentCreate(PaymentBase):
+    transaction_id: str = Field(..., min_length=1, description="ID de la transacción en la pasarela")
+    status: PaymentStatus = PaymentStatus.PENDING
+
 class PaymentResponse(PaymentBase):
     id: str
+    transaction_id: str
     status: PaymentStatus
     transaction_date: datetime
+    settled_at: Optional[datetime] = None
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,3 +1,4 @@
+from datetime import date, datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 
@@ -16,6 +17,7 @@ class RoomCreate(RoomBase):
     description: Optional[str] = None
     images: list[str] = []
     availability: Optional[bool] = True
+    hotel_id: Optional[str] = None
 
 
 class RoomUpdate(BaseModel):
@@ -27,13 +29,59 @@ class RoomUpdate(BaseModel):
     description: Optional[str] = None
     images: Optional[List[str]] = None
     availability: Optional[bool] = None
+    hotel_id: Optional[str] = None
 
 class RoomResponse(RoomBase):
     id: str
+    hotel_id: Optional[str] = None
     availability: bool  # Corregido: availability (igual que en el modelo)
     amenities: list[AmenityBase]
     description: Optional[str] = None  # Agregado
     images: list[str] = []  # Agregado
 
     class Config:
-        from_attributes = True  # Corregido: from_attributes
\ No newline at end of file
+        from_attributes = True  # Corregido: from_attributes
+
+
+class HotelRoomsResponse(BaseModel):
+    rooms: List[RoomResponse]
+    total: int
+    total_capped: bool = False  # True si total es un mínimo aproximado
+    page: int
+    limit: int
+
+
+class NightAvailability(BaseModel):
+    night: date
+    sold: int
+    available: int
+
+
+class RoomTypeAvailability(BaseModel):
+    room_type: str
+    available: int  # Habitaciones libres durante todo el rango
+    nights: List[NightAvailability]
+
+
+class RoomAllocationRequest(BaseModel):
+    party_size: int = Field(..., gt=0, le=100, description="Personas a alojar")
+    check_in: datetime
+    check_out: datetime
+    budget: Optional[float] = Field(None, gt=0, description="Precio total máximo de la estancia")
+    room_type: Optional[str] = None
+
+
+class AllocatedRoom(BaseModel):
+    id: str
+    number_room: int
+    type: str
+    capacity: int
+    price_per_night: float
+
+
+class RoomAllocationResponse(BaseModel):
+    rooms: List[AllocatedRoom]
+    total_capacity: int
+    price_per_night: float
+    nights: int
+    total_price: float
@@ -0,0 +1,69 @@
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+TIME_PATTERN = r"^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$"
+
+
+class ServiceCategory(str, Enum):
+    SPA = "spa"
+    RESTAURANT = "restaurante"
+    GYM = "gym"
+    POOL = "pool"
+    OTHER = "other"
+
+
+class WeekDay(str, Enum):
+    MONDAY = "Monday"
+    TUESDAY = "Tuesday"
+    WEDNESDAY = "Wednesday"
+    THURSDAY = "Thursday"
+    FRIDAY = "Friday"
+    SATURDAY = "Saturday"
+    SUNDAY = "Sunday"
+
+
+class HourServiceSchema(BaseModel):
+    day: WeekDay
+    start_time: str = Field(..., pattern=TIME_PATTERN, example="09:00")
+    end_time: str = Field(..., pattern=TIME_PATTERN, example="21:00")
+
+    class Config:
+        use_enum_values = True
+
+
+class ServiceBase(BaseModel):
+    name: str = Field(..., max_length=100)
+    description: Optional[str] = None
+    price: float = Field(..., ge=0)
+    category: ServiceCategory = ServiceCategory.OTHER
+    schedule: List[HourServiceSchema] = []
+    availability: bool = True
+
+    class Config:
+        use_enum_values = True
+
+
+class ServiceCreate(ServiceBase):
+    pass
+
+
+class ServiceUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=100)
+    description: Optional[str] = None
+    price: Optional[float] = Field(None, ge=0)
+    category: Optional[ServiceCategory] = None
+    schedule: Optional[List[HourServiceSchema]] = None
+    availability: Optional[bool] = None
+
+    class Config:
+        use_enum_values = True
+
+
+class ServiceResponse(ServiceBase):
+    id: str
+
+    class Config:
+        from_attributes = True
+        use_enum_values = True
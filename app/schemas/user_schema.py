@@ -97,11 +97,25 @@ class TokenData(BaseModel):
 class TokenResponse(BaseModel):
     """Schema para respuesta de autenticación"""
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
-    expires_in: int = 3600  # 1 hora en segundos
+    expires_in: int = 300  # 5 minutos en segundos
     user: UserResponse
 
 
+class RefreshTokenRequest(BaseModel):
+    """Schema para renovar el access token"""
+    refresh_token: str
+
+
+class TokenRefreshResponse(BaseModel):
+    """Schema para respuesta de renovación (sin datos de usuario)"""
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int = 300
+
+
 class PasswordResetRequest(BaseModel):
     """Schema para solicitud de reset de contraseña"""
     email: EmailStr
@@ -134,5 +148,6 @@ class UserListResponse(BaseModel):
     """Schema para lista de usuarios (admin)"""
     users: List[UserResponse]
     total: int
+    total_capped: bool = False  # True si total es un mínimo aproximado
     page: int
     limit: int
\ No newline at end of file
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class WaitlistCreate(BaseModel):
+    room_type: str = Field(..., example="deluxe")
+    check_in: datetime
+    check_out: datetime
+    auto_hold: bool = Field(True, description="Bloquear la habitación automáticamente al liberarse")
+
+    @field_validator("check_out")
+    @classmethod
+    def validate_check_out(cls, v, info):
+        if info.data.get("check_in") and v <= info.data["check_in"]:
+            raise ValueError("La fecha de salida debe ser posterior a la fecha de entrada.")
+        return v
+
+
+class WaitlistResponse(BaseModel):
+    id: str
+    room_type: str
+    check_in: datetime
+    check_out: datetime
+    auto_hold: bool
+    status: str
+    hold_id: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
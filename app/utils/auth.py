@@ -1,5 +1,7 @@
+import hashlib
 import os
 import secrets
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -7,13 +9,15 @@ from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 
+from app.models.RefreshToken import RefreshToken
 from app.models.User import User
 from app.schemas.user_schema import TokenData
 
 # Configuración
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 horas
+ACCESS_TOKEN_EXPIRE_MINUTES = 5
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -121,6 +125,79 @@ def generate_reset_token() -> str:
     return secrets.token_urlsafe(32)
 
 
+def hash_token(token: str) -> str:
+    """Hash determinista para buscar tokens opacos sin guardarlos en claro"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def issue_refresh_token(user_id: str, email: str, family_id: Optional[str] = None) -> str:
+    """
+    Emite un refresh token opaco y guarda su hash.
+
+    Args:
+        user_id: ID del usuario
+        email: Email del usuario
+        family_id: Familia de rotación; None inicia una nueva (login)
+
+    Returns:
+        str: Token en claro para entregar al cliente
+    """
+    token = secrets.token_urlsafe(48)
+    RefreshToken(
+        token_hash=hash_token(token),
+        family_id=family_id or uuid.uuid4().hex,
+        user_id=user_id,
+        email=email,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ).save()
+    return token
+
+
+def rotate_refresh_token(token: str) -> tuple[str, RefreshToken]:
+    """
+    Consume un refresh token y emite el siguiente de su familia.
+
+    El token se marca como usado con una única operación atómica. Si llega
+    un token ya usado se asume que fue robado y se revoca toda la familia.
+
+    Args:
+        token: Refresh token presentado por el cliente
+
+    Returns:
+        tuple: (nuevo refresh token, documento del token consumido)
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido o expirado",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    token_hash = hash_token(token)
+    now = datetime.utcnow()
+
+    consumed = RefreshToken.objects(
+        token_hash=token_hash,
+        used=False,
+        revoked=False,
+        expires_at__gt=now
+    ).modify(set__used=True, set__used_at=now)
+
+    if consumed is None:
+        # Detección de reutilización: revocar toda la familia
+        reused = RefreshToken.objects(token_hash=token_hash, used=True).only('family_id').first()
+        if reused:
+            RefreshToken.objects(family_id=reused.family_id).update(set__revoked=True)
+            print(f"Reutilización de refresh token detectada, familia revocada: {reused.family_id}")
+        raise credentials_exception
+
+    new_token = issue_refresh_token(consumed.user_id, consumed.email, consumed.family_id)
+    return new_token, consumed
+
+
+def revoke_user_refresh_tokens(user_id: str):
+    RefreshToken.objects(user_id=user_id, revoked=False).update(set__revoked=True)
+
+
 def authenticate_user(email: str, password: str) -> Optional[User]:
     try:
         user = User.objects.get(email=email, active=True)
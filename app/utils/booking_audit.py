@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+from typing import Iterator, List
+
+from app.models.Booking import Booking
+
+AUDIT_BATCH_SIZE = 1000
+
+
+def find_double_bookings(batch_size: int = AUDIT_BATCH_SIZE) -> Iterator[dict]:
+    """
+    Detecta reservas solapadas de una misma habitación en un único recorrido.
+
+    Las reservas no canceladas se leen ordenadas por (room, check_in) sobre
+    el índice del mismo nombre. Por cada habitación solo se guardan las
+    reservas que siguen "abiertas" (check_out posterior al check_in actual),
+    así que la memoria depende del solapamiento máximo y no del número de
+    reservas.
+
+    Args:
+        batch_size: Documentos por lote del cursor
+
+    Returns:
+        Iterator[dict]: Un conflicto por cada par de reservas solapadas
+    """
+    cursor = Booking.objects(
+        status__not__match={"reserve_status": "cancelled"}
+    ).only('room', 'check_in', 'check_out').order_by('room', 'check_in').hint(
+        [('room', 1), ('check_in', 1)]
+    ).as_pymongo().batch_size(batch_size)
+
+    current_room = None
+    active: List[dict] = []
+    for booking in cursor:
+        if booking['room'] != current_room:
+            current_room = booking['room']
+            active = []
+
+        active = [other for other in active if other['check_out'] > booking['check_in']]
+        for other in active:
+            yield {
+                'room_id': str(current_room),
+                'booking_id': str(other['_id']),
+                'conflicting_booking_id': str(booking['_id']),
+                'overlap_from': booking['check_in'],
+                'overlap_to': min(other['check_out'], booking['check_out'])
+            }
+        active.append(booking)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def to_ndjson(records: Iterator[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, default=_json_default) + "\n"
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.database import connect_db
+
+    connect_db()
+    conflicts = 0
+    for line in to_ndjson(find_double_bookings()):
+        sys.stdout.write(line)
+        conflicts += 1
+    print(f"Conflictos encontrados: {conflicts}", file=sys.stderr)
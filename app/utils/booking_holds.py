@@ -0,0 +1,156 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.models.BookingHold import BookingHold
+
+HOLD_MINUTES = int(os.getenv("BOOKING_HOLD_MINUTES", "10"))
+MAX_HOLD_MINUTES = int(os.getenv("BOOKING_HOLD_MAX_MINUTES", "30"))
+
+
+def overlapping_holds_query(room_id, check_in: datetime, check_out: datetime,
+                            exclude_hold: Optional[str] = None, now: Optional[datetime] = None) -> dict:
+    """Filtro raw de bloqueos vigentes que se solapan con la estancia"""
+    query = {
+        'room': ObjectId(room_id),
+        'check_in': {'$lt': check_out},
+        'check_out': {'$gt': check_in},
+        'expires_at': {'$gt': now or datetime.utcnow()}
+    }
+    if exclude_hold:
+        query['_id'] = {'$ne': ObjectId(exclude_hold)}
+    return query
+
+
+def has_overlapping_hold(room_id, check_in: datetime, check_out: datetime,
+                         exclude_hold: Optional[str] = None) -> bool:
+    return BookingHold._get_collection().find_one(
+        overlapping_holds_query(room_id, check_in, check_out, exclude_hold),
+        {'_id': 1}
+    ) is not None
+
+
+def held_rooms(stays: List[Tuple[ObjectId, datetime, datetime]]) -> List[int]:
+    """Posiciones de un lote de estancias que chocan con bloqueos vigentes (una consulta)"""
+    if not stays:
+        return []
+
+    now = datetime.utcnow()
+    holds = list(BookingHold._get_collection().find(
+        {'$or': [{'room': room_id, 'check_in': {'$lt': check_out}, 'check_out': {'$gt': check_in}}
+                 for room_id, check_in, check_out in stays],
+         'expires_at': {'$gt': now}},
+        {'room': 1, 'check_in': 1, 'check_out': 1}
+    ))
+    return [
+        position for position, (room_id, check_in, check_out) in enumerate(stays)
+        if any(hold['room'] == room_id and hold['check_in'] < check_out and hold['check_out'] > check_in
+               for hold in holds)
+    ]
+
+
+def hold_doc_to_response(doc: dict) -> dict:
+    """Convierte un documento raw de booking_holds al formato de BookingHoldResponse"""
+    return {
+        'id': str(doc['_id']),
+        'room_id': str(doc['room']),
+        'check_in': doc['check_in'],
+        'check_out': doc['check_out'],
+        'expires_at': doc['expires_at']
+    }
+
+
+def create_hold(room_id: str, user_id, check_in: datetime, check_out: datetime,
+                minutes: int = HOLD_MINUTES) -> Optional[dict]:
+    """
+    Bloquea las noches de una habitación durante unos minutos.
+
+    La disponibilidad se comprueba antes de insertar y se verifica después:
+    si dos bloqueos solapados se insertan a la vez, solo sobrevive el más
+    antiguo (menor _id) y el otro se borra.
+
+    Args:
+        room_id: ID de la habitación
+        user_id: ID del usuario
+        check_in: Fecha de entrada
+        check_out: Fecha de salida
+        minutes: Duración del bloqueo (limitada a MAX_HOLD_MINUTES)
+
+    Returns:
+        dict: El bloqueo creado, o None si la habitación no está disponible
+    """
+    from app.utils.booking_utils import validate_room_availability
+
+    if not validate_room_availability(room_id, check_in, check_out):
+        return None
+
+    now = datetime.utcnow()
+    hold = {
+        '_id': ObjectId(),
+        'room': ObjectId(room_id),
+        'user': ObjectId(str(user_id)),
+        'check_in': check_in,
+        'check_out': check_out,
+        'created_at': now,
+        'expires_at': now + timedelta(minutes=min(max(minutes, 1), MAX_HOLD_MINUTES))
+    }
+    collection = BookingHold._get_collection()
+    collection.insert_one(hold)
+
+    query = overlapping_holds_query(room_id, check_in, check_out, now=now)
+    query['_id'] = {'$lt': hold['_id']}
+    if collection.find_one(query, {'_id': 1}) is not None:
+        collection.delete_one({'_id': hold['_id']})
+        return None
+    return hold
+
+
+def hold_intervals(room_id, user_id, intervals: List[Tuple[datetime, datetime]],
+                   minutes: int = 1) -> Optional[List[ObjectId]]:
+    """
+    Reclama varios tramos de una habitación con un bloqueo por tramo.
+
+    Sirve para aplicar un cambio de fechas sin que otra reserva o bloqueo
+    ocupe las noches añadidas entre la comprobación y la escritura. Si un
+    tramo no está libre se deshacen los bloqueos ya creados.
+
+    Args:
+        room_id: ID de la habitación
+        user_id: ID del usuario
+        intervals: Tramos (check_in, check_out) a reclamar
+        minutes: Duración de cada bloqueo; se liberan al terminar la escritura
+
+    Returns:
+        List[ObjectId]: IDs de los bloqueos creados, o None si algún tramo está ocupado
+    """
+    hold_ids = []
+    for check_in, check_out in intervals:
+        hold = create_hold(str(room_id), user_id, check_in, check_out, minutes)
+        if hold is None:
+            release_holds(hold_ids)
+            return None
+        hold_ids.append(hold['_id'])
+    return hold_ids
+
+
+def release_holds(hold_ids: List[ObjectId]):
+    if hold_ids:
+        BookingHold._get_collection().delete_many({'_id': {'$in': hold_ids}})
+
+
+def get_active_hold(hold_id: str, user_id) -> Optional[dict]:
+    return BookingHold._get_collection().find_one({
+        '_id': ObjectId(hold_id),
+        'user': ObjectId(str(user_id)),
+        'expires_at': {'$gt': datetime.utcnow()}
+    })
+
+
+def release_hold(hold_id: str, user_id) -> bool:
+    result = BookingHold._get_collection().delete_one({
+        '_id': ObjectId(hold_id),
+        'user': ObjectId(str(user_id))
+    })
+    return result.deleted_count > 0
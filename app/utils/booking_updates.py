@@ -0,0 +1,245 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+from app.models.Booking import Booking, ExtraService
+from app.utils.revenue_rollups import REVENUE_STATUSES
+
+# Último estado del historial; una reserva sin historial se considera pendiente
+LAST_STATUS = {'$ifNull': [{'$arrayElemAt': ['$status.reserve_status', -1]}, 'pending']}
+
+# El último estado cuenta como ingreso y el importe que ya suman los rollups
+IN_REVENUE = {'$in': [LAST_STATUS, sorted(REVENUE_STATUSES)]}
+COUNTED_AMOUNT = {'$ifNull': ['$booked_amount', '$total']}
+
+MODIFIABLE_STATUSES = ['pending', 'confirmed']
+CANCELLATION_NOTICE_HOURS = 24
+
+VALID_TRANSITIONS = {
+    'pending': ['confirmed', 'cancelled'],
+    'confirmed': ['completed', 'cancelled'],
+    'cancelled': [],
+    'completed': []
+}
+
+
+def last_status(doc: dict) -> str:
+    history = doc.get('status') or []
+    return history[-1].get('reserve_status', 'pending') if history else 'pending'
+
+
+def booking_doc_to_response(doc: dict) -> dict:
+    """Convierte un documento raw de bookings al formato de BookingResponse"""
+    return {
+        'id': str(doc['_id']),
+        'room_id': str(doc['room']),
+        'user_id': str(doc['user']),
+        'check_in': doc['check_in'],
+        'check_out': doc['check_out'],
+        'total_price': doc['total'],
+        'status': last_status(doc),
+        'version': doc.get('version', 0)
+    }
+
+
+def _guard(booking_id: str, user_id: Optional[str], statuses: Iterable[str],
+           expected_version: Optional[int]) -> dict:
+    query = {
+        '_id': ObjectId(booking_id),
+        '$expr': {'$in': [LAST_STATUS, list(statuses)]}
+    }
+    if user_id:
+        query['user'] = ObjectId(user_id)
+    if expected_version is not None:
+        # Las reservas anteriores al campo version equivalen a la versión 0
+        query['version'] = {'$in': [0, None]} if expected_version == 0 else expected_version
+    return query
+
+
+def raise_update_rejected(booking_id: str, user_id: Optional[str], statuses: Iterable[str],
+                          expected_version: Optional[int], action: str, fallback_detail: str):
+    """
+    Explica por qué una actualización condicional no encontró la reserva.
+
+    Solo se ejecuta en el camino de error, así que el caso normal sigue
+    siendo una única operación.
+    """
+    doc = Booking.objects(id=booking_id).only('user', 'status', 'version').as_pymongo().first()
+    if doc is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reserva no encontrada")
+    if user_id and str(doc['user']) != str(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"No tienes permisos para {action} esta reserva"
+        )
+    if expected_version is not None and doc.get('version', 0) != expected_version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La reserva ha cambiado; vuelve a cargarla antes de modificarla"
+        )
+    current_status = last_status(doc)
+    if current_status not in statuses:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No se puede {action} una reserva en estado '{current_status}'"
+        )
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=fallback_detail)
+
+
+def _revenue_adjustment(amount, when: datetime) -> dict:
+    """
+    Campos de un pipeline que registran un cambio de total si la reserva ya
+    cuenta como ingreso; amount puede ser una expresión.
+    """
+    return {
+        'booked_amount': {'$cond': [IN_REVENUE, {'$add': [COUNTED_AMOUNT, amount]}, '$booked_amount']},
+        'revenue_adjustments': {'$cond': [
+            IN_REVENUE,
+            {'$concatArrays': [{'$ifNull': ['$revenue_adjustments', []]}, [{'amount': amount, 'date': when}]]},
+            '$revenue_adjustments'
+        ]}
+    }
+
+
+def push_extra_service(booking_id: str, user_id: str, extra: ExtraService,
+                       expected_version: Optional[int] = None,
+                       when: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Añade un extra y suma su precio al total en una sola operación.
+
+    En una reserva confirmada también ajusta booked_amount y registra el
+    ajuste, para que los rollups resten lo mismo que sumaron si se cancela.
+
+    Returns:
+        dict: Reserva actualizada, o None si no cumple las condiciones
+    """
+    return Booking._get_collection().find_one_and_update(
+        _guard(booking_id, user_id, MODIFIABLE_STATUSES, expected_version),
+        [{'$set': {
+            'extra_services': {'$concatArrays': [
+                {'$ifNull': ['$extra_services', []]}, [{'$literal': extra.to_mongo().to_dict()}]
+            ]},
+            'total': {'$add': ['$total', extra.price]},
+            'version': {'$add': [{'$ifNull': ['$version', 0]}, 1]},
+            **_revenue_adjustment(extra.price, when or datetime.now())
+        }}],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def pull_extra_service(booking_id: str, user_id: str, index: int,
+                       expected_version: Optional[int] = None,
+                       when: Optional[datetime] = None) -> Optional[Tuple[dict, dict]]:
+    """
+    Elimina el extra en la posición indicada y descuenta su precio.
+
+    Usa un pipeline de actualización porque $pull elimina por valor y
+    borraría todos los extras iguales, no solo el indicado.
+
+    Returns:
+        tuple: (reserva actualizada, extra eliminado), o None si no cumple las condiciones
+    """
+    query = _guard(booking_id, user_id, MODIFIABLE_STATUSES, expected_version)
+    query[f'extra_services.{index}'] = {'$exists': True}
+    when = when or datetime.now()
+    removed_price = {'$arrayElemAt': ['$extra_services.price', index]}
+
+    before = Booking._get_collection().find_one_and_update(
+        query,
+        [{'$set': {
+            'total': {'$subtract': ['$total', {'$arrayElemAt': ['$extra_services.price', index]}]},
+            'extra_services': {'$concatArrays': [
+                {'$slice': ['$extra_services', index]},
+                {'$slice': ['$extra_services', index + 1, {'$size': '$extra_services'}]}
+            ]},
+            'version': {'$add': [{'$ifNull': ['$version', 0]}, 1]},
+            **_revenue_adjustment({'$multiply': [-1, removed_price]}, when)
+        }}],
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return None
+
+    # Reconstruir el estado posterior a partir del anterior
+    removed = before['extra_services'][index]
+    after = dict(before)
+    after['extra_services'] = before['extra_services'][:index] + before['extra_services'][index + 1:]
+    after['total'] = before['total'] - removed.get('price', 0.0)
+    after['version'] = before.get('version', 0) + 1
+    if last_status(before) in REVENUE_STATUSES:
+        price = removed.get('price', 0.0)
+        booked = before.get('booked_amount')
+        after['booked_amount'] = (booked if booked is not None else before['total']) - price
+        after['revenue_adjustments'] = (before.get('revenue_adjustments') or []) + [{'amount': -price, 'date': when}]
+    return after, removed
+
+
+def push_status(booking_id: str, new_status: str, from_statuses: List[str],
+                user_id: Optional[str] = None, extra_query: Optional[dict] = None,
+                when: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Añade un estado al historial si el estado actual lo permite.
+
+    Returns:
+        dict: Reserva antes del cambio (su último estado es el anterior), o None
+    """
+    query = _guard(booking_id, user_id, from_statuses, None)
+    if extra_query:
+        query.update(extra_query)
+
+    # Mismo cálculo que revenue_rollups.transition_amount, evaluado sobre el estado anterior
+    if new_status in REVENUE_STATUSES:
+        amount = {'$cond': [IN_REVENUE, 0.0, '$total']}
+        booked = {'$cond': [IN_REVENUE, COUNTED_AMOUNT, '$total']}
+    else:
+        amount = {'$cond': [IN_REVENUE, {'$multiply': [-1, COUNTED_AMOUNT]}, 0.0]}
+        booked = 0.0
+
+    return Booking._get_collection().find_one_and_update(
+        query,
+        [{'$set': {
+            'status': {'$concatArrays': [{'$ifNull': ['$status', []]}, [{
+                'reserve_status': {'$literal': new_status},
+                'trade_date': when or datetime.now(),
+                'amount': amount
+            }]]},
+            'booked_amount': booked,
+            'version': {'$add': [{'$ifNull': ['$version', 0]}, 1]}
+        }}],
+        projection={'room': 1, 'user': 1, 'total': 1, 'booked_amount': 1, 'check_in': 1, 'check_out': 1,
+                    'status': {'$slice': -1}},
+        return_document=ReturnDocument.BEFORE
+    )
+
+
+def apply_booking_changes(booking_id: str, expected_version: int, changes: dict,
+                          when: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Aplica cambios a una reserva pendiente si no ha cambiado desde que se leyó.
+
+    Args:
+        booking_id: ID de la reserva
+        expected_version: Versión leída al validar los cambios
+        changes: Campos a sustituir ($set)
+
+    Returns:
+        dict: Reserva actualizada, o None si cambió entre medias o ya no está pendiente
+    """
+    return Booking._get_collection().find_one_and_update(
+        _guard(booking_id, None, ['pending'], expected_version),
+        {
+            '$set': changes,
+            '$push': {'status': {'reserve_status': 'pending', 'trade_date': when or datetime.now()}},
+            '$inc': {'version': 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def cancellation_query(now: Optional[datetime] = None) -> dict:
+    """Condición de antelación mínima para cancelar (igual que can_cancel_reservation)"""
+    now = now or datetime.now()
+    return {'check_in': {'$gt': now + timedelta(hours=CANCELLATION_NOTICE_HOURS)}}
@@ -1,24 +1,40 @@
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from bson import ObjectId
 from mongoengine import Q
 
 from app.models.Booking import Booking, ExtraService
+from app.models.Hotel import Hotel
 from app.models.Room import Room
+from app.models.User import User
+from app.utils.booking_holds import has_overlapping_hold
+from app.utils.booking_updates import VALID_TRANSITIONS, last_status, push_status
+from app.utils.revenue_rollups import record_booking_transition
+from app.utils.room_inventory import add_stay, room_type_of
+from app.utils.room_utils import get_hotels_by_room, hotel_rooms_filter
+from app.utils.service_catalog import service_catalog
 
 
-def validate_room_availability(room_id: str, check_in: datetime, check_out: datetime) -> bool:
+def validate_room_availability(room_id: str, check_in: datetime, check_out: datetime,
+                               exclude_hold: Optional[str] = None) -> bool:
     """
     Verifica si una habitación está disponible en las fechas especificadas.
 
+    Los bloqueos temporales vigentes (BookingHold) también ocupan la habitación.
+
     Args:
         room_id: ID de la habitación
         check_in: Fecha de entrada
         check_out: Fecha de salida
+        exclude_hold: Bloqueo propio que se está convirtiendo en reserva
 
     Returns:
         bool: True si está disponible, False si no
     """
     try:
+        if has_overlapping_hold(room_id, check_in, check_out, exclude_hold):
+            return False
+
         # Buscar reservas que se solapen con las fechas solicitadas
         overlapping_reservations = Booking.objects(
             room=room_id,
@@ -39,6 +55,25 @@ def validate_room_availability(room_id: str, check_in: datetime, check_out: date
         return False
 
 
+def added_intervals(old_check_in: datetime, old_check_out: datetime,
+                    new_check_in: datetime, new_check_out: datetime) -> List[Tuple[datetime, datetime]]:
+    """
+    Tramos de la nueva estancia que no estaban ya ocupados por la anterior.
+
+    Las noches liberadas no necesitan comprobación, así que solo se
+    devuelven las añadidas: como mucho un tramo antes y otro después.
+    """
+    if new_check_out <= old_check_in or new_check_in >= old_check_out:
+        return [(new_check_in, new_check_out)]
+
+    intervals = []
+    if new_check_in < old_check_in:
+        intervals.append((new_check_in, old_check_in))
+    if new_check_out > old_check_out:
+        intervals.append((old_check_out, new_check_out))
+    return intervals
+
+
 def calculate_total_price(room_price_per_night: float, extra_services: List[ExtraService], nights: int) -> float:
     """
     Calcula el precio total de una reserva.
@@ -180,9 +215,9 @@ def get_available_rooms(check_in: datetime, check_out: datetime, hotel_id: Optio
         # Obtener todas las habitaciones (filtrar por hotel si se especifica)
         room_filters = {}
         if hotel_id:
-            room_filters['hotel'] = hotel_id
+            room_filters['__raw__'] = hotel_rooms_filter(hotel_id) or {'hotel': ObjectId(hotel_id)}
 
-        all_rooms = Room.objects(**room_filters)
+        all_rooms = Room.objects(**room_filters).only('id')
 
         # Filtrar habitaciones disponibles
         available_rooms = []
@@ -210,33 +245,28 @@ def update_reservation_status(booking_id: str, new_status: str, reason: Optional
         bool: True si se actualizó correctamente, False si no
     """
     try:
-        from app.models.Booking import ReserveStatus
-
-        # Obtener la reserva
-        booking = Booking.objects.get(id=booking_id)
-
-        # Validar transición de estado
-        current_status = booking.status[-1].reserve_status if booking.status else 'pending'
-
-        valid_transitions = {
-            'pending': ['confirmed', 'cancelled'],
-            'confirmed': ['completed', 'cancelled'],
-            'cancelled': [],  # No se puede cambiar desde cancelado
-            'completed': []  # No se puede cambiar desde completado
-        }
+        # Estados desde los que se permite pasar a new_status
+        from_statuses = [current for current, targets in VALID_TRANSITIONS.items() if new_status in targets]
+        now = datetime.now()
 
-        if new_status not in valid_transitions.get(current_status, []):
-            print(f"Invalid status transition from {current_status} to {new_status}")
+        # Validación y escritura en una sola operación atómica
+        previous = push_status(booking_id, new_status, from_statuses, when=now)
+        if previous is None:
+            print(f"Invalid status transition to {new_status} for booking {booking_id}")
             return False
 
-        # Agregar nuevo estado al historial
-        new_status_record = ReserveStatus(
-            reserve_status=new_status,
-            trade_date=datetime.now()
-        )
+        record_booking_transition(previous, last_status(previous), new_status, now)
+        if new_status == 'cancelled':
+            add_stay(room_type_of(previous['room']), previous['check_in'], previous['check_out'], sign=-1)
+
+        # Notificación agrupada: un único email por ventana de cambios
+        from app.utils.notification_coalescer import notification_coalescer
+        notification_coalescer.record_status(str(booking_id), new_status)
 
-        booking.status.append(new_status_record)
-        booking.save()
+        # Las noches liberadas se ofrecen a la lista de espera
+        if new_status == 'cancelled':
+            from app.utils.waitlist import match_waitlist_safely
+            match_waitlist_safely(previous['room'], previous['check_in'], previous['check_out'])
 
         return True
 
@@ -262,7 +292,9 @@ def get_reservation_statistics(user_id: Optional[str] = None, hotel_id: Optional
         if user_id:
             filters['user'] = user_id
         if hotel_id:
-            filters['room__hotel'] = hotel_id
+            # room__hotel no se puede consultar a través de la referencia
+            room_filter = hotel_rooms_filter(hotel_id) or {'hotel': ObjectId(hotel_id)}
+            filters['room__in'] = Room._get_collection().distinct('_id', room_filter)
 
         # Obtener todas las reservas que coincidan con los filtros
         all_bookings = Booking.objects(**filters)
@@ -323,6 +355,7 @@ def check_and_update_expired_reservations():
                 trade_date=now
             ))
             booking.save()
+            add_stay(booking.room.type, booking.check_in, booking.check_out, sign=-1)
             print(f"Auto-cancelled expired reservation: {booking.id}")
 
         # Buscar reservas confirmadas que ya terminaron
@@ -415,4 +448,52 @@ def calculate_cancellation_fee(booking: Booking) -> float:
 
     except Exception as e:
         print(f"Error calculating cancellation fee: {e}")
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+
+def format_address(address) -> Optional[str]:
+    """Formatea la dirección embebida de un hotel en una sola línea"""
+    if not address:
+        return None
+    return f"{address.street}, {address.postal_code} {address.city}, {address.state}, {address.country}"
+
+
+def build_booking_email_context(
+        booking: Booking,
+        user: Optional[User] = None,
+        room: Optional[Room] = None,
+        hotel: Optional[Hotel] = None,
+        lookup_hotel: bool = True
+) -> dict:
+    """
+    Construye el contexto plano que consumen las plantillas de email.
+
+    Los objetos ya cargados se reutilizan; solo se consulta lo que falte.
+
+    Args:
+        booking: Reserva
+        user: Usuario de la reserva (opcional)
+        room: Habitación de la reserva (opcional)
+        hotel: Hotel de la habitación (opcional)
+        lookup_hotel: Buscar el hotel si no se pasa; False cuando el llamador
+            ya lo resolvió en bloque y None significa que no tiene hotel
+
+    Returns:
+        dict: Contexto sin referencias al ORM
+    """
+    user = user or booking.user
+    room = room or booking.room
+    if hotel is None and lookup_hotel:
+        hotel = get_hotels_by_room([room.id]).get(str(room.id))
+
+    return {
+        'reservation_id': str(booking.id),
+        'user_name': user.name,
+        'hotel_name': hotel.name if hotel else None,
+        'room_name': f"Habitación {room.number_room}",
+        'check_in': booking.check_in,
+        'check_out': booking.check_out,
+        'total': booking.total,
+        'extras': [service_catalog.describe(service) for service in booking.extra_services],
+        'hotel_address': format_address(hotel.address) if hotel else None
+    }
@@ -0,0 +1,126 @@
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Type
+
+from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
+from mongoengine import ValidationError as DocumentValidationError
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+
+# Líneas validadas e insertadas por cada insert_many
+BULK_CHUNK_SIZE = 500
+
+
+async def iter_ndjson_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Parte el cuerpo en líneas según llega, sin leerlo entero; devuelve (nº de línea, contenido)"""
+    buffer = b""
+    line_number = 0
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+def _write_error_message(error: dict) -> str:
+    if error.get('code') == 11000:
+        fields = ", ".join(error.get('keyValue', {}).keys()) or "unique key"
+        return f"Duplicate {fields}"
+    return error.get('errmsg', "Write error")
+
+
+def _validation_error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'line'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _insert_chunk(document, docs: List[dict], line_numbers: List[int]) -> Tuple[List[ObjectId], List[dict]]:
+    """insert_many no ordenado: un documento que falla no impide insertar los demás"""
+    try:
+        document._get_collection().insert_many(docs, ordered=False)
+        failed = {}
+    except BulkWriteError as e:
+        failed = {error['index']: error for error in e.details.get('writeErrors', [])}
+
+    inserted = [doc['_id'] for position, doc in enumerate(docs) if position not in failed]
+    errors = [
+        {'line': line_numbers[position], 'error': _write_error_message(error)}
+        for position, error in failed.items()
+    ]
+    return inserted, errors
+
+
+class BulkImportResult:
+    def __init__(self):
+        self.inserted: List[ObjectId] = []
+        self.errors: List[dict] = []
+
+    def to_response(self) -> dict:
+        return {
+            'inserted': len(self.inserted),
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda error: error['line'])
+        }
+
+
+async def import_ndjson(stream: AsyncIterator[bytes], schema: Type[BaseModel], document,
+                        prepare: Optional[Callable[[dict], dict]] = None,
+                        chunk_size: int = BULK_CHUNK_SIZE) -> BulkImportResult:
+    """
+    Importa documentos desde un cuerpo NDJSON por lotes.
+
+    Cada línea se valida con el schema de la API y con el modelo (choices,
+    mínimos...), y cada lote válido se escribe con un insert_many no
+    ordenado. Los errores se devuelven por número de línea sin abortar el
+    resto de la importación.
+
+    Args:
+        stream: Cuerpo de la petición (request.stream())
+        schema: Schema Pydantic de creación (RoomCreate, HotelCreate...)
+        document: Clase del modelo mongoengine
+        prepare: Transforma los datos del schema en campos del modelo (ValueError si no son válidos)
+        chunk_size: Líneas por lote
+
+    Returns:
+        BulkImportResult: IDs insertados y errores por línea
+    """
+    result = BulkImportResult()
+    docs: List[dict] = []
+    line_numbers: List[int] = []
+
+    async def flush():
+        inserted, errors = await run_in_threadpool(_insert_chunk, document, docs, line_numbers)
+        result.inserted.extend(inserted)
+        result.errors.extend(errors)
+        docs.clear()
+        line_numbers.clear()
+
+    async for line_number, line in iter_ndjson_lines(stream):
+        try:
+            data = schema.model_validate_json(line).model_dump()
+            if prepare:
+                data = prepare(data)
+            instance = document(**data)
+            instance.validate()
+        except ValidationError as e:
+            result.errors.append({'line': line_number, 'error': _validation_error_message(e)})
+            continue
+        except (DocumentValidationError, ValueError) as e:
+            result.errors.append({'line': line_number, 'error': str(e)})
+            continue
+
+        doc = instance.to_mongo().to_dict()
+        doc['_id'] = ObjectId()
+        docs.append(doc)
+        line_numbers.append(line_number)
+        if len(docs) >= chunk_size:
+            await flush()
+
+    if docs:
+        await flush()
+    return result
@@ -0,0 +1,523 @@
+import re
+from datetime import datetime
+from html import escape
+from functools import lru_cache
+from operator import itemgetter
+from string import Template
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+# Fragmentos estáticos compartidos: se construyen una sola vez al importar
+
+HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        .header { background-color: #2c3e50; color: white; padding: 20px; text-align: center; }
+        .content { padding: 20px; border: 1px solid #ddd; }
+        .details { background-color: #f8f9fa; padding: 15px; margin: 10px 0; }
+        .footer { text-align: center; margin-top: 20px; color: #666; }
+        .highlight { color: #e74c3c; font-weight: bold; }
+    </style>
+</head>
+<body>
+"""
+
+HTML_FOOTER = """
+    <div class="footer">
+        <p>Equipo de Reservas</p>
+    </div>
+</body>
+</html>
+"""
+
+STAY_INSTRUCTIONS = [
+    "Presenta este email o el ID de reserva al hacer check-in",
+    "El check-in es a partir de las 15:00",
+    "El check-out es hasta las 12:00",
+    "Para cualquier consulta, contacta con nosotros",
+]
+
+STAY_INSTRUCTIONS_TEXT = "\n".join(f"- {line}" for line in STAY_INSTRUCTIONS)
+STAY_INSTRUCTIONS_HTML = "\n".join(f"                <li>{line}</li>" for line in STAY_INSTRUCTIONS)
+
+STATUS_LABELS = {
+    'pending': 'pendiente',
+    'confirmed': 'confirmada',
+    'cancelled': 'cancelada',
+    'completed': 'completada'
+}
+
+STATUS_NOTES = {
+    'confirmed': """
+¡Excelente! Tu reserva ha sido confirmada.
+
+Recuerda:
+- Check-in: a partir de las 15:00
+- Check-out: hasta las 12:00
+- Trae una identificación válida
+""",
+    'completed': """
+Esperamos que hayas disfrutado tu estancia.
+
+Si tienes un momento, nos encantaría conocer tu opinión sobre tu experiencia.
+"""
+}
+
+
+# Caracteres que html.escape sustituye; la mayoría de valores no contiene ninguno
+HTML_SPECIAL = re.compile(r'[&<>"\']')
+
+# Valores que el propio módulo formatea (fechas, importes, IDs, contadores) y
+# que por tanto no pueden contener HTML; el resto de campos del HTML deben
+# llegar ya escapados con el sufijo _html
+HTML_SAFE_FIELDS = frozenset({'reservation_id', 'check_in', 'check_out', 'nights', 'total'})
+
+
+def _escape(value) -> str:
+    if type(value) is not str:
+        value = str(value)
+    return escape(value) if HTML_SPECIAL.search(value) else value
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    body: str
+    html_body: Optional[str] = None
+
+
+class CompiledTemplate:
+    """
+    Plantilla ${campo} analizada una sola vez.
+
+    Se guarda como lista de fragmentos estáticos con huecos para los campos;
+    renderizar copia la lista, rellena los huecos de una vez y la une, sin
+    volver a analizar la plantilla. Los valores deben ser ya texto.
+    """
+
+    def __init__(self, source: str):
+        parts = []
+        names = []
+        literal = []
+        position = 0
+        for match in Template.pattern.finditer(source):
+            literal.append(source[position:match.start()])
+            if match.group('escaped') is not None:
+                literal.append("$")
+            else:
+                name = match.group('named') or match.group('braced')
+                if name is None:
+                    raise ValueError(f"Marcador inválido en la plantilla: {match.group()!r}")
+                parts.extend(("".join(literal), None))
+                names.append(name)
+                literal = []
+            position = match.end()
+        literal.append(source[position:])
+        parts.append("".join(literal))
+
+        self.parts = parts
+        self.fields = frozenset(names)
+        if len(names) > 1:
+            self._values = itemgetter(*names)
+        elif names:
+            self._values = lambda values: (values[names[0]],)
+        else:
+            self._values = lambda values: ()
+
+    def render(self, values: dict) -> str:
+        parts = self.parts[:]
+        parts[1::2] = self._values(values)
+        return "".join(parts)
+
+
+class EmailTemplate:
+    """
+    Plantilla precompilada de asunto, texto y HTML.
+
+    Se renderiza desde un contexto plano (sin acceso a la base de datos).
+    La función prepare deriva los valores de presentación, siempre como
+    texto. En el HTML solo
+    se admiten campos de HTML_SAFE_FIELDS o terminados en _html, que prepare
+    entrega ya escapados; se comprueba al definir la plantilla.
+    """
+
+    def __init__(
+            self,
+            subject: str,
+            text: str,
+            html: Optional[str] = None,
+            prepare: Optional[Callable[[dict], dict]] = None
+    ):
+        self.subject = CompiledTemplate(subject)
+        self.text = CompiledTemplate(text)
+        self.html = CompiledTemplate(HTML_HEAD + html + HTML_FOOTER) if html else None
+        self.prepare = prepare
+
+        if self.html is not None:
+            unescaped = sorted(
+                name for name in self.html.fields
+                if name not in HTML_SAFE_FIELDS and not name.endswith('_html')
+            )
+            if unescaped:
+                raise ValueError(f"Campos sin escapar en la plantilla HTML: {unescaped}")
+
+    def render(self, context: dict) -> RenderedEmail:
+        values = self.prepare(context) if self.prepare else {key: str(value) for key, value in context.items()}
+
+        return RenderedEmail(
+            subject=self.subject.render(values),
+            body=self.text.render(values),
+            html_body=self.html.render(values) if self.html is not None else None
+        )
+
+
+def _money(amount: float) -> str:
+    return "€%.2f" % amount
+
+
+# Formato de fechas con %, varias veces más rápido que strftime. Las fechas
+# de entrada y salida se repiten mucho entre reservas (mismo día y hora),
+# así que se guardan las últimas formateadas
+@lru_cache(maxsize=4096)
+def _date(value: datetime) -> str:
+    return "%02d/%02d/%d" % (value.day, value.month, value.year)
+
+
+def _time(value: datetime) -> str:
+    return "%02d:%02d" % (value.hour, value.minute)
+
+
+@lru_cache(maxsize=4096)
+def _date_time(value: datetime, separator: str = " ") -> str:
+    return "%02d/%02d/%d%s%02d:%02d" % (value.day, value.month, value.year, separator, value.hour, value.minute)
+
+
+@lru_cache(maxsize=1024)
+def _extra_lines(name: str, price: float) -> Tuple[str, str]:
+    """Líneas de texto y HTML de un servicio extra; los servicios salen del catálogo y se repiten"""
+    amount = "%.2f" % price
+    return f"- {name}: €{amount}", f"<li>{_escape(name)}: €{amount}</li>"
+
+
+def _stay_values(context: dict) -> dict:
+    """Valores comunes a todas las plantillas de reserva"""
+    return {
+        'reservation_id': str(context['reservation_id']),
+        'user_name': context['user_name'],
+        'hotel_name': context.get('hotel_name') or "nuestro hotel",
+        'room_name': context.get('room_name') or "",
+    }
+
+
+def _prepare_confirmation(context: dict) -> dict:
+    lines = [_extra_lines(extra['name'], extra['price']) for extra in context.get('extras') or []]
+    check_in = context['check_in']
+    check_out = context['check_out']
+    user_name = context['user_name']
+    hotel_name = context.get('hotel_name') or "nuestro hotel"
+    room_name = context.get('room_name') or ""
+
+    return {
+        'reservation_id': str(context['reservation_id']),
+        'user_name': user_name,
+        'hotel_name': hotel_name,
+        'room_name': room_name,
+        'user_name_html': _escape(user_name),
+        'hotel_name_html': _escape(hotel_name),
+        'room_name_html': _escape(room_name),
+        'check_in': _date_time(check_in),
+        'check_out': _date_time(check_out),
+        'nights': str((check_out.date() - check_in.date()).days),
+        'total': "€%.2f" % context['total'],
+        'extras_text': "\n".join([line[0] for line in lines]) or "- Ninguno",
+        'extras_html': "".join([line[1] for line in lines]) or "<li>Ninguno</li>",
+    }
+
+
+def _prepare_cancellation(context: dict) -> dict:
+    values = _stay_values(context)
+    total = context['total']
+    fee = context.get('cancellation_fee') or 0.0
+
+    if fee > 0:
+        refund_text = (
+            f"- Tarifa de Cancelación: {_money(fee)}\n"
+            f"- Monto a Reembolsar: {_money(total - fee)}\n\n"
+            "El reembolso será procesado en los próximos 5-7 días hábiles."
+        )
+    else:
+        refund_text = (
+            f"- Monto a Reembolsar: {_money(total)}\n\n"
+            "El reembolso será procesado en los próximos 3-5 días hábiles."
+        )
+
+    values.update({
+        'check_in': _date(context['check_in']),
+        'check_out': _date(context['check_out']),
+        'total': _money(total),
+        'refund_text': refund_text,
+    })
+    return values
+
+
+def _prepare_reminder(context: dict) -> dict:
+    values = _stay_values(context)
+    check_in = context['check_in']
+
+    values.update({
+        'days_until': str((check_in.date() - datetime.now().date()).days),
+        'check_in': _date_time(check_in, " a las "),
+        'check_out': _date_time(context['check_out'], " a las "),
+        'hotel_address': context.get('hotel_address') or 'Contacta el hotel para más información',
+    })
+    return values
+
+
+def _prepare_status_update(context: dict) -> dict:
+    values = _stay_values(context)
+    new_status = context['new_status']
+
+    values.update({
+        'status_text': STATUS_LABELS.get(new_status, new_status).upper(),
+        'updated_at': _date_time(context.get('updated_at') or datetime.now()),
+        'status_note': STATUS_NOTES.get(new_status, ""),
+        'total': _money(context['total']) if context.get('total') is not None else "-",
+        # Resumen de cambios agrupados (ver notification_coalescer)
+        'changes_text': "\nCAMBIOS RECIENTES:\n" + "\n".join(
+            f"- {change}" for change in context['changes']
+        ) + "\n" if context.get('changes') else "",
+    })
+    return values
+
+
+def _prepare_group_confirmation(context: dict) -> dict:
+    reservations = context['reservations']
+    return {
+        'group_id': str(context['group_id']),
+        'user_name': context['user_name'],
+        'count': str(len(reservations)),
+        'total': _money(context['total']),
+        'reservations_text': "\n".join(
+            f"- {item['reservation_id']}: {item.get('hotel_name') or 'Hotel'} / {item['room_name']}, "
+            f"{_date(item['check_in'])} - {_date(item['check_out'])}, "
+            f"{_money(item['total'])}"
+            for item in reservations
+        ),
+    }
+
+
+def _prepare_waitlist_available(context: dict) -> dict:
+    hold_expires_at = context.get('hold_expires_at')
+    return {
+        'user_name': context['user_name'],
+        'room_type': context['room_type'],
+        'check_in': _date(context['check_in']),
+        'check_out': _date(context['check_out']),
+        'hold_text': (
+            f"Hemos bloqueado una habitación a tu nombre hasta las {_time(hold_expires_at)}.\n"
+            f"Confirma la reserva con el bloqueo {context['hold_id']} antes de esa hora."
+            if hold_expires_at else
+            "Reserva cuanto antes: la disponibilidad no está garantizada."
+        ),
+    }
+
+
+TEMPLATES: Dict[str, EmailTemplate] = {
+    'confirmation': EmailTemplate(
+        subject="Confirmación de Reserva - ${hotel_name}",
+        text="""
+¡Hola ${user_name}!
+
+Tu reserva ha sido creada exitosamente. Aquí están los detalles:
+
+DETALLES DE LA RESERVA:
+- ID de Reserva: ${reservation_id}
+- Hotel: ${hotel_name}
+- Habitación: ${room_name}
+- Check-in: ${check_in}
+- Check-out: ${check_out}
+- Noches: ${nights}
+- Total: ${total}
+
+SERVICIOS EXTRAS:
+${extras_text}
+
+INSTRUCCIONES:
+""" + STAY_INSTRUCTIONS_TEXT + """
+
+¡Esperamos verte pronto!
+
+Equipo de Reservas
+""",
+        html="""    <div class="header">
+        <h1>Confirmación de Reserva</h1>
+    </div>
+
+    <div class="content">
+        <h2>¡Hola ${user_name_html}!</h2>
+        <p>Tu reserva ha sido creada exitosamente. Aquí están los detalles:</p>
+
+        <div class="details">
+            <h3>DETALLES DE LA RESERVA:</h3>
+            <ul>
+                <li><strong>ID de Reserva:</strong> <span class="highlight">${reservation_id}</span></li>
+                <li><strong>Hotel:</strong> ${hotel_name_html}</li>
+                <li><strong>Habitación:</strong> ${room_name_html}</li>
+                <li><strong>Check-in:</strong> ${check_in}</li>
+                <li><strong>Check-out:</strong> ${check_out}</li>
+                <li><strong>Noches:</strong> ${nights}</li>
+                <li><strong>Total:</strong> <span class="highlight">${total}</span></li>
+            </ul>
+        </div>
+
+        <div class="details">
+            <h3>SERVICIOS EXTRAS:</h3>
+            <ul>
+${extras_html}
+            </ul>
+        </div>
+
+        <div class="details">
+            <h3>INSTRUCCIONES:</h3>
+            <ul>
+""" + STAY_INSTRUCTIONS_HTML + """
+            </ul>
+        </div>
+
+        <p>¡Esperamos verte pronto!</p>
+    </div>
+""",
+        prepare=_prepare_confirmation
+    ),
+    'cancellation': EmailTemplate(
+        subject="Cancelación de Reserva - ${hotel_name}",
+        text="""
+Hola ${user_name},
+
+Tu reserva ha sido cancelada exitosamente.
+
+DETALLES DE LA RESERVA CANCELADA:
+- ID de Reserva: ${reservation_id}
+- Hotel: ${hotel_name}
+- Habitación: ${room_name}
+- Fechas: ${check_in} - ${check_out}
+- Total Original: ${total}
+${refund_text}
+
+Si tienes alguna pregunta sobre el reembolso, no dudes en contactarnos.
+
+Gracias por tu comprensión.
+
+Equipo de Reservas
+""",
+        prepare=_prepare_cancellation
+    ),
+    'reminder': EmailTemplate(
+        subject="Recordatorio: Tu reserva en ${hotel_name} - ${days_until} días restantes",
+        text="""
+¡Hola ${user_name}!
+
+Te recordamos que tu reserva está próxima:
+
+DETALLES DE TU RESERVA:
+- ID de Reserva: ${reservation_id}
+- Hotel: ${hotel_name}
+- Habitación: ${room_name}
+- Check-in: ${check_in}
+- Check-out: ${check_out}
+
+RECORDATORIOS IMPORTANTES:
+- Check-in: a partir de las 15:00
+- Check-out: hasta las 12:00
+- Trae una identificación válida
+- Presenta este email o el ID de reserva
+
+DIRECCIÓN DEL HOTEL:
+${hotel_address}
+
+¿Necesitas hacer algún cambio? Contáctanos lo antes posible.
+
+¡Esperamos verte pronto!
+
+Equipo de Reservas
+""",
+        prepare=_prepare_reminder
+    ),
+    'status_update': EmailTemplate(
+        subject="Actualización de Reserva - ${hotel_name}",
+        text="""
+Hola ${user_name},
+
+El estado de tu reserva ha sido actualizado.
+
+INFORMACIÓN DE LA RESERVA:
+- ID de Reserva: ${reservation_id}
+- Hotel: ${hotel_name}
+- Nuevo Estado: ${status_text}
+- Total: ${total}
+- Fecha de Actualización: ${updated_at}
+${changes_text}${status_note}
+Si tienes alguna pregunta, no dudes en contactarnos.
+
+Saludos,
+Equipo de Reservas
+""",
+        prepare=_prepare_status_update
+    ),
+    'group_confirmation': EmailTemplate(
+        subject="Confirmación de Reserva de Grupo - ${count} habitaciones",
+        text="""
+¡Hola ${user_name}!
+
+Tu reserva de grupo ha sido creada exitosamente.
+
+RESERVA DE GRUPO:
+- ID de Grupo: ${group_id}
+- Habitaciones: ${count}
+- Total: ${total}
+
+RESERVAS:
+${reservations_text}
+
+INSTRUCCIONES:
+""" + STAY_INSTRUCTIONS_TEXT + """
+
+¡Esperamos veros pronto!
+
+Equipo de Reservas
+""",
+        prepare=_prepare_group_confirmation
+    ),
+    'waitlist_available': EmailTemplate(
+        subject="¡Hay disponibilidad para tus fechas!",
+        text="""
+¡Hola ${user_name}!
+
+Se ha liberado una habitación que coincide con tu lista de espera:
+
+- Tipo de habitación: ${room_type}
+- Check-in: ${check_in}
+- Check-out: ${check_out}
+
+${hold_text}
+
+Equipo de Reservas
+""",
+        prepare=_prepare_waitlist_available
+    ),
+}
+
+
+def render_email(template_name: str, context: dict) -> RenderedEmail:
+    """
+    Renderiza una plantilla registrada.
+
+    Args:
+        template_name: Nombre de la plantilla (confirmation, cancellation...)
+        context: Contexto plano con los datos de la reserva
+
+    Returns:
+        RenderedEmail: Asunto, cuerpo de texto y cuerpo HTML (si aplica)
+    """
+    return TEMPLATES[template_name].render(context)
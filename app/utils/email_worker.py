@@ -0,0 +1,221 @@
+import os
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app.models.EmailOutbox import EmailOutbox
+from app.utils.email import build_message, open_smtp_connection
+
+# Configuración de los workers desde variables de entorno
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "2"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "2"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_BACKOFF_SECONDS = float(os.getenv("EMAIL_BACKOFF_SECONDS", "30"))
+EMAIL_MAX_BACKOFF_SECONDS = float(os.getenv("EMAIL_MAX_BACKOFF_SECONDS", "3600"))
+EMAIL_POLL_SECONDS = float(os.getenv("EMAIL_POLL_SECONDS", "2"))
+# Máximo de mensajes por segundo entre todos los workers del proceso (0 = sin límite)
+EMAIL_SEND_RATE = float(os.getenv("EMAIL_SEND_RATE", "0"))
+# Tiempo que un mensaje reclamado queda bloqueado antes de poder reintentarse
+EMAIL_LOCK_SECONDS = 300
+# Las sesiones inactivas más de este tiempo se verifican con NOOP antes de usarse
+SMTP_IDLE_CHECK_SECONDS = 30
+
+
+class SMTPConnectionPool:
+    """Pool de sesiones SMTP persistentes reutilizadas entre mensajes"""
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self.size = size
+        # Cada elemento es (sesión o None, instante del último uso)
+        self._idle: "queue.Queue" = queue.Queue()
+        for _ in range(size):
+            self._idle.put((None, 0.0))
+
+    @contextmanager
+    def connection(self):
+        server, last_used = self._idle.get()
+        try:
+            server = self._ensure_alive(server, last_used)
+        except Exception:
+            self._idle.put((None, 0.0))
+            raise
+
+        try:
+            yield server
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # El servidor respondió con un error: la sesión sigue siendo válida
+            raise
+        except Exception:
+            # Sesión rota: se descarta y el siguiente uso abre otra
+            self._close(server)
+            server = None
+            raise
+        finally:
+            self._idle.put((server, time.monotonic()))
+
+    def close_all(self):
+        for _ in range(self.size):
+            server, _ = self._idle.get()
+            self._close(server)
+            self._idle.put((None, 0.0))
+
+    def _ensure_alive(self, server: Optional[smtplib.SMTP], last_used: float) -> smtplib.SMTP:
+        if server is not None and time.monotonic() - last_used > SMTP_IDLE_CHECK_SECONDS:
+            try:
+                if server.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP rechazado")
+            except (smtplib.SMTPException, OSError):
+                self._close(server)
+                server = None
+
+        if server is None:
+            server = open_smtp_connection()
+        return server
+
+    @staticmethod
+    def _close(server: Optional[smtplib.SMTP]):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+
+class SendPacer:
+    """Reparte los envíos a un ritmo máximo de mensajes por segundo"""
+
+    def __init__(self, rate: float = EMAIL_SEND_RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def claim_next_email() -> Optional[EmailOutbox]:
+    """
+    Reclama atómicamente el siguiente mensaje listo para enviar.
+
+    También recupera mensajes que quedaron en 'sending' porque un worker
+    murió a mitad de envío y su bloqueo ya expiró.
+    """
+    now = datetime.utcnow()
+    claim = dict(
+        set__status='sending',
+        set__locked_until=now + timedelta(seconds=EMAIL_LOCK_SECONDS),
+        inc__attempts=1,
+        new=True
+    )
+
+    email = EmailOutbox.objects(
+        status='pending', next_attempt_at__lte=now
+    ).order_by('next_attempt_at').modify(**claim)
+
+    if email is None:
+        email = EmailOutbox.objects(
+            status='sending', locked_until__lte=now
+        ).modify(**claim)
+
+    return email
+
+
+def backoff_delay(attempts: int) -> float:
+    """Backoff exponencial: base, 2*base, 4*base... acotado"""
+    return min(EMAIL_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0)), EMAIL_MAX_BACKOFF_SECONDS)
+
+
+class OutboxWorker:
+    """Workers en segundo plano que vacían el outbox de emails"""
+
+    def __init__(
+            self,
+            workers: int = EMAIL_WORKERS,
+            pool: Optional[SMTPConnectionPool] = None,
+            pacer: Optional[SendPacer] = None
+    ):
+        self.workers = workers
+        self.pool = pool or SMTPConnectionPool()
+        self.pacer = pacer or SendPacer()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.pool.close_all()
+
+    def process_one(self) -> bool:
+        """
+        Procesa un mensaje del outbox.
+
+        Returns:
+            bool: True si había un mensaje que procesar, False si no
+        """
+        email = claim_next_email()
+        if email is None:
+            return False
+
+        try:
+            msg = build_message(email.to_email, email.subject, email.body, email.html_body)
+            self.pacer.wait()
+            with self.pool.connection() as server:
+                server.send_message(msg)
+
+            EmailOutbox.objects(id=email.id).update_one(
+                set__status='sent',
+                set__sent_at=datetime.utcnow(),
+                unset__locked_until=True
+            )
+
+        except Exception as e:
+            if email.attempts >= EMAIL_MAX_ATTEMPTS:
+                EmailOutbox.objects(id=email.id).update_one(
+                    set__status='dead',
+                    set__last_error=str(e),
+                    unset__locked_until=True
+                )
+                print(f"Email {email.id} movido a dead-letter tras {email.attempts} intentos: {e}")
+            else:
+                EmailOutbox.objects(id=email.id).update_one(
+                    set__status='pending',
+                    set__last_error=str(e),
+                    set__next_attempt_at=datetime.utcnow() + timedelta(seconds=backoff_delay(email.attempts)),
+                    unset__locked_until=True
+                )
+                print(f"Error sending email {email.id} (intento {email.attempts}): {e}")
+
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self.process_one():
+                    self._stop.wait(EMAIL_POLL_SECONDS)
+            except Exception as e:
+                print(f"Error en worker de emails: {e}")
+                self._stop.wait(EMAIL_POLL_SECONDS)
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from app.models.Booking import Booking
+from app.models.Room import Room
+from app.models.User import User
+
+EXPORT_BATCH_SIZE = 1000
+# Tamaño aproximado de cada trozo enviado al cliente
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _booking_row(doc: dict) -> dict:
+    status = doc.get('status') or []
+    return {
+        'id': str(doc['_id']),
+        'room_id': str(doc['room']),
+        'user_id': str(doc['user']),
+        'check_in': _iso(doc.get('check_in')),
+        'check_out': _iso(doc.get('check_out')),
+        'total': doc.get('total'),
+        'status': status[-1].get('reserve_status', 'pending') if status else 'pending',
+        'extra_services': len(doc.get('extra_services') or []),
+        'group_id': doc.get('group_id')
+    }
+
+
+def _room_row(doc: dict) -> dict:
+    return {
+        'id': str(doc['_id']),
+        'number_room': doc.get('number_room'),
+        'type': doc.get('type'),
+        'price_per_night': doc.get('price_per_night'),
+        'capacity': doc.get('capacity'),
+        'availability': doc.get('availability', True),
+        'hotel_id': str(doc['hotel']) if doc.get('hotel') else None
+    }
+
+
+def _user_row(doc: dict) -> dict:
+    return {
+        'id': str(doc['_id']),
+        'name': doc.get('name'),
+        'email': doc.get('email'),
+        'telephone': doc.get('telephone'),
+        'roles': ",".join(role.get('name', '') for role in doc.get('roles') or []),
+        'active': doc.get('active', True),
+        'is_verified': doc.get('is_verified', False),
+        'creation_date': _iso(doc.get('creation_date')),
+        'last_login': _iso(doc.get('last_login'))
+    }
+
+
+class ExportSpec:
+    def __init__(self, document, fields: List[str], columns: List[str],
+                 to_row: Callable[[dict], dict], date_field: Optional[str] = None):
+        self.document = document
+        self.fields = fields  # Proyección: nunca se leen campos que no se exportan
+        self.columns = columns
+        self.to_row = to_row
+        self.date_field = date_field  # Campo indexado para el filtro por fechas
+
+
+EXPORTS = {
+    'bookings': ExportSpec(
+        Booking,
+        ['room', 'user', 'check_in', 'check_out', 'total', 'status', 'extra_services', 'group_id'],
+        ['id', 'room_id', 'user_id', 'check_in', 'check_out', 'total', 'status', 'extra_services', 'group_id'],
+        _booking_row, 'check_in'
+    ),
+    'rooms': ExportSpec(
+        Room,
+        ['number_room', 'type', 'price_per_night', 'capacity', 'availability', 'hotel'],
+        ['id', 'number_room', 'type', 'price_per_night', 'capacity', 'availability', 'hotel_id'],
+        _room_row
+    ),
+    'users': ExportSpec(
+        User,
+        ['name', 'email', 'telephone', 'roles', 'active', 'is_verified', 'creation_date', 'last_login'],
+        ['id', 'name', 'email', 'telephone', 'roles', 'active', 'is_verified', 'creation_date', 'last_login'],
+        _user_row, 'creation_date'
+    ),
+}
+
+
+def iter_export_rows(spec: ExportSpec, date_from: Optional[datetime] = None,
+                     date_to: Optional[datetime] = None,
+                     batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[dict]:
+    """
+    Recorre la colección con un cursor por lotes, sin materializar la lista.
+
+    Args:
+        spec: Definición de la exportación
+        date_from: Inicio del rango (incluido) sobre spec.date_field
+        date_to: Fin del rango (excluido) sobre spec.date_field
+        batch_size: Documentos por lote del cursor
+
+    Returns:
+        Iterator[dict]: Filas planas listas para serializar
+    """
+    filters = {}
+    if spec.date_field and date_from:
+        filters[f'{spec.date_field}__gte'] = date_from
+    if spec.date_field and date_to:
+        filters[f'{spec.date_field}__lt'] = date_to
+
+    cursor = spec.document.objects(**filters).only(*spec.fields).order_by(
+        spec.date_field or 'id'
+    ).as_pymongo().batch_size(batch_size)
+    for doc in cursor:
+        yield spec.to_row(doc)
+
+
+def _ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def _csv_lines(rows: Iterable[dict], columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _chunks(lines: Iterable[str], compress: bool) -> Iterator[bytes]:
+    """Agrupa líneas en trozos de ~EXPORT_CHUNK_BYTES y, si se pide, los comprime en gzip al vuelo"""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    pending: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def stream_export(spec: ExportSpec, export_format: str, compress: bool,
+                  date_from: Optional[datetime] = None, date_to: Optional[datetime] = None) -> Iterator[bytes]:
+    rows = iter_export_rows(spec, date_from, date_to)
+    lines = _csv_lines(rows, spec.columns) if export_format == "csv" else _ndjson_lines(rows)
+    return _chunks(lines, compress)
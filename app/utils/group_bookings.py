@@ -0,0 +1,98 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from app.models.Booking import Booking
+
+# (habitación, check_in, check_out)
+Stay = Tuple[ObjectId, datetime, datetime]
+
+
+def new_group_id() -> str:
+    return uuid.uuid4().hex
+
+
+def find_internal_conflicts(stays: List[Stay]) -> List[int]:
+    """
+    Posiciones del lote que se solapan con otra del mismo lote.
+
+    Ordena las estancias de cada habitación por entrada y compara cada una
+    con la que termina más tarde de las anteriores.
+    """
+    by_room: Dict[ObjectId, List[int]] = defaultdict(list)
+    for position, (room_id, _, _) in enumerate(stays):
+        by_room[room_id].append(position)
+
+    conflicts = set()
+    for positions in by_room.values():
+        positions.sort(key=lambda position: stays[position][1])
+        latest = None
+        for position in positions:
+            if latest is not None and stays[position][1] < stays[latest][2]:
+                conflicts.update((latest, position))
+            if latest is None or stays[position][2] > stays[latest][2]:
+                latest = position
+    return sorted(conflicts)
+
+
+def find_booked_conflicts(stays: List[Stay], exclude_group: Optional[str] = None) -> List[int]:
+    """
+    Posiciones del lote que chocan con reservas existentes.
+
+    Una única consulta con un $or de solapamientos por habitación; el cruce
+    con las posiciones del lote se hace en memoria.
+
+    Args:
+        stays: Estancias solicitadas
+        exclude_group: Ignorar las reservas de este grupo (verificación tras insertar)
+    """
+    if not stays:
+        return []
+
+    query = {
+        '$or': [
+            {'room': room_id, 'check_in': {'$lt': check_out}, 'check_out': {'$gt': check_in}}
+            for room_id, check_in, check_out in stays
+        ],
+        'status': {'$not': {'$elemMatch': {'reserve_status': 'cancelled'}}}
+    }
+    if exclude_group:
+        query['group_id'] = {'$ne': exclude_group}
+
+    existing: Dict[ObjectId, List[Tuple[datetime, datetime]]] = defaultdict(list)
+    for doc in Booking._get_collection().find(query, {'room': 1, 'check_in': 1, 'check_out': 1}):
+        existing[doc['room']].append((doc['check_in'], doc['check_out']))
+
+    return [
+        position for position, (room_id, check_in, check_out) in enumerate(stays)
+        if any(start < check_out and end > check_in for start, end in existing.get(room_id, []))
+    ]
+
+
+def insert_group(documents: List[dict], group_id: str) -> bool:
+    """
+    Inserta las reservas del grupo con todo o nada.
+
+    Tras insert_many se repite la comprobación de solapes ignorando el
+    propio grupo; si otra petición reservó entre medias, o la inserción
+    falla a medias, se borra el grupo entero.
+
+    Returns:
+        bool: True si el grupo quedó insertado, False si se deshizo por conflicto
+    """
+    collection = Booking._get_collection()
+    try:
+        collection.insert_many(documents, ordered=True)
+    except PyMongoError:
+        collection.delete_many({'group_id': group_id})
+        raise
+
+    stays = [(doc['room'], doc['check_in'], doc['check_out']) for doc in documents]
+    if find_booked_conflicts(stays, exclude_group=group_id):
+        collection.delete_many({'group_id': group_id})
+        return False
+    return True
@@ -0,0 +1,68 @@
+from typing import List
+
+from pymongo import UpdateMany
+
+from app.models.Hotel import Hotel
+from app.models.Room import Room
+
+MIGRATION_BATCH_SIZE = 500
+
+
+def migrate_hotel_rooms(batch_size: int = MIGRATION_BATCH_SIZE) -> dict:
+    """
+    Copia Hotel.rooms a Room.hotel y vacía el array de cada hotel migrado.
+
+    Se puede ejecutar con la API en marcha: las lecturas por hotel usan
+    Room.hotel y, para habitaciones aún sin migrar, recurren a Hotel.rooms
+    (ver room_utils.hotel_rooms_filter y get_hotels_by_room).
+    Solo se asigna hotel a habitaciones que no lo tienen, así que repetir
+    la migración es seguro. Un hotel se limpia después de que sus
+    habitaciones tengan la referencia.
+
+    Args:
+        batch_size: Habitaciones por actualización
+
+    Returns:
+        dict: Hoteles migrados, habitaciones actualizadas y habitaciones ya asignadas a otro hotel
+    """
+    hotels = Hotel._get_collection()
+    rooms = Room._get_collection()
+    cursor = hotels.find(
+        {'rooms.0': {'$exists': True}}, {'rooms': 1}
+    ).batch_size(10)
+
+    migrated_hotels = 0
+    updated_rooms = 0
+    conflicts: List[str] = []
+    for hotel in cursor:
+        room_ids = hotel['rooms']
+        operations = [
+            UpdateMany(
+                {'_id': {'$in': room_ids[start:start + batch_size]}, 'hotel': None},
+                {'$set': {'hotel': hotel['_id']}}
+            )
+            for start in range(0, len(room_ids), batch_size)
+        ]
+        updated_rooms += rooms.bulk_write(operations, ordered=False).modified_count
+
+        # Habitaciones que ya pertenecían a otro hotel: se informan, no se tocan
+        conflicts.extend(
+            str(doc['_id']) for doc in rooms.find(
+                {'_id': {'$in': room_ids}, 'hotel': {'$nin': [hotel['_id'], None]}}, {'_id': 1}
+            )
+        )
+
+        hotels.update_one({'_id': hotel['_id']}, {'$unset': {'rooms': ""}})
+        migrated_hotels += 1
+
+    return {'hotels': migrated_hotels, 'rooms': updated_rooms, 'conflicts': conflicts}
+
+
+if __name__ == "__main__":
+    from app.database import connect_db
+
+    connect_db()
+    report = migrate_hotel_rooms()
+    for room_id in report['conflicts']:
+        print(f"Habitación {room_id} ya asignada a otro hotel")
+    print(f"Hoteles migrados: {report['hotels']}, habitaciones actualizadas: {report['rooms']}")
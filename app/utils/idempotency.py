@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pymongo.errors import DuplicateKeyError
+
+from app.models.IdempotencyRecord import IdempotencyRecord
+
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+# Tiempo máximo que una petición en curso retiene la clave antes de poder retomarse
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# Espera máxima de un duplicado concurrente antes de responder 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+IDEMPOTENCY_POLL_SECONDS = 0.1
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Hash estable del cuerpo de la petición"""
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Almacén de respuestas por Idempotency-Key.
+
+    Las respuestas completadas se guardan en una colección con TTL y en
+    una caché LRU en memoria, de modo que un reintento se responde sin
+    consultar la base de datos. Los duplicados concurrentes del mismo
+    proceso esperan al primero sobre un Future; los de otros procesos
+    sondean el registro hasta que se completa o caduca su bloqueo.
+    """
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # clave -> (request_hash, status_code, respuesta, caducidad monotónica)
+        self._cache: "OrderedDict[str, Tuple[str, int, Any, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _cache_get(self, key: str) -> Optional[Tuple[str, int, Any]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[3] < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[:3]
+
+    def _cache_put(self, key: str, request_hash: str, status_code: int, body: Any):
+        with self._lock:
+            self._cache[key] = (request_hash, status_code, body,
+                                time.monotonic() + IDEMPOTENCY_TTL_HOURS * 3600)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _claim(self, key: str, request_hash: str) -> Optional[dict]:
+        """
+        Intenta reservar la clave en la base de datos.
+
+        Returns:
+            dict: El registro existente si otra petición la tiene, o None si se reservó
+        """
+        now = datetime.utcnow()
+        collection = IdempotencyRecord._get_collection()
+        try:
+            collection.insert_one({
+                '_id': key,
+                'request_hash': request_hash,
+                'status': 'processing',
+                'locked_until': now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+                'created_at': now,
+                'expires_at': now + timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+            })
+            return None
+        except DuplicateKeyError:
+            pass
+
+        # Retomar una clave abandonada (proceso caído a mitad de la petición)
+        taken = collection.find_one_and_update(
+            {'_id': key, 'status': 'processing', 'request_hash': request_hash,
+             'locked_until': {'$lt': now}},
+            {'$set': {'locked_until': now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)}}
+        )
+        if taken is not None:
+            return None
+        return collection.find_one({'_id': key}) or {'status': 'processing', 'request_hash': request_hash}
+
+    def _complete(self, key: str, request_hash: str, status_code: int, body: Any):
+        IdempotencyRecord._get_collection().update_one(
+            {'_id': key},
+            {'$set': {'status': 'completed', 'status_code': status_code, 'response': body},
+             '$unset': {'locked_until': ""}}
+        )
+        self._cache_put(key, request_hash, status_code, body)
+
+    def _release(self, key: str):
+        # La petición falló: se libera la clave para que el cliente pueda reintentar
+        IdempotencyRecord._get_collection().delete_one({'_id': key, 'status': 'processing'})
+
+    @staticmethod
+    def _check_hash(stored_hash: str, request_hash: str):
+        if stored_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key ya usada con una petición distinta"
+            )
+
+    async def run(self, key: str, payload: Any, response: Response,
+                  handler: Callable, success_status: int = status.HTTP_200_OK) -> Any:
+        """
+        Ejecuta el handler una sola vez por clave y repite su respuesta.
+
+        Args:
+            key: Clave ya acotada por ámbito y usuario
+            payload: Cuerpo de la petición (para detectar reutilización de la clave)
+            response: Response de FastAPI, para fijar el código de estado
+            handler: Función (síncrona o async, sin argumentos) con la lógica real
+            success_status: Código de estado si el handler no fija otro
+
+        Returns:
+            Respuesta del handler, original o almacenada
+        """
+        request_hash = request_fingerprint(payload)
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            cached = self._cache_get(key)
+            if cached:
+                self._check_hash(cached[0], request_hash)
+                response.status_code = cached[1]
+                return cached[2]
+
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                # Duplicado concurrente en este proceso: esperar al primero
+                try:
+                    await asyncio.wait_for(asyncio.shield(inflight), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    self._raise_in_progress()
+                continue
+
+            # Registrar la petición antes de ir a la base de datos para que
+            # los duplicados de este proceso esperen en lugar de competir
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                record = await run_in_threadpool(self._claim, key, request_hash)
+            except BaseException:
+                self._finish(key, future)
+                raise
+            if record is None:
+                break
+
+            self._finish(key, future)
+            self._check_hash(record['request_hash'], request_hash)
+            if record['status'] == 'completed':
+                self._cache_put(key, request_hash, record['status_code'], record['response'])
+                continue
+
+            # Otro proceso la está procesando: sondear hasta que termine
+            if time.monotonic() >= deadline:
+                self._raise_in_progress()
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                result = await handler()
+            else:
+                result = await run_in_threadpool(handler)
+
+            body = jsonable_encoder(result)
+            await run_in_threadpool(self._complete, key, request_hash,
+                                    response.status_code or success_status, body)
+            return result
+
+        except Exception:
+            await run_in_threadpool(self._release, key)
+            raise
+        finally:
+            self._finish(key, future)
+
+    def _finish(self, key: str, future: asyncio.Future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.done():
+            future.set_result(None)
+
+    @staticmethod
+    def _raise_in_progress():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Hay una petición en curso con esta Idempotency-Key"
+        )
+
+
+idempotency_store = IdempotencyStore()
+
+
+async def run_idempotent(idempotency_key: Optional[str], scope: str, owner_id: str, payload: Any,
+                         response: Response, handler: Callable,
+                         success_status: int = status.HTTP_200_OK) -> Any:
+    """
+    Ejecuta el handler con soporte de Idempotency-Key.
+
+    Sin cabecera se ejecuta directamente. La clave se acota por ámbito y
+    usuario para que dos clientes no compartan respuestas.
+    """
+    if not idempotency_key:
+        if asyncio.iscoroutinefunction(handler):
+            return await handler()
+        return await run_in_threadpool(handler)
+
+    key = f"{scope}:{owner_id}:{idempotency_key}"
+    return await idempotency_store.run(key, payload, response, handler, success_status)
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.models.Booking import Booking
+from app.utils.booking_utils import build_booking_email_context
+from app.utils.email import send_status_update_email
+from app.utils.email_templates import STATUS_LABELS
+
+# Ventana durante la que se agrupan los cambios de una misma reserva
+NOTIFICATION_COALESCE_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_SECONDS", "60"))
+
+
+class NotificationCoalescer:
+    """
+    Agrupa las notificaciones de cambios de una reserva.
+
+    El primer evento abre una ventana; los siguientes se acumulan y al
+    cerrarse se envía un único email con el estado final de la reserva,
+    con una sola lectura de la base de datos.
+    """
+
+    def __init__(self, window_seconds: float = NOTIFICATION_COALESCE_SECONDS):
+        self.window_seconds = window_seconds
+        self._condition = threading.Condition()
+        # booking_id -> {'due': instante de envío, 'changes': [...]}
+        self._pending: Dict[str, dict] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def record(self, booking_id: str, change: str):
+        """
+        Registra un cambio en la reserva.
+
+        Args:
+            booking_id: ID de la reserva
+            change: Descripción legible del cambio
+        """
+        with self._condition:
+            entry = self._pending.get(booking_id)
+            if entry is None:
+                self._pending[booking_id] = {
+                    'due': time.monotonic() + self.window_seconds,
+                    'changes': [change]
+                }
+                self._condition.notify()
+            else:
+                entry['changes'].append(change)
+
+    def record_status(self, booking_id: str, new_status: str):
+        self.record(booking_id, f"Estado: {STATUS_LABELS.get(new_status, new_status)}")
+
+    def start(self):
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="notification-coalescer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Detiene el hilo y envía lo pendiente sin esperar a la ventana"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        for booking_id, entry in pending.items():
+            self._send(booking_id, entry['changes'])
+
+    def _run(self):
+        while True:
+            with self._condition:
+                due = self._take_due()
+                while not due and not self._stopping:
+                    timeout = self._next_timeout()
+                    self._condition.wait(timeout)
+                    due = self._take_due()
+                if self._stopping and not due:
+                    return
+
+            for booking_id, changes in due:
+                self._send(booking_id, changes)
+
+    def _take_due(self) -> List[tuple]:
+        now = time.monotonic()
+        due = [(booking_id, entry['changes'])
+               for booking_id, entry in self._pending.items() if entry['due'] <= now]
+        for booking_id, _ in due:
+            del self._pending[booking_id]
+        return due
+
+    def _next_timeout(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        return max(min(entry['due'] for entry in self._pending.values()) - time.monotonic(), 0)
+
+    def _send(self, booking_id: str, changes: List[str]):
+        try:
+            booking = Booking.objects.get(id=booking_id)
+            context = build_booking_email_context(booking)
+            context['changes'] = changes
+            context['updated_at'] = booking.status[-1].trade_date if booking.status else None
+            current_status = booking.status[-1].reserve_status if booking.status else 'pending'
+
+            send_status_update_email(booking.user.email, context, current_status)
+
+        except Exception as e:
+            print(f"Error sending coalesced notification for {booking_id}: {e}")
+
+
+notification_coalescer = NotificationCoalescer()
@@ -0,0 +1,216 @@
+import csv
+import json
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.models.Payment import Payment
+from app.utils.revenue_rollups import apply_increments, payment_increment, room_types_for_reservations
+
+RECONCILE_CHUNK_SIZE = int(os.getenv("RECONCILE_CHUNK_SIZE", "1000"))
+# Diferencia máxima admitida entre importes (redondeo de la pasarela)
+AMOUNT_TOLERANCE = 0.005
+
+# Estados de liquidación de la pasarela -> estado del pago
+SETTLEMENT_STATUS = {
+    'settled': 'completed',
+    'completed': 'completed',
+    'paid': 'completed',
+    'failed': 'failed',
+    'declined': 'failed',
+    'pending': 'pending',
+}
+
+
+def payment_to_response(doc: dict) -> dict:
+    """Convierte un documento raw de payments al formato de PaymentResponse"""
+    return {
+        'id': str(doc['_id']),
+        'reservation_id': str(doc['reservation']),
+        'amount': doc.get('amount') or 0.0,
+        'method': doc['method'],
+        'transaction_id': doc['transaction_id'],
+        'status': doc['status'],
+        'transaction_date': doc['date'],
+        'settled_at': doc.get('settled_at')
+    }
+
+
+def upsert_payment(reservation_id: str, transaction_id: str, amount: float,
+                   method: str, status: str) -> Tuple[dict, bool]:
+    """
+    Registra un pago de forma idempotente con un único upsert.
+
+    Args:
+        reservation_id: ID de la reserva
+        transaction_id: ID de la transacción (clave de idempotencia)
+        amount: Importe
+        method: Método de pago
+        status: Estado inicial
+
+    Returns:
+        tuple: (documento del pago, True si se creó en esta llamada)
+    """
+    now = datetime.now()
+    new_doc = {
+        '_id': ObjectId(),
+        'reservation': ObjectId(reservation_id),
+        'amount': amount,
+        'method': method,
+        'status': status,
+        'transaction_id': transaction_id,
+        'date': now,
+    }
+    if status == 'completed':
+        new_doc['settled_at'] = now
+
+    # Con ReturnDocument.BEFORE, None indica que el upsert insertó el documento
+    existing = Payment._get_collection().find_one_and_update(
+        {'transaction_id': transaction_id},
+        {'$setOnInsert': new_doc},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if existing is None:
+        return new_doc, True
+    return existing, False
+
+
+def is_same_payment(doc: dict, reservation_id: str, amount: float, method: str) -> bool:
+    """Comprueba que un reintento describe el mismo pago ya registrado"""
+    return (
+        str(doc['reservation']) == reservation_id
+        and abs((doc.get('amount') or 0.0) - amount) <= AMOUNT_TOLERANCE
+        and doc['method'] == method
+    )
+
+
+def parse_settlement_lines(stream: Iterable[str], is_csv: bool) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Lee un fichero de liquidación línea a línea (NDJSON o CSV).
+
+    Yields:
+        tuple: (número de línea, línea normalizada o None, error o None)
+    """
+    if is_csv:
+        rows = ((index + 2, row) for index, row in enumerate(csv.DictReader(stream)))
+    else:
+        rows = ((index + 1, line) for index, line in enumerate(stream))
+
+    for line_number, raw in rows:
+        try:
+            if not is_csv:
+                if not raw.strip():
+                    continue
+                raw = json.loads(raw)
+
+            transaction_id = str(raw['transaction_id']).strip()
+            status = SETTLEMENT_STATUS.get(str(raw.get('status', 'settled')).strip().lower())
+            if not transaction_id or status is None:
+                raise ValueError("transaction_id o status inválido")
+
+            yield line_number, {
+                'transaction_id': transaction_id,
+                'amount': float(raw['amount']),
+                'status': status
+            }, None
+
+        except (KeyError, ValueError, TypeError) as e:
+            yield line_number, None, str(e)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reconcile_settlements(stream: Iterable[str], is_csv: bool = False,
+                          chunk_size: int = RECONCILE_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Concilia un fichero de liquidación con los pagos registrados.
+
+    Procesa el fichero por bloques: cada bloque carga solo los pagos que
+    menciona (con proyección) y aplica cada cambio de estado con una
+    actualización condicionada al estado leído, de modo que dos
+    conciliaciones simultáneas no cuentan dos veces el mismo ingreso.
+    Las discrepancias se emiten según se detectan,
+    de modo que la memoria no depende del tamaño del fichero.
+
+    Yields:
+        dict: Una entrada por discrepancia y un resumen final
+    """
+    collection = Payment._get_collection()
+    summary = {'type': 'summary', 'lines': 0, 'matched': 0, 'updated': 0,
+               'missing': 0, 'amount_mismatch': 0, 'invalid': 0}
+
+    for chunk in _chunks(parse_settlement_lines(stream, is_csv), chunk_size):
+        summary['lines'] += len(chunk)
+        transaction_ids = [line['transaction_id'] for _, line, _ in chunk if line]
+        payments = {
+            doc['transaction_id']: doc
+            for doc in collection.find(
+                {'transaction_id': {'$in': transaction_ids}},
+                {'transaction_id': 1, 'amount': 1, 'status': 1, 'method': 1, 'reservation': 1}
+            )
+        }
+        room_types = room_types_for_reservations({doc['reservation'] for doc in payments.values()})
+
+        rollup_operations = []
+        now = datetime.now()
+        for line_number, line, error in chunk:
+            if error:
+                summary['invalid'] += 1
+                yield {'type': 'invalid', 'line': line_number, 'error': error}
+                continue
+
+            payment = payments.get(line['transaction_id'])
+            if payment is None:
+                summary['missing'] += 1
+                yield {'type': 'missing', 'line': line_number, 'transaction_id': line['transaction_id']}
+                continue
+
+            recorded_amount = payment.get('amount') or 0.0
+            if abs(recorded_amount - line['amount']) > AMOUNT_TOLERANCE:
+                summary['amount_mismatch'] += 1
+                yield {'type': 'amount_mismatch', 'line': line_number,
+                       'transaction_id': line['transaction_id'],
+                       'recorded': recorded_amount, 'settled': line['amount']}
+                continue
+
+            summary['matched'] += 1
+            if payment['status'] != line['status']:
+                update = {'status': line['status']}
+                if line['status'] == 'completed':
+                    update['settled_at'] = now
+                # El filtro por estado evita pisar cambios concurrentes; solo
+                # cuenta para los rollups si esta actualización hizo el cambio
+                result = collection.update_one(
+                    {'_id': payment['_id'], 'status': payment['status']},
+                    {'$set': update}
+                )
+                if result.modified_count != 1:
+                    continue
+                summary['updated'] += 1
+
+                # Mantener los rollups de ingresos al entrar o salir de 'completed'
+                if 'completed' in (payment['status'], line['status']):
+                    rollup_operations.append(payment_increment(
+                        recorded_amount, payment['method'],
+                        room_types.get(str(payment['reservation'])), now,
+                        sign=1 if line['status'] == 'completed' else -1
+                    ))
+                payment['status'] = line['status']
+
+        apply_increments(rollup_operations)
+
+    yield summary
@@ -0,0 +1,196 @@
+import math
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.models.RateLimitBucket import RateLimitBucket
+
+# Tipo de almacén: "memory" (por proceso) o "mongo" (compartido entre workers)
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Solo confiar en X-Forwarded-For cuando la app está detrás de un proxy propio
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+
+
+def _window_position(now: float, window_seconds: float) -> Tuple[int, float]:
+    """Devuelve el índice de la ventana actual y la fracción transcurrida"""
+    index = int(now // window_seconds)
+    elapsed = (now - index * window_seconds) / window_seconds
+    return index, elapsed
+
+
+class RateLimitStore(ABC):
+    """
+    Interfaz de almacenamiento para el limitador de ventana deslizante.
+
+    Cada clave guarda solo el contador de la ventana actual y el de la
+    anterior; la tasa se estima ponderando la ventana anterior según la
+    fracción de la actual que ya ha transcurrido. Los intentos rechazados
+    no cuentan, así que un cliente que insiste no alarga su bloqueo.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        """
+        Registra un intento para la clave.
+
+        Returns:
+            float: 0 si se permite, o segundos a esperar si se rechaza
+        """
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Almacén en memoria con memoria O(1) por clave y desalojo LRU"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # clave -> [índice de ventana, contador actual, contador anterior]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        index, elapsed = _window_position(time.time(), window_seconds)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [index, 0, 0]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                if bucket[0] != index:
+                    # Desplazar ventanas; si pasó más de una, la anterior queda vacía
+                    bucket[2] = bucket[1] if bucket[0] == index - 1 else 0
+                    bucket[1] = 0
+                    bucket[0] = index
+
+            estimated = bucket[2] * (1 - elapsed) + bucket[1]
+            if estimated + 1 > limit:
+                return window_seconds * (1 - elapsed)
+
+            bucket[1] += 1
+            return 0.0
+
+
+class MongoRateLimitStore(RateLimitStore):
+    """Almacén compartido en MongoDB para despliegues con varios workers"""
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        index, elapsed = _window_position(time.time(), window_seconds)
+        expires_at = datetime.utcnow() + timedelta(seconds=window_seconds * 2)
+
+        current = RateLimitBucket.objects(id=f"{key}:{index}").modify(
+            upsert=True, new=True,
+            inc__count=1,
+            set_on_insert__expires_at=expires_at
+        )
+        previous = RateLimitBucket.objects(id=f"{key}:{index - 1}").only('count').first()
+        previous_count = previous.count if previous else 0
+
+        # El intento actual ya está contado en current.count
+        estimated = previous_count * (1 - elapsed) + current.count
+        if estimated > limit:
+            # Igual que en memoria, el intento rechazado no cuenta
+            RateLimitBucket.objects(id=f"{key}:{index}").update_one(dec__count=1)
+            return window_seconds * (1 - elapsed)
+        return 0.0
+
+
+_store: Optional[RateLimitStore] = None
+
+
+def get_rate_limit_store() -> RateLimitStore:
+    global _store
+    if _store is None:
+        _store = MongoRateLimitStore() if RATE_LIMIT_STORE == "mongo" else MemoryRateLimitStore()
+    return _store
+
+
+def set_rate_limit_store(store: RateLimitStore):
+    """Permite sustituir el almacén (p. ej. por uno compartido)"""
+    global _store
+    _store = store
+
+
+def get_client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """
+    Dependencia de FastAPI que limita intentos por IP y por cuenta.
+
+    Se ejecuta antes del endpoint, por lo que las peticiones rechazadas
+    nunca llegan al hash de contraseñas ni a la base de datos.
+    """
+
+    def __init__(
+            self,
+            scope: str,
+            per_ip: Tuple[int, float],
+            per_account: Optional[Tuple[int, float]] = None,
+            account_field: Optional[str] = None
+    ):
+        self.scope = scope
+        self.per_ip = per_ip
+        self.per_account = per_account
+        self.account_field = account_field
+
+    async def __call__(self, request: Request):
+        store = get_rate_limit_store()
+
+        limit, window = self.per_ip
+        retry_after = store.hit(f"{self.scope}:ip:{get_client_ip(request)}", limit, window)
+
+        if not retry_after and self.per_account and self.account_field:
+            account = await self._get_account(request)
+            if account:
+                limit, window = self.per_account
+                retry_after = store.hit(f"{self.scope}:account:{account}", limit, window)
+
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Demasiados intentos, inténtalo más tarde",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    async def _get_account(self, request: Request) -> Optional[str]:
+        """Obtiene la cuenta del cuerpo (form o JSON); Starlette lo cachea"""
+        try:
+            content_type = request.headers.get("content-type", "")
+            if content_type.startswith("application/json"):
+                data = await request.json()
+            else:
+                data = await request.form()
+            value = data.get(self.account_field)
+        except Exception:
+            return None
+        return str(value).strip().lower() if value else None
+
+
+login_rate_limiter = RateLimiter(
+    scope="login",
+    per_ip=(int(os.getenv("LOGIN_RATE_LIMIT_IP", "20")), 60),
+    per_account=(int(os.getenv("LOGIN_RATE_LIMIT_ACCOUNT", "5")), 300),
+    account_field="username"
+)
+
+password_reset_rate_limiter = RateLimiter(
+    scope="forgot-password",
+    per_ip=(int(os.getenv("RESET_RATE_LIMIT_IP", "5")), 300),
+    per_account=(int(os.getenv("RESET_RATE_LIMIT_ACCOUNT", "3")), 3600),
+    account_field="email"
+)
@@ -0,0 +1,151 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from app.models.Booking import Booking
+from app.models.EmailOutbox import EmailOutbox
+from app.models.Room import Room
+from app.models.User import User
+from app.utils.booking_utils import build_booking_email_context
+from app.utils.email_templates import render_email
+from app.utils.room_utils import get_hotels_by_room
+
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+REMINDER_RENDER_WORKERS = int(os.getenv("REMINDER_RENDER_WORKERS", "4"))
+
+
+def reminder_dedupe_key(booking_id, check_in: datetime) -> str:
+    """Un recordatorio por reserva y fecha de entrada"""
+    return f"reminder:{booking_id}:{check_in.date().isoformat()}"
+
+
+def _build_contexts(bookings: List[Booking]) -> List[dict]:
+    """
+    Carga usuarios, habitaciones y hoteles del lote con una consulta por colección.
+
+    Los hoteles se resuelven todos en get_hotels_by_room; una habitación sin
+    hotel se renderiza sin él en lugar de volver a consultarlo por reserva.
+    """
+    user_ids = {booking.user.id for booking in bookings}
+    room_ids = {booking.room.id for booking in bookings}
+
+    users = {user.id: user for user in User.objects(id__in=list(user_ids)).only('name', 'email')}
+    rooms = {room.id: room for room in Room.objects(id__in=list(room_ids)).only('number_room')}
+    hotels = get_hotels_by_room(room_ids)
+
+    contexts = []
+    for booking in bookings:
+        user = users.get(booking.user.id)
+        room = rooms.get(booking.room.id)
+        if user is None or room is None:
+            continue
+        context = build_booking_email_context(
+            booking, user, room, hotels.get(str(room.id)), lookup_hotel=False
+        )
+        context['user_email'] = user.email
+        contexts.append(context)
+    return contexts
+
+
+def _render(context: dict) -> dict:
+    rendered = render_email('reminder', context)
+    return {
+        'to_email': context['user_email'],
+        'subject': rendered.subject,
+        'body': rendered.body,
+        'status': 'pending',
+        'attempts': 0,
+        'next_attempt_at': datetime.utcnow(),
+        'created_at': datetime.utcnow(),
+        'dedupe_key': reminder_dedupe_key(context['reservation_id'], context['check_in'])
+    }
+
+
+def _enqueue(documents: List[dict]) -> int:
+    """
+    Inserta los mensajes en el outbox ignorando los ya encolados.
+
+    Returns:
+        int: Número de mensajes nuevos
+    """
+    if not documents:
+        return 0
+    try:
+        result = EmailOutbox._get_collection().insert_many(documents, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        # Los duplicados de dedupe_key son recordatorios ya encolados
+        fatal = [error for error in e.details['writeErrors'] if error['code'] != 11000]
+        if fatal:
+            raise
+        return e.details['nInserted']
+
+
+def run_reminder_campaign(
+        window_start: Optional[datetime] = None,
+        window_end: Optional[datetime] = None,
+        batch_size: int = REMINDER_BATCH_SIZE,
+        render_workers: int = REMINDER_RENDER_WORKERS
+) -> dict:
+    """
+    Encola recordatorios para las reservas con check-in dentro de la ventana.
+
+    La selección usa el índice de check_in y se recorre por lotes; cada lote
+    carga sus relaciones en bloque y renderiza en paralelo. El envío real lo
+    hacen los workers del outbox. Como cada mensaje lleva una dedupe_key
+    única, relanzar la campaña tras un fallo retoma donde quedó sin duplicar
+    envíos.
+
+    Args:
+        window_start: Inicio de la ventana (por defecto, mañana a las 00:00)
+        window_end: Fin de la ventana (por defecto, 24 horas después del inicio)
+        batch_size: Reservas por lote
+        render_workers: Hilos para renderizar mensajes
+
+    Returns:
+        dict: Reservas seleccionadas y recordatorios encolados
+    """
+    if window_start is None:
+        window_start = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    if window_end is None:
+        window_end = window_start + timedelta(days=1)
+
+    bookings = Booking.objects(
+        check_in__gte=window_start,
+        check_in__lt=window_end,
+        status__not__match={"reserve_status": "cancelled"}
+    ).only(
+        'user', 'room', 'check_in', 'check_out', 'total', 'extra_services'
+    ).no_dereference().batch_size(batch_size)
+
+    selected = 0
+    queued = 0
+    batch = []
+
+    with ThreadPoolExecutor(max_workers=render_workers) as executor:
+        def flush(current_batch):
+            contexts = _build_contexts(current_batch)
+            return _enqueue(list(executor.map(_render, contexts)))
+
+        for booking in bookings:
+            batch.append(booking)
+            selected += 1
+            if len(batch) >= batch_size:
+                queued += flush(batch)
+                batch = []
+
+        if batch:
+            queued += flush(batch)
+
+    print(f"Campaña de recordatorios: {selected} reservas, {queued} emails encolados")
+    return {"selected": selected, "queued": queued}
+
+
+if __name__ == "__main__":
+    from app.database import connect_db
+
+    connect_db()
+    run_reminder_campaign()
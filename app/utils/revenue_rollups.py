@@ -0,0 +1,270 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from app.models.Booking import Booking
+from app.models.Payment import Payment
+from app.models.RevenueRollup import RevenueRollup
+from app.models.Room import Room
+
+# Estados de reserva que cuentan como ingreso (igual que get_reservation_statistics)
+REVENUE_STATUSES = {'confirmed', 'completed'}
+BOOKING_METHOD = "booking"
+UNKNOWN_ROOM_TYPE = "unknown"
+
+
+def day_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, value.day)
+
+
+def _increment(day: datetime, room_type: Optional[str], method: str, **amounts) -> UpdateOne:
+    return UpdateOne(
+        {'day': day_start(day), 'room_type': room_type or UNKNOWN_ROOM_TYPE, 'method': method},
+        {'$inc': amounts},
+        upsert=True
+    )
+
+
+def apply_increments(operations: List[UpdateOne]):
+    if operations:
+        RevenueRollup._get_collection().bulk_write(operations, ordered=False)
+
+
+def payment_increment(amount: float, method: str, room_type: Optional[str],
+                      when: datetime, sign: int = 1) -> UpdateOne:
+    """Incremento por un pago que pasa a (o deja de estar) completado"""
+    return _increment(when, room_type, method, collected=sign * (amount or 0.0), payments=sign)
+
+
+def transition_amount(booking: dict, old_status: str, new_status: str) -> float:
+    """
+    Importe que una transición suma a los ingresos reservados.
+
+    Al confirmar se suma el total; al salir de confirmed/completed se resta
+    lo que se sumó (booked_amount, que incluye los extras cambiados después),
+    no el total actual. booking_updates.push_status calcula lo mismo en la
+    propia actualización y lo guarda en la entrada del historial.
+
+    Args:
+        booking: Documento raw antes del cambio ('total' y 'booked_amount')
+    """
+    sign = int(new_status in REVENUE_STATUSES) - int(old_status in REVENUE_STATUSES)
+    if sign > 0:
+        return booking['total']
+    if sign < 0:
+        booked = booking.get('booked_amount')
+        return -(booked if booked is not None else booking['total'])
+    return 0.0
+
+
+def booking_transition_increment(amount: float, room_type: Optional[str], old_status: str,
+                                 new_status: str, when: datetime) -> Optional[UpdateOne]:
+    """
+    Incremento por un cambio de estado de reserva.
+
+    Returns:
+        UpdateOne, o None si la transición no altera los ingresos
+    """
+    sign = int(new_status in REVENUE_STATUSES) - int(old_status in REVENUE_STATUSES)
+    if sign == 0:
+        return None
+    return _increment(when, room_type, BOOKING_METHOD, booked=amount, bookings=sign)
+
+
+def _room_type(room_id) -> Optional[str]:
+    room = Room.objects(id=room_id).only('type').as_pymongo().first()
+    return room['type'] if room else None
+
+
+def record_booking_transition(booking: dict, old_status: str, new_status: str,
+                              when: Optional[datetime] = None):
+    """
+    Aplica el incremento de un cambio de estado.
+
+    Args:
+        booking: Documento raw de la reserva antes del cambio ('room', 'total', 'booked_amount')
+    """
+    if int(old_status in REVENUE_STATUSES) == int(new_status in REVENUE_STATUSES):
+        return
+    operation = booking_transition_increment(
+        transition_amount(booking, old_status, new_status), _room_type(booking['room']),
+        old_status, new_status, when or datetime.now()
+    )
+    if operation:
+        apply_increments([operation])
+
+
+def record_booking_adjustment(booking: dict, amount: float, when: datetime):
+    """Cambio de total (extras) de una reserva que ya cuenta como ingreso"""
+    if amount:
+        apply_increments([_increment(when, _room_type(booking['room']), BOOKING_METHOD, booked=amount)])
+
+
+def record_payment_completed(reservation_id, amount: float, method: str,
+                             when: Optional[datetime] = None, sign: int = 1):
+    room_types = room_types_for_reservations([reservation_id])
+    apply_increments([payment_increment(
+        amount, method, room_types.get(str(reservation_id)), when or datetime.now(), sign
+    )])
+
+
+def room_types_for_reservations(reservation_ids: Iterable) -> Dict[str, str]:
+    """
+    Resuelve el tipo de habitación de varias reservas con dos consultas.
+
+    Returns:
+        Dict[str, str]: Tipo de habitación indexado por ID de reserva
+    """
+    reservation_ids = list(reservation_ids)
+    if not reservation_ids:
+        return {}
+
+    room_by_booking = {
+        str(doc['_id']): doc['room']
+        for doc in Booking.objects(id__in=reservation_ids).only('room').as_pymongo()
+    }
+    types_by_room = {
+        doc['_id']: doc['type']
+        for doc in Room.objects(id__in=list(set(room_by_booking.values()))).only('type').as_pymongo()
+    }
+    return {
+        booking_id: types_by_room.get(room_id)
+        for booking_id, room_id in room_by_booking.items()
+    }
+
+
+def _legacy_amount(doc: dict) -> float:
+    """Importe de una transición anterior a guardar 'amount': el total sin los ajustes posteriores"""
+    return doc['total'] - sum(item.get('amount', 0.0) for item in doc.get('revenue_adjustments') or [])
+
+
+def rebuild_rollups(batch_size: int = 1000) -> int:
+    """
+    Recalcula todos los rollups desde Payment y Booking.
+
+    Usa los mismos importes que el camino incremental: el 'amount' guardado
+    en cada transición del historial y los ajustes por extras. Los
+    resultados se escriben en una colección temporal que sustituye a la
+    actual con $out, así que un informe durante la reconstrucción ve los
+    datos antiguos completos o los nuevos, nunca una mezcla.
+
+    Pensado para la carga inicial o para corregir desviaciones.
+
+    Returns:
+        int: Número de documentos de rollup generados
+    """
+    totals = defaultdict(lambda: defaultdict(float))
+
+    payments = Payment.objects(status='completed').only(
+        'reservation', 'amount', 'method', 'date', 'settled_at'
+    ).as_pymongo().batch_size(batch_size)
+    chunk = []
+
+    def flush_payments(current):
+        room_types = room_types_for_reservations(doc['reservation'] for doc in current)
+        for doc in current:
+            key = (day_start(doc.get('settled_at') or doc['date']),
+                   room_types.get(str(doc['reservation'])) or UNKNOWN_ROOM_TYPE,
+                   doc['method'])
+            totals[key]['collected'] += doc.get('amount') or 0.0
+            totals[key]['payments'] += 1
+
+    for doc in payments:
+        chunk.append(doc)
+        if len(chunk) >= batch_size:
+            flush_payments(chunk)
+            chunk = []
+    if chunk:
+        flush_payments(chunk)
+
+    room_types = {doc['_id']: doc['type'] for doc in Room.objects.only('type').as_pymongo()}
+    bookings = Booking.objects.only(
+        'room', 'total', 'status', 'revenue_adjustments'
+    ).as_pymongo().batch_size(batch_size)
+    for doc in bookings:
+        room_type = room_types.get(doc['room']) or UNKNOWN_ROOM_TYPE
+        previous = 'pending'
+        for record in doc.get('status', []):
+            current = record.get('reserve_status', 'pending')
+            sign = int(current in REVENUE_STATUSES) - int(previous in REVENUE_STATUSES)
+            if sign:
+                key = (day_start(record['trade_date']), room_type, BOOKING_METHOD)
+                amount = record.get('amount')
+                totals[key]['booked'] += amount if amount is not None else sign * _legacy_amount(doc)
+                totals[key]['bookings'] += sign
+            previous = current
+        for adjustment in doc.get('revenue_adjustments') or []:
+            totals[(day_start(adjustment['date']), room_type, BOOKING_METHOD)]['booked'] += adjustment['amount']
+
+    collection = RevenueRollup._get_collection()
+    staging = collection.database[f"{collection.name}_rebuild"]
+    staging.drop()
+    documents = [
+        {'day': day, 'room_type': room_type, 'method': method,
+         'collected': values['collected'], 'payments': int(values['payments']),
+         'booked': values['booked'], 'bookings': int(values['bookings'])}
+        for (day, room_type, method), values in totals.items()
+    ]
+    if documents:
+        staging.insert_many(documents, ordered=False)
+    # $out reemplaza la colección de golpe y conserva sus índices
+    staging.aggregate([{'$out': collection.name}])
+    staging.drop()
+    return len(documents)
+
+
+def get_revenue_report(date_from: date, date_to: date) -> dict:
+    """
+    Informe de ingresos por día leyendo únicamente los rollups.
+
+    Args:
+        date_from: Primer día incluido
+        date_to: Último día incluido
+
+    Returns:
+        dict: Totales del periodo y desglose diario por tipo y método
+    """
+    start = datetime.combine(date_from, datetime.min.time())
+    end = datetime.combine(date_to, datetime.min.time()) + timedelta(days=1)
+
+    rollups = RevenueRollup.objects(day__gte=start, day__lt=end).order_by('day').as_pymongo()
+
+    days = {}
+    totals = {'collected': 0.0, 'payments': 0, 'booked': 0.0, 'bookings': 0}
+    for doc in rollups:
+        day = days.setdefault(doc['day'], {
+            'day': doc['day'].date(),
+            'collected': 0.0, 'booked': 0.0,
+            'by_room_type': defaultdict(lambda: {'collected': 0.0, 'booked': 0.0}),
+            'by_method': defaultdict(float)
+        })
+        collected = doc.get('collected', 0.0)
+        booked = doc.get('booked', 0.0)
+        day['collected'] += collected
+        day['booked'] += booked
+        day['by_room_type'][doc['room_type']]['collected'] += collected
+        day['by_room_type'][doc['room_type']]['booked'] += booked
+        if doc['method'] != BOOKING_METHOD:
+            day['by_method'][doc['method']] += collected
+
+        for field in totals:
+            totals[field] += doc.get(field, 0)
+
+    return {
+        'from': date_from,
+        'to': date_to,
+        'totals': totals,
+        'days': [
+            {**day, 'by_room_type': dict(day['by_room_type']), 'by_method': dict(day['by_method'])}
+            for day in days.values()
+        ]
+    }
+
+
+if __name__ == "__main__":
+    from app.database import connect_db
+
+    connect_db()
+    print(f"Rollups generados: {rebuild_rollups()}")
@@ -0,0 +1,91 @@
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from app.models.Booking import Booking
+from app.models.BookingHold import BookingHold
+from app.models.Room import Room
+
+# Tamaño máximo de grupo: acota la tabla del DP y por tanto la latencia
+MAX_PARTY_SIZE = 100
+
+
+def occupied_room_ids(check_in: datetime, check_out: datetime) -> Set:
+    """IDs de habitaciones con reservas o bloqueos vigentes en el rango (dos consultas distinct)"""
+    # distinct sobre la colección devuelve ObjectId sin desreferenciar las habitaciones
+    booked = Booking._get_collection().distinct('room', {
+        'check_in': {'$lt': check_out},
+        'check_out': {'$gt': check_in},
+        'status': {'$not': {'$elemMatch': {'reserve_status': 'cancelled'}}}
+    })
+    held = BookingHold._get_collection().distinct('room', {
+        'check_in': {'$lt': check_out},
+        'check_out': {'$gt': check_in},
+        'expires_at': {'$gt': datetime.utcnow()}
+    })
+    return set(booked) | set(held)
+
+
+def available_rooms(check_in: datetime, check_out: datetime, room_type: Optional[str] = None) -> List[dict]:
+    filters = {'availability': True}
+    if room_type:
+        filters['type'] = room_type
+    occupied = occupied_room_ids(check_in, check_out)
+    return [
+        doc for doc in Room.objects(**filters).only(
+            'number_room', 'type', 'capacity', 'price_per_night'
+        ).as_pymongo()
+        if doc['_id'] not in occupied
+    ]
+
+
+def cheapest_allocation(rooms: List[dict], party_size: int) -> Optional[List[dict]]:
+    """
+    Combinación más barata (por noche) cuya capacidad cubre al grupo.
+
+    Mochila acotada sobre la capacidad, truncada en party_size. De cada
+    capacidad solo pueden servir las ceil(party_size / capacidad)
+    habitaciones más baratas, así que el DP no crece con el número total
+    de habitaciones: O(party_size * sum(ceil(party_size / c))).
+    A igual precio se prefiere usar menos habitaciones.
+
+    Returns:
+        List[dict]: Habitaciones elegidas, o None si no hay combinación posible
+    """
+    if party_size <= 0:
+        return []
+
+    by_capacity: Dict[int, List[dict]] = defaultdict(list)
+    for room in rooms:
+        if room.get('capacity', 0) > 0:
+            by_capacity[min(room['capacity'], party_size)].append(room)
+
+    candidates = []
+    for capacity, group in by_capacity.items():
+        group.sort(key=lambda room: room['price_per_night'])
+        candidates.extend(group[:math.ceil(party_size / capacity)])
+
+    # best[x] = (coste, nº habitaciones, habitación añadida, estado anterior) para cubrir x plazas
+    best: List[Optional[tuple]] = [None] * (party_size + 1)
+    best[0] = (0.0, 0, None, None)
+    for room in candidates:
+        capacity = min(room['capacity'], party_size)
+        # De mayor a menor para usar cada habitación una sola vez
+        for covered in range(party_size - 1, -1, -1):
+            state = best[covered]
+            if state is None:
+                continue
+            target = min(covered + capacity, party_size)
+            option = (state[0] + room['price_per_night'], state[1] + 1, room, state)
+            if best[target] is None or option[:2] < best[target][:2]:
+                best[target] = option
+
+    state = best[party_size]
+    if state is None:
+        return None
+    chosen = []
+    while state[2] is not None:
+        chosen.append(state[2])
+        state = state[3]
+    return chosen
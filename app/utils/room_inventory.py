@@ -0,0 +1,238 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.models.Booking import Booking
+from app.models.Room import Room
+from app.models.RoomInventory import RoomInventory
+
+
+def stay_nights(check_in: datetime, check_out: datetime) -> List[datetime]:
+    """Noches de una estancia, cada una como la medianoche de su día"""
+    first = datetime.combine(check_in.date(), datetime.min.time())
+    return [first + timedelta(days=offset) for offset in range((check_out.date() - check_in.date()).days)]
+
+
+def type_capacity(room_type: str) -> int:
+    return Room.objects(type=room_type, availability=True).count()
+
+
+def room_type_of(room_id) -> Optional[str]:
+    room = Room.objects(id=room_id).only('type').as_pymongo().first()
+    return room['type'] if room else None
+
+
+def _apply(room_type: str, deltas: Dict[datetime, int]):
+    """
+    Aplica incrementos de 'sold' por noche en un único bulk_write.
+
+    Solo las noches que aún no tienen documento necesitan la capacidad del
+    tipo, así que el conteo de habitaciones se hace únicamente si falta alguna.
+    Las restas nunca crean noches: una noche vendida ya tiene documento.
+    """
+    deltas = {night: delta for night, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    collection = RoomInventory._get_collection()
+    increments = [night for night, delta in deltas.items() if delta > 0]
+    existing = {
+        doc['night']
+        for doc in collection.find({'room_type': room_type, 'night': {'$in': increments}}, {'night': 1})
+    } if increments else set()
+    missing = {night for night in increments if night not in existing}
+    capacity = type_capacity(room_type) if missing else None
+
+    operations = [
+        UpdateOne({'room_type': room_type, 'night': night}, {'$inc': {'sold': delta}})
+        for night, delta in deltas.items()
+        if night not in missing
+    ]
+    # Otra petición puede crear la noche entre la lectura y la escritura; el upsert lo tolera
+    operations.extend(
+        UpdateOne(
+            {'room_type': room_type, 'night': night},
+            {'$inc': {'sold': deltas[night]}, '$setOnInsert': {'capacity': capacity}},
+            upsert=True
+        )
+        for night in missing
+    )
+    collection.bulk_write(operations, ordered=False)
+
+
+def add_stay(room_type: str, check_in: datetime, check_out: datetime, sign: int = 1):
+    """
+    Suma (o resta, con sign=-1) una estancia a los contadores del tipo.
+
+    Args:
+        room_type: Tipo de habitación
+        check_in: Fecha de entrada
+        check_out: Fecha de salida
+        sign: 1 al reservar, -1 al cancelar
+    """
+    if room_type:
+        _apply(room_type, {night: sign for night in stay_nights(check_in, check_out)})
+
+
+def move_stay(room_type: str, old_check_in: datetime, old_check_out: datetime,
+              new_check_in: datetime, new_check_out: datetime):
+    """Cambio de fechas: solo se tocan las noches añadidas o liberadas"""
+    if not room_type:
+        return
+    old_nights = set(stay_nights(old_check_in, old_check_out))
+    new_nights = set(stay_nights(new_check_in, new_check_out))
+    deltas = {night: 1 for night in new_nights - old_nights}
+    deltas.update({night: -1 for night in old_nights - new_nights})
+    _apply(room_type, deltas)
+
+
+def refresh_capacity(room_type: str):
+    """Actualiza la capacidad de las noches futuras tras crear, borrar o cambiar habitaciones"""
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    RoomInventory.objects(room_type=room_type, night__gte=today).update(set__capacity=type_capacity(room_type))
+
+
+def move_room_type(room_id, old_type: str, new_type: str):
+    """
+    Traslada las noches futuras vendidas de una habitación a su nuevo tipo.
+
+    Args:
+        room_id: ID de la habitación
+        old_type: Tipo anterior
+        new_type: Tipo nuevo
+    """
+    if not old_type or not new_type or old_type == new_type:
+        return
+
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    deltas: Dict[datetime, int] = defaultdict(int)
+    bookings = Booking.objects(
+        room=room_id,
+        check_out__gt=today,
+        status__not__match={"reserve_status": "cancelled"}
+    ).only('check_in', 'check_out').as_pymongo()
+    for doc in bookings:
+        for night in stay_nights(doc['check_in'], doc['check_out']):
+            if night >= today:
+                deltas[night] += 1
+
+    _apply(old_type, {night: -count for night, count in deltas.items()})
+    _apply(new_type, deltas)
+
+
+def get_type_availability(room_types: Iterable[str], check_in: datetime, check_out: datetime) -> List[dict]:
+    """
+    Disponibilidad por tipo de habitación para un rango de fechas.
+
+    Una lectura por rango sobre (room_type, night); las noches sin
+    documento no tienen ventas y usan la capacidad actual del tipo.
+
+    Returns:
+        List[dict]: Por tipo, habitaciones libres en todo el rango y detalle por noche
+    """
+    room_types = list(room_types)
+    nights = stay_nights(check_in, check_out)
+    if not nights:
+        return []
+
+    counters: Dict[Tuple[str, datetime], dict] = {
+        (doc['room_type'], doc['night']): doc
+        for doc in RoomInventory.objects(
+            room_type__in=room_types, night__gte=nights[0], night__lte=nights[-1]
+        ).as_pymongo()
+    }
+
+    result = []
+    for room_type in room_types:
+        capacity = None
+        per_night = []
+        for night in nights:
+            doc = counters.get((room_type, night))
+            if doc is None:
+                if capacity is None:
+                    capacity = type_capacity(room_type)
+                doc = {'sold': 0, 'capacity': capacity}
+            per_night.append({
+                'night': night.date(),
+                'sold': doc.get('sold', 0),
+                'available': max(doc.get('capacity', 0) - doc.get('sold', 0), 0)
+            })
+        result.append({
+            'room_type': room_type,
+            'available': min(night['available'] for night in per_night),
+            'nights': per_night
+        })
+    return result
+
+
+def rebuild_inventory(verify_only: bool = False) -> dict:
+    """
+    Recalcula los contadores de noches futuras a partir de Booking.
+
+    Args:
+        verify_only: Solo comparar y devolver las diferencias, sin escribir
+
+    Returns:
+        dict: Noches revisadas y diferencias encontradas
+    """
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    room_types = {doc['_id']: doc['type'] for doc in Room.objects.only('type').as_pymongo()}
+    capacities = {room_type: type_capacity(room_type) for room_type in set(room_types.values())}
+
+    expected: Dict[Tuple[str, datetime], int] = defaultdict(int)
+    bookings = Booking.objects(
+        check_out__gt=today,
+        status__not__match={"reserve_status": "cancelled"}
+    ).only('room', 'check_in', 'check_out').as_pymongo()
+    for doc in bookings:
+        room_type = room_types.get(doc['room'])
+        if room_type is None:
+            continue
+        for night in stay_nights(doc['check_in'], doc['check_out']):
+            if night >= today:
+                expected[(room_type, night)] += 1
+
+    current = {
+        (doc['room_type'], doc['night']): doc.get('sold', 0)
+        for doc in RoomInventory.objects(night__gte=today).as_pymongo()
+    }
+
+    differences = [
+        {'room_type': room_type, 'night': night.date().isoformat(),
+         'expected': expected.get((room_type, night), 0), 'current': current.get((room_type, night), 0)}
+        for room_type, night in sorted(set(expected) | set(current))
+        if expected.get((room_type, night), 0) != current.get((room_type, night), 0)
+    ]
+
+    if not verify_only:
+        operations = [
+            UpdateOne(
+                {'room_type': room_type, 'night': night},
+                {'$set': {'sold': expected.get((room_type, night), 0),
+                          'capacity': capacities.get(room_type, 0)}},
+                upsert=True
+            )
+            for room_type, night in set(expected) | set(current)
+        ]
+        if operations:
+            RoomInventory._get_collection().bulk_write(operations, ordered=False)
+
+    return {'nights': len(set(expected) | set(current)), 'differences': differences}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.database import connect_db
+
+    parser = argparse.ArgumentParser(description="Recalcula o verifica los contadores de inventario")
+    parser.add_argument("--verify", action="store_true", help="Solo mostrar diferencias")
+    args = parser.parse_args()
+
+    connect_db()
+    report = rebuild_inventory(verify_only=args.verify)
+    for difference in report['differences']:
+        print(difference)
+    print(f"Noches revisadas: {report['nights']}, diferencias: {len(report['differences'])}")
@@ -1,9 +1,10 @@
 # app/utils/room_utils.py
 from datetime import datetime
-from typing import List
+from typing import Dict, Iterable, List, Optional
 from bson import ObjectId
 from mongoengine import DoesNotExist
 
+from app.models.Hotel import Hotel
 from app.models.Room import Room
 
 
@@ -49,6 +50,35 @@ def validate_room_availability(room_id: str, check_in: datetime, check_out: date
         return False
 
 
+def room_document_data(data: dict, default_hotel_id: Optional[str] = None) -> dict:
+    """
+    Convierte los datos de RoomCreate/RoomUpdate en campos del modelo Room.
+
+    Args:
+        data: Datos del schema (con hotel_id opcional)
+        default_hotel_id: Hotel a usar si los datos no traen uno
+
+    Returns:
+        dict: Datos con la referencia 'hotel' en lugar de 'hotel_id'
+    """
+    data = dict(data)
+    hotel_id = data.pop('hotel_id', None) or default_hotel_id
+    if hotel_id:
+        if not ObjectId.is_valid(hotel_id):
+            raise ValueError(f"Invalid hotel_id: {hotel_id}")
+        data['hotel'] = ObjectId(hotel_id)
+    return data
+
+
+def room_to_dict(room: Room) -> dict:
+    """Convierte una habitación al formato de RoomResponse"""
+    room_dict = room.to_mongo().to_dict()
+    room_dict['id'] = str(room_dict.pop('_id'))
+    hotel_id = room_dict.pop('hotel', None)
+    room_dict['hotel_id'] = str(hotel_id) if hotel_id else None
+    return room_dict
+
+
 def get_available_room_types() -> List[str]:
     """Obtener tipos de habitación disponibles"""
     return ["standard", "deluxe", "suite", "family", "vip"]
@@ -114,4 +144,76 @@ def search_rooms_by_criteria(
                 filtered_rooms.append(room)
         return filtered_rooms
 
-    return list(rooms)
\ No newline at end of file
+    return list(rooms)
+
+
+def hotel_rooms_filter(hotel_id) -> Optional[dict]:
+    """
+    Filtro raw de las habitaciones de un hotel.
+
+    Usa Room.hotel; mientras el hotel conserve el array obsoleto Hotel.rooms
+    (migración pendiente) se añaden las habitaciones listadas allí que aún
+    no tienen hotel, de modo que las lecturas funcionan durante la migración.
+
+    Args:
+        hotel_id: ID del hotel
+
+    Returns:
+        dict: Filtro raw de MongoDB, o None si el hotel no existe
+    """
+    hotel_oid = ObjectId(str(hotel_id))
+    hotel = Hotel._get_collection().find_one({'_id': hotel_oid}, {'rooms': 1})
+    if hotel is None:
+        return None
+
+    legacy = hotel.get('rooms') or []
+    if not legacy:
+        return {'hotel': hotel_oid}
+    return {'$or': [
+        {'hotel': hotel_oid},
+        {'_id': {'$in': legacy}, 'hotel': None}
+    ]}
+
+
+def get_hotels_by_room(room_ids: Iterable) -> Dict[str, Hotel]:
+    """
+    Obtiene el hotel de cada habitación con una consulta por colección.
+
+    Usa Room.hotel; las habitaciones que aún no lo tienen (hoteles sin
+    migrar) se buscan en el array obsoleto Hotel.rooms.
+
+    Args:
+        room_ids: IDs de las habitaciones
+
+    Returns:
+        Dict[str, Hotel]: Hotel indexado por ID de habitación
+    """
+    room_ids = [ObjectId(str(room_id)) for room_id in room_ids]
+    if not room_ids:
+        return {}
+
+    hotel_of_room = {
+        str(doc['_id']): doc.get('hotel')
+        for doc in Room.objects(id__in=room_ids).only('hotel').as_pymongo()
+    }
+    hotel_ids = {hotel_id for hotel_id in hotel_of_room.values() if hotel_id}
+    hotels = {
+        hotel.id: hotel
+        for hotel in Hotel.objects(id__in=list(hotel_ids)).only('name', 'address')
+    } if hotel_ids else {}
+
+    hotels_by_room = {
+        room_id: hotels[hotel_id]
+        for room_id, hotel_id in hotel_of_room.items()
+        if hotel_id in hotels
+    }
+
+    legacy = [room_id for room_id in room_ids if not hotel_of_room.get(str(room_id))]
+    if legacy:
+        wanted = {str(room_id) for room_id in legacy}
+        for hotel in Hotel.objects(rooms__in=legacy).only('name', 'address', 'rooms').no_dereference():
+            for room_ref in hotel.rooms:
+                room_id = str(getattr(room_ref, 'id', room_ref))
+                if room_id in wanted:
+                    hotels_by_room[room_id] = hotel
+    return hotels_by_room
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.models.Booking import ExtraService
+from app.models.Service import Service
+
+# Cada cuánto se comprueba como máximo la versión del catálogo en la base de datos
+CATALOG_CHECK_SECONDS = float(os.getenv("SERVICE_CATALOG_CHECK_SECONDS", "5"))
+
+
+class ServiceCatalog:
+    """
+    Copia en memoria del catálogo de servicios con sello de versión.
+
+    La versión es (número de servicios, último updated_at): detecta altas,
+    bajas y modificaciones hechas desde cualquier proceso con una consulta
+    cubierta por el índice de updated_at. Mientras no cambie, los precios
+    se resuelven sin tocar la base de datos.
+    """
+
+    def __init__(self, check_seconds: float = CATALOG_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._services: Dict[str, dict] = {}
+        self._version: Optional[Tuple] = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def _current_version(self) -> Tuple:
+        latest = Service.objects.order_by('-updated_at').only('updated_at').as_pymongo().first()
+        return Service.objects.count(), latest.get('updated_at') if latest else None
+
+    def _snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            now = time.monotonic()
+            if self._version is not None and now - self._checked_at < self.check_seconds:
+                return self._services
+
+            version = self._current_version()
+            if version != self._version:
+                self._services = {
+                    str(doc['_id']): {
+                        'name': doc['name'],
+                        'price': doc['price'],
+                        'description': doc.get('description'),
+                        'availability': doc.get('availability', True)
+                    }
+                    for doc in Service.objects.only(
+                        'name', 'price', 'description', 'availability'
+                    ).as_pymongo()
+                }
+                self._version = version
+            self._checked_at = now
+            return self._services
+
+    def get(self, service_id: str) -> Optional[dict]:
+        return self._snapshot().get(str(service_id))
+
+    def build_extras(self, service_ids: Iterable[str]) -> Tuple[List[ExtraService], List[str]]:
+        """
+        Convierte IDs del catálogo en extras con el precio vigente.
+
+        Args:
+            service_ids: IDs de servicios solicitados
+
+        Returns:
+            tuple: (extras a guardar en la reserva, IDs inexistentes o no disponibles)
+        """
+        services = self._snapshot()
+        extras, invalid = [], []
+        for service_id in service_ids:
+            service = services.get(str(service_id))
+            if service is None or not service['availability']:
+                invalid.append(str(service_id))
+                continue
+            extras.append(ExtraService(service_id=service_id, price=service['price']))
+        return extras, invalid
+
+    def describe(self, extra: ExtraService) -> dict:
+        """
+        Datos de presentación de un extra de una reserva.
+
+        Las reservas antiguas llevan nombre y descripción embebidos; las
+        nuevas solo el ID y el precio, y el resto se toma del catálogo.
+        """
+        service = self.get(extra.service_id) if extra.service_id else None
+        return {
+            'service_id': str(extra.service_id) if extra.service_id else None,
+            'name': extra.name or (service['name'] if service else "Servicio"),
+            'price': extra.price,
+            'description': extra.description or (service['description'] if service else None)
+        }
+
+
+service_catalog = ServiceCatalog()
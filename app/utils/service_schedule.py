@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.models.Service import Service
+
+# Respaldo para procesos que no ven los cambios hechos en otro worker
+SCHEDULE_INDEX_TTL_SECONDS = float(os.getenv("SCHEDULE_INDEX_TTL_SECONDS", "300"))
+
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_minutes(value: str) -> int:
+    """Convierte 'HH:MM' en minutos desde medianoche"""
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def service_to_dict(doc: dict) -> dict:
+    """Convierte un documento raw de services al formato de ServiceResponse"""
+    return {
+        'id': str(doc['_id']),
+        'name': doc['name'],
+        'description': doc.get('description'),
+        'price': doc['price'],
+        'category': doc.get('category') or 'other',
+        'schedule': doc.get('schedule', []),
+        'availability': doc.get('availability', True)
+    }
+
+
+def _day_segments(intervals: List[Tuple[int, int, str]]) -> Tuple[List[int], List[int], List[Tuple[str, ...]]]:
+    """
+    Parte los intervalos de un día en segmentos elementales sin solapes.
+
+    Returns:
+        tuple: (inicios ordenados, finales, servicios abiertos en cada segmento)
+    """
+    events: Dict[int, List[Tuple[int, str]]] = {}
+    for start, end, service_id in intervals:
+        events.setdefault(start, []).append((1, service_id))
+        events.setdefault(end, []).append((-1, service_id))
+
+    boundaries = sorted(events)
+    starts, ends, open_ids = [], [], []
+    # Contador por servicio: un mismo servicio puede tener franjas solapadas
+    active: Dict[str, int] = {}
+    for left, right in zip(boundaries, boundaries[1:]):
+        for delta, service_id in events[left]:
+            active[service_id] = active.get(service_id, 0) + delta
+        ids = tuple(sorted(service_id for service_id, count in active.items() if count > 0))
+        if not ids:
+            continue
+        # Fusionar con el segmento anterior si es contiguo y tiene los mismos servicios
+        if ends and ends[-1] == left and open_ids[-1] == ids:
+            ends[-1] = right
+        else:
+            starts.append(left)
+            ends.append(right)
+            open_ids.append(ids)
+    return starts, ends, open_ids
+
+
+class ScheduleIndex:
+    """
+    Índice en memoria de los horarios de los servicios disponibles.
+
+    Para cada día de la semana guarda segmentos de minutos ordenados y sin
+    solapes con los servicios abiertos en cada uno, de modo que "abierto a
+    la hora T" es una búsqueda binaria. Se reconstruye al modificar el
+    catálogo (invalidate) o al expirar el TTL.
+    """
+
+    def __init__(self, ttl_seconds: float = SCHEDULE_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._days: Optional[List[Tuple[List[int], List[int], List[Tuple[str, ...]]]]] = None
+        self._services: Dict[str, dict] = {}
+        self._built_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._days = None
+
+    def _build(self):
+        intervals = [[] for _ in WEEK_DAYS]
+        services = {}
+
+        for doc in Service.objects(availability=True).as_pymongo():
+            service = service_to_dict(doc)
+            services[service['id']] = service
+
+            for slot in service['schedule']:
+                if slot.get('day') not in WEEK_DAYS or not slot.get('start_time') or not slot.get('end_time'):
+                    continue
+                day = WEEK_DAYS.index(slot['day'])
+                start = parse_minutes(slot['start_time'])
+                end = parse_minutes(slot['end_time'])
+
+                if end > start:
+                    intervals[day].append((start, end, service['id']))
+                else:
+                    # Cruza la medianoche: se reparte entre este día y el siguiente
+                    intervals[day].append((start, MINUTES_PER_DAY, service['id']))
+                    if end > 0:
+                        intervals[(day + 1) % 7].append((0, end, service['id']))
+
+        return [_day_segments(day_intervals) for day_intervals in intervals], services
+
+    def _snapshot(self):
+        with self._lock:
+            if self._days is None or time.monotonic() - self._built_at > self.ttl_seconds:
+                self._days, self._services = self._build()
+                self._built_at = time.monotonic()
+            return self._days, self._services
+
+    def open_at(self, when: datetime, category: Optional[str] = None) -> List[dict]:
+        """
+        Servicios abiertos en un instante.
+
+        Args:
+            when: Fecha y hora a consultar
+            category: Filtrar por categoría
+
+        Returns:
+            List[dict]: Servicios abiertos, ordenados por nombre
+        """
+        days, services = self._snapshot()
+        starts, ends, open_ids = days[when.weekday()]
+        minute = when.hour * 60 + when.minute
+
+        position = bisect_right(starts, minute) - 1
+        if position < 0 or minute >= ends[position]:
+            return []
+
+        result = [services[service_id] for service_id in open_ids[position]]
+        if category:
+            result = [service for service in result if service['category'] == category]
+        return sorted(result, key=lambda service: service['name'])
+
+
+schedule_index = ScheduleIndex()
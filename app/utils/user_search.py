@@ -0,0 +1,91 @@
+import os
+import re
+from typing import Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.models.User import User, build_search_keys, normalize_search_text
+
+# Máximo de documentos a contar en búsquedas filtradas; por encima se reporta
+# el total como aproximado para no forzar un conteo completo
+SEARCH_COUNT_CAP = int(os.getenv("USER_SEARCH_COUNT_CAP", "1000"))
+
+
+def build_search_filter(search: str) -> Optional[dict]:
+    """
+    Construye el filtro de búsqueda por prefijo sobre las claves indexadas.
+
+    Args:
+        search: Texto introducido por el usuario
+
+    Returns:
+        dict: Filtro raw de MongoDB, o None si el texto queda vacío
+    """
+    term = normalize_search_text(search)
+    if not term:
+        return None
+
+    # Regex anclada y sensible a mayúsculas: MongoDB la resuelve como
+    # un rango sobre el índice de search_keys
+    return {'search_keys': {'$regex': f"^{re.escape(term)}"}}
+
+
+def count_users(users_query, has_filters: bool, cap: int = SEARCH_COUNT_CAP) -> Tuple[int, bool]:
+    """
+    Cuenta usuarios evitando conteos completos sobre resultados grandes.
+
+    Args:
+        users_query: QuerySet ya filtrado
+        has_filters: Si la consulta tiene algún filtro aplicado
+        cap: Máximo de documentos a contar
+
+    Returns:
+        tuple: (total, es_mínimo_por_tope); solo es True si se alcanzó el tope
+    """
+    if not has_filters:
+        # Sin filtros basta con los metadatos de la colección: es el total
+        # completo, no un mínimo, así que no se marca como acotado
+        return User._get_collection().estimated_document_count(), False
+
+    total = users_query.clone().limit(cap + 1).count(with_limit_and_skip=True)
+    if total > cap:
+        return cap, True
+    return total, False
+
+
+def backfill_search_keys(batch_size: int = 500) -> int:
+    """
+    Rellena search_keys en usuarios creados antes de la búsqueda indexada.
+
+    Args:
+        batch_size: Número de usuarios actualizados por bulk_write
+
+    Returns:
+        int: Número de usuarios actualizados
+    """
+    collection = User._get_collection()
+    cursor = collection.find(
+        {'$or': [{'search_keys': {'$exists': False}}, {'search_keys': {'$size': 0}}]},
+        {'name': 1, 'email': 1}
+    ).batch_size(batch_size)
+
+    updated = 0
+    operations = []
+    for doc in cursor:
+        keys = build_search_keys(doc.get('name'), doc.get('email'))
+        operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'search_keys': keys}}))
+        if len(operations) >= batch_size:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+
+    return updated
+
+
+if __name__ == "__main__":
+    from app.database import connect_db
+
+    connect_db()
+    print(f"Usuarios actualizados: {backfill_search_keys()}")
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+from app.models.User import User
+
+# Segundos que una instantánea se considera válida antes de recalcularla.
+# Entre recálculos los contadores se ajustan de forma incremental.
+USER_STATS_TTL_SECONDS = float(os.getenv("USER_STATS_TTL_SECONDS", "60"))
+
+ROLE_NAMES = ["admin", "employee", "client"]
+
+
+def compute_user_stats() -> dict:
+    """
+    Calcula las estadísticas de usuarios con una única agregación.
+
+    Returns:
+        dict: total, activos y distribución de usuarios activos por rol
+    """
+    pipeline = [
+        {'$facet': {
+            'totals': [
+                {'$group': {
+                    '_id': None,
+                    'total': {'$sum': 1},
+                    'active': {'$sum': {'$cond': ['$active', 1, 0]}}
+                }}
+            ],
+            'roles': [
+                {'$match': {'active': True}},
+                # Un usuario cuenta una sola vez por rol aunque lo repita
+                {'$project': {'names': {'$setUnion': [{'$ifNull': ['$roles.name', []]}, []]}}},
+                {'$unwind': '$names'},
+                {'$group': {'_id': '$names', 'count': {'$sum': 1}}}
+            ]
+        }}
+    ]
+
+    result = next(iter(User.objects.aggregate(pipeline)), {})
+    totals = result.get('totals') or [{}]
+
+    role_stats = {role: 0 for role in ROLE_NAMES}
+    for row in result.get('roles', []):
+        if row['_id'] in role_stats:
+            role_stats[row['_id']] = row['count']
+
+    return {
+        'total': totals[0].get('total', 0),
+        'active': totals[0].get('active', 0),
+        'roles': role_stats
+    }
+
+
+class UserStatsCache:
+    """
+    Caché en memoria de las estadísticas con ajuste incremental.
+
+    Cada cambio incrementa una generación. Un recálculo solo se da por
+    válido si la generación no cambió mientras se ejecutaba; si cambió, no
+    se sabe si la agregación vio esos cambios, así que el resultado se
+    guarda caducado y la siguiente lectura vuelve a calcular.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_STATS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats: Optional[dict] = None
+        self._computed_at = 0.0
+        self._generation = 0
+
+    def get(self) -> dict:
+        """Devuelve el resumen, recalculándolo solo si expiró el TTL"""
+        with self._lock:
+            if self._stats is not None and time.monotonic() - self._computed_at < self.ttl_seconds:
+                return self._summary()
+            generation = self._generation
+
+        stats = compute_user_stats()
+
+        with self._lock:
+            self._stats = stats
+            # Compare-and-set: con cambios concurrentes la instantánea no se reutiliza
+            self._computed_at = time.monotonic() if self._generation == generation else 0.0
+            return self._summary()
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._stats = None
+
+    def on_register(self, roles: Iterable[str], active: bool = True):
+        """Registra un usuario nuevo en los contadores"""
+        with self._lock:
+            self._generation += 1
+            if self._stats is None:
+                return
+            self._stats['total'] += 1
+            if active:
+                self._adjust_active(roles, 1)
+
+    def on_activate(self, roles: Iterable[str]):
+        """Registra la activación de un usuario previamente inactivo"""
+        with self._lock:
+            self._generation += 1
+            if self._stats is not None:
+                self._adjust_active(roles, 1)
+
+    def on_deactivate(self, roles: Iterable[str]):
+        """Registra la desactivación de un usuario previamente activo"""
+        with self._lock:
+            self._generation += 1
+            if self._stats is not None:
+                self._adjust_active(roles, -1)
+
+    def _adjust_active(self, roles: Iterable[str], delta: int):
+        self._stats['active'] += delta
+        for role in set(roles):
+            if role in self._stats['roles']:
+                self._stats['roles'][role] += delta
+
+    def _summary(self) -> dict:
+        return {
+            "total_users": self._stats['total'],
+            "active_users": self._stats['active'],
+            "inactive_users": self._stats['total'] - self._stats['active'],
+            "role_distribution": dict(self._stats['roles'])
+        }
+
+
+user_stats_cache = UserStatsCache()
@@ -0,0 +1,185 @@
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.models.BookingHold import BookingHold
+from app.models.Room import Room
+from app.models.User import User
+from app.models.WaitlistEntry import WaitlistEntry
+from app.utils.booking_holds import create_hold
+from app.utils.email import send_waitlist_available_email
+
+# Estancia máxima en lista de espera: acota el rango de check_in que se consulta
+WAITLIST_MAX_NIGHTS = int(os.getenv("WAITLIST_MAX_NIGHTS", "30"))
+WAITLIST_HOLD_MINUTES = int(os.getenv("WAITLIST_HOLD_MINUTES", "30"))
+# Margen entre reclamar una entrada y guardar su hold_id; antes no se considera huérfana
+WAITLIST_CLAIM_GRACE_SECONDS = int(os.getenv("WAITLIST_CLAIM_GRACE_SECONDS", "60"))
+
+
+def _claim(entry_id, new_status: str) -> bool:
+    """Marca la entrada si sigue en espera (evita avisar dos veces en cancelaciones simultáneas)"""
+    return WaitlistEntry._get_collection().update_one(
+        {'_id': entry_id, 'status': 'waiting'},
+        {'$set': {'status': new_status, 'matched_at': datetime.now()}}
+    ).modified_count == 1
+
+
+def close_claim(hold_id: str, new_status: str) -> bool:
+    """
+    Cierra la entrada 'held' asociada a un bloqueo que se confirma o se libera.
+
+    Args:
+        hold_id: ID del bloqueo
+        new_status: 'booked' al confirmar, 'notified' si el usuario lo libera
+
+    Returns:
+        bool: True si había una entrada asociada
+    """
+    return WaitlistEntry._get_collection().update_one(
+        {'hold_id': ObjectId(hold_id), 'status': 'held'},
+        {'$set': {'status': new_status}}
+    ).modified_count == 1
+
+
+def release_expired_claims(room_type: Optional[str] = None) -> int:
+    """
+    Devuelve a la cola las entradas 'held' cuyo bloqueo ya no está vigente.
+
+    Los bloqueos caducan solos (índice TTL), así que una entrada cuyo
+    bloqueo desapareció sin confirmarse ni liberarse vuelve a 'waiting'
+    con su antigüedad. Las confirmadas o liberadas ya no están en 'held'.
+
+    Args:
+        room_type: Limitar el barrido a un tipo de habitación
+
+    Returns:
+        int: Número de entradas devueltas a la cola
+    """
+    collection = WaitlistEntry._get_collection()
+    query = {
+        'status': 'held',
+        'matched_at': {'$lt': datetime.now() - timedelta(seconds=WAITLIST_CLAIM_GRACE_SECONDS)}
+    }
+    if room_type:
+        query['room_type'] = room_type
+
+    claims = list(collection.find(query, {'hold_id': 1}))
+    if not claims:
+        return 0
+
+    live_holds = set(BookingHold._get_collection().distinct('_id', {
+        '_id': {'$in': [claim['hold_id'] for claim in claims if claim.get('hold_id')]},
+        'expires_at': {'$gt': datetime.utcnow()}
+    }))
+    expired = [claim['_id'] for claim in claims if claim.get('hold_id') not in live_holds]
+    if not expired:
+        return 0
+
+    # El filtro por estado evita reabrir una entrada que se confirmó mientras tanto
+    return collection.update_many(
+        {'_id': {'$in': expired}, 'status': 'held'},
+        {'$set': {'status': 'waiting'}, '$unset': {'matched_at': "", 'hold_id': ""}}
+    ).modified_count
+
+
+def match_waitlist(room_id, check_in: datetime, check_out: datetime) -> int:
+    """
+    Ofrece las noches liberadas de una habitación a la lista de espera.
+
+    Solo se leen las entradas de ese tipo de habitación cuyo check_in cae
+    en [check_in - WAITLIST_MAX_NIGHTS, check_out), un rango sobre el
+    índice (room_type, status, check_in); el coste depende del intervalo
+    liberado y no del tamaño de la lista. Las entradas se atienden por
+    orden de llegada y cada una que encaja excluye a las que se solapan
+    con ella. Antes se devuelven a la cola las entradas de ese tipo cuyo
+    bloqueo caducó.
+
+    Args:
+        room_id: Habitación liberada
+        check_in: Inicio del intervalo liberado
+        check_out: Fin del intervalo liberado
+
+    Returns:
+        int: Número de entradas avisadas
+    """
+    room = Room.objects(id=room_id).only('type').as_pymongo().first()
+    if room is None:
+        return 0
+
+    release_expired_claims(room['type'])
+
+    candidates = WaitlistEntry.objects(
+        room_type=room['type'],
+        status='waiting',
+        check_in__gte=check_in - timedelta(days=WAITLIST_MAX_NIGHTS),
+        check_in__lt=check_out,
+        check_out__gt=check_in
+    ).order_by('created_at').as_pymongo()
+
+    assigned: List[Tuple[datetime, datetime]] = []
+    matched = 0
+    for entry in candidates:
+        if any(entry['check_in'] < end and entry['check_out'] > start for start, end in assigned):
+            continue
+
+        if not _claim(entry['_id'], 'held' if entry.get('auto_hold', True) else 'notified'):
+            continue
+
+        hold = None
+        if entry.get('auto_hold', True):
+            hold = create_hold(str(room_id), entry['user'], entry['check_in'], entry['check_out'],
+                               WAITLIST_HOLD_MINUTES)
+            available = hold is not None
+        else:
+            from app.utils.booking_utils import validate_room_availability
+            available = validate_room_availability(str(room_id), entry['check_in'], entry['check_out'])
+
+        if not available:
+            # Las noches que necesita no están todas libres: vuelve a la cola con su antigüedad
+            WaitlistEntry._get_collection().update_one(
+                {'_id': entry['_id']},
+                {'$set': {'status': 'waiting'}, '$unset': {'matched_at': ""}}
+            )
+            continue
+
+        if hold is not None:
+            WaitlistEntry._get_collection().update_one(
+                {'_id': entry['_id']}, {'$set': {'hold_id': hold['_id']}}
+            )
+
+        assigned.append((entry['check_in'], entry['check_out']))
+        matched += 1
+
+        user = User.objects(id=entry['user']).only('name', 'email').first()
+        if user:
+            send_waitlist_available_email(user.email, {
+                'user_name': user.name,
+                'room_type': room['type'],
+                'check_in': entry['check_in'],
+                'check_out': entry['check_out'],
+                'hold_id': str(hold['_id']) if hold else None,
+                # El bloqueo caduca en UTC (índice TTL); el email muestra la hora local
+                'hold_expires_at': datetime.now() + (hold['expires_at'] - datetime.utcnow()) if hold else None
+            })
+
+    return matched
+
+
+def match_waitlist_safely(room_id, check_in: datetime, check_out: datetime):
+    """Versión para tareas en segundo plano: un fallo no afecta a la cancelación"""
+    try:
+        matched = match_waitlist(room_id, check_in, check_out)
+        if matched:
+            print(f"Lista de espera: {matched} avisos para la habitación {room_id}")
+    except Exception as e:
+        print(f"Error matching waitlist for room {room_id}: {e}")
+
+
+if __name__ == "__main__":
+    from app.database import connect_db
+
+    connect_db()
+    released = release_expired_claims()
+    print(f"Lista de espera: {released} entradas devueltas a la cola")
@@ -0,0 +1,235 @@
+"""
+Rendimiento del renderizado de emails: plantillas precompiladas frente a la
+construcción anterior con f-strings y concatenación en cada envío.
+
+legacy_confirmation y legacy_cancellation reproducen los cuerpos que
+montaban send_confirmation_email y send_cancellation_email antes de
+app/utils/email_templates.py, pero leyendo el mismo contexto plano, de modo
+que la comparación mide solo el coste de construir el texto.
+
+Los contextos varían como en un lote real: reservas distintas repartidas en
+60 días de entrada y servicios extra del catálogo, así que las cachés de
+fechas y extras no aciertan siempre. Se toma la mejor de varias rondas
+alternando ambos renderizadores para reducir el ruido de la máquina.
+
+Uso:
+    python -m benchmarks.email_render_throughput [--iterations 20000] [--rounds 5]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app.utils.email_templates import render_email
+
+CHECK_IN = datetime(2026, 7, 1, 15, 0)
+CONTEXT = {
+    'reservation_id': "66b1f0c2a1b2c3d4e5f60718",
+    'user_name': "Ana García",
+    'hotel_name': "Hotel Paraíso",
+    'room_name': "Habitación 204",
+    'check_in': CHECK_IN,
+    'check_out': CHECK_IN + timedelta(days=3, hours=-3),
+    'total': 318.5,
+    'extras': [{'name': "Desayuno", 'price': 12.0}, {'name': "Spa", 'price': 45.5}],
+    'cancellation_fee': 31.85,
+}
+
+CATALOG = [{'name': "Desayuno", 'price': 12.0}, {'name': "Spa", 'price': 45.5},
+           {'name': "Parking", 'price': 15.0}]
+CONTEXTS = [
+    {
+        **CONTEXT,
+        'reservation_id': f"66b1f0c2a1b2c3d4e5f6{index:04x}",
+        'room_name': f"Habitación {100 + index % 50}",
+        'check_in': CHECK_IN + timedelta(days=index % 60),
+        'check_out': CHECK_IN + timedelta(days=index % 60 + 1 + index % 5, hours=-3),
+        'total': 100.0 + index * 1.25,
+        'extras': CATALOG[:index % 4],
+    }
+    for index in range(500)
+]
+
+
+def legacy_confirmation(context: dict) -> tuple:
+    check_in_str = context['check_in'].strftime("%d/%m/%Y %H:%M")
+    check_out_str = context['check_out'].strftime("%d/%m/%Y %H:%M")
+    nights = (context['check_out'].date() - context['check_in'].date()).days
+
+    subject = f"Confirmación de Reserva - {context['hotel_name']}"
+    body = f"""
+¡Hola {context['user_name']}!
+
+Tu reserva ha sido creada exitosamente. Aquí están los detalles:
+
+DETALLES DE LA RESERVA:
+- ID de Reserva: {context['reservation_id']}
+- Hotel: {context['hotel_name']}
+- Habitación: {context['room_name']}
+- Check-in: {check_in_str}
+- Check-out: {check_out_str}
+- Noches: {nights}
+- Total: €{context['total']:.2f}
+
+SERVICIOS EXTRAS:
+"""
+    if context['extras']:
+        for service in context['extras']:
+            body += f"- {service['name']}: €{service['price']:.2f}\n"
+    else:
+        body += "- Ninguno\n"
+
+    body += """
+INSTRUCCIONES:
+- Presenta este email o el ID de reserva al hacer check-in
+- El check-in es a partir de las 15:00
+- El check-out es hasta las 12:00
+- Para cualquier consulta, contacta con nosotros
+
+¡Esperamos verte pronto!
+
+Equipo de Reservas
+        """
+
+    html_body = f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 40px; }}
+        .header {{ background-color: #2c3e50; color: white; padding: 20px; text-align: center; }}
+        .content {{ padding: 20px; border: 1px solid #ddd; }}
+        .details {{ background-color: #f8f9fa; padding: 15px; margin: 10px 0; }}
+        .footer {{ text-align: center; margin-top: 20px; color: #666; }}
+        .highlight {{ color: #e74c3c; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Confirmación de Reserva</h1>
+    </div>
+
+    <div class="content">
+        <h2>¡Hola {context['user_name']}!</h2>
+        <p>Tu reserva ha sido creada exitosamente. Aquí están los detalles:</p>
+
+        <div class="details">
+            <h3>DETALLES DE LA RESERVA:</h3>
+            <ul>
+                <li><strong>ID de Reserva:</strong> <span class="highlight">{context['reservation_id']}</span></li>
+                <li><strong>Hotel:</strong> {context['hotel_name']}</li>
+                <li><strong>Habitación:</strong> {context['room_name']}</li>
+                <li><strong>Check-in:</strong> {check_in_str}</li>
+                <li><strong>Check-out:</strong> {check_out_str}</li>
+                <li><strong>Noches:</strong> {nights}</li>
+                <li><strong>Total:</strong> <span class="highlight">€{context['total']:.2f}</span></li>
+            </ul>
+        </div>
+
+        <div class="details">
+            <h3>SERVICIOS EXTRAS:</h3>
+            <ul>
+"""
+    if context['extras']:
+        for service in context['extras']:
+            html_body += f"<li>{service['name']}: €{service['price']:.2f}</li>"
+    else:
+        html_body += "<li>Ninguno</li>"
+
+    html_body += """
+            </ul>
+        </div>
+
+        <div class="details">
+            <h3>INSTRUCCIONES:</h3>
+            <ul>
+                <li>Presenta este email o el ID de reserva al hacer check-in</li>
+                <li>El check-in es a partir de las 15:00</li>
+                <li>El check-out es hasta las 12:00</li>
+                <li>Para cualquier consulta, contacta con nosotros</li>
+            </ul>
+        </div>
+
+        <p>¡Esperamos verte pronto!</p>
+    </div>
+
+    <div class="footer">
+        <p>Equipo de Reservas</p>
+    </div>
+</body>
+</html>
+        """
+    return subject, body, html_body
+
+
+def legacy_cancellation(context: dict) -> tuple:
+    subject = f"Cancelación de Reserva - {context['hotel_name']}"
+    body = f"""
+Hola {context['user_name']},
+
+Tu reserva ha sido cancelada exitosamente.
+
+DETALLES DE LA RESERVA CANCELADA:
+- ID de Reserva: {context['reservation_id']}
+- Hotel: {context['hotel_name']}
+- Habitación: {context['room_name']}
+- Fechas: {context['check_in'].strftime("%d/%m/%Y")} - {context['check_out'].strftime("%d/%m/%Y")}
+- Total Original: €{context['total']:.2f}
+"""
+    fee = context['cancellation_fee']
+    if fee > 0:
+        body += f"""
+- Tarifa de Cancelación: €{fee:.2f}
+- Monto a Reembolsar: €{context['total'] - fee:.2f}
+
+El reembolso será procesado en los próximos 5-7 días hábiles.
+"""
+    else:
+        body += f"""
+- Monto a Reembolsar: €{context['total']:.2f}
+
+El reembolso será procesado en los próximos 3-5 días hábiles.
+"""
+    body += """
+Si tienes alguna pregunta sobre el reembolso, no dudes en contactarnos.
+
+Gracias por tu comprensión.
+
+Equipo de Reservas
+        """
+    return subject, body, None
+
+
+def _throughput(render, iterations: int) -> float:
+    contexts = (CONTEXTS * (iterations // len(CONTEXTS) + 1))[:iterations]
+    start = time.perf_counter()
+    for context in contexts:
+        render(context)
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = [
+        ('confirmation', legacy_confirmation),
+        ('cancellation', legacy_cancellation),
+    ]
+    for name, legacy in cases:
+        # Calentamiento
+        legacy(CONTEXT)
+        render_email(name, CONTEXT)
+
+        legacy_rate = cached_rate = 0.0
+        for _ in range(args.rounds):
+            legacy_rate = max(legacy_rate, _throughput(legacy, args.iterations))
+            cached_rate = max(cached_rate, _throughput(lambda context: render_email(name, context), args.iterations))
+        print(f"{name:13s} anterior: {legacy_rate:10.0f} emails/s | "
+              f"precompilado: {cached_rate:10.0f} emails/s | x{cached_rate / legacy_rate:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Latencia de "enviar" un email desde una petición: envío SMTP en línea
+frente a encolar en el outbox.
+
+Levanta un servidor SMTP local (aiosmtpd) que añade un retardo artificial
+a EHLO y DATA y mide, para varios retardos, cuánto tarda cada camino. El
+camino en línea reproduce el envío anterior (conexión nueva por mensaje);
+el outbox solo inserta en Mongo, así que su latencia no debería cambiar
+con el retardo del servidor de correo.
+
+Uso:
+    python -m benchmarks.email_send_latency [--messages 50] [--delays 0,50,200] [--mongo]
+
+Sin --mongo se usa mongomock; con --mongo, la base de datos de config.py.
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+
+import mongoengine
+from aiosmtpd.controller import Controller
+
+from app.utils import email as email_module
+from app.utils.email import build_message, open_smtp_connection, send_email
+
+
+class SlowHandler:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.delay)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _measure(send, messages: int) -> list:
+    timings = []
+    for i in range(messages):
+        start = time.perf_counter()
+        send(f"cliente{i}@example.com")
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def send_inline(to_email: str):
+    """Envío anterior: una sesión SMTP nueva por mensaje, dentro de la petición"""
+    server = open_smtp_connection()
+    try:
+        server.send_message(build_message(to_email, "Confirmación de Reserva", "Cuerpo", "<p>Cuerpo</p>"))
+    finally:
+        server.quit()
+
+
+def send_outbox(to_email: str):
+    send_email(to_email, "Confirmación de Reserva", "Cuerpo", "<p>Cuerpo</p>")
+
+
+def _summary(timings: list) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+    return f"p50 {statistics.median(ordered):8.2f} ms   p95 {p95:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--delays", default="0,50,200", help="Retardos del servidor SMTP en ms")
+    parser.add_argument("--mongo", action="store_true", help="Usar la base de datos real en lugar de mongomock")
+    args = parser.parse_args()
+
+    if args.mongo:
+        from app.database import connect_db
+        connect_db()
+    else:
+        import mongomock
+        mongoengine.connect(db="hotel_benchmark", mongo_client_class=mongomock.MongoClient,
+                            uuidRepresentation="standard")
+
+    email_module.SMTP_SERVER = "127.0.0.1"
+    email_module.SMTP_STARTTLS = False
+    email_module.SMTP_USERNAME = email_module.SMTP_PASSWORD = None
+    email_module.FROM_EMAIL = "reservas@example.com"
+
+    for delay_ms in (int(value) for value in args.delays.split(",")):
+        port = _free_port()
+        controller = Controller(SlowHandler(delay_ms / 1000), hostname="127.0.0.1", port=port)
+        controller.start()
+        email_module.SMTP_PORT = port
+        try:
+            inline = _measure(send_inline, args.messages)
+            outbox = _measure(send_outbox, args.messages)
+        finally:
+            controller.stop()
+
+        print(f"Retardo SMTP {delay_ms:4d} ms | en línea: {_summary(inline)} | outbox: {_summary(outbox)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.fixture
+def mongo_db():
+    """Base de datos mongoengine en memoria (mongomock), limpia en cada test"""
+    mongomock = pytest.importorskip("mongomock")
+    mongoengine = pytest.importorskip("mongoengine")
+
+    connection = mongoengine.connect(
+        db="hotel_test", alias="default", mongo_client_class=mongomock.MongoClient,
+        uuidRepresentation="standard"
+    )
+    yield connection["hotel_test"]
+    mongoengine.disconnect(alias="default")
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.email_templates import TEMPLATES, EmailTemplate, render_email
+
+CHECK_IN = datetime.now().replace(hour=15, minute=0, second=0, microsecond=0) + timedelta(days=3)
+CHECK_OUT = CHECK_IN + timedelta(days=2, hours=-3)
+
+STAY = {
+    'reservation_id': "66b1f0c2a1b2c3d4e5f60718",
+    'user_name': "Ana <García>",
+    'hotel_name': "Hotel Paraíso",
+    'room_name': "Habitación 204",
+    'check_in': CHECK_IN,
+    'check_out': CHECK_OUT,
+    'total': 318.5,
+}
+
+CONTEXTS = {
+    'confirmation': {**STAY, 'extras': [
+        {'name': "Desayuno", 'price': 12.0},
+        {'name': "Spa & masaje", 'price': 45.5},
+    ]},
+    'cancellation': {**STAY, 'cancellation_fee': 31.85},
+    'reminder': {**STAY, 'hotel_address': "Calle Mayor 1, 28013 Madrid, Madrid, España"},
+    'status_update': {**STAY, 'new_status': 'confirmed', 'changes': ["Servicio añadido: Desayuno"]},
+    'group_confirmation': {
+        'group_id': "grp-1", 'user_name': "Ana <García>", 'total': 637.0,
+        'reservations': [
+            {'reservation_id': "r1", 'hotel_name': "Hotel Paraíso", 'room_name': "Habitación 204",
+             'check_in': CHECK_IN, 'check_out': CHECK_OUT, 'total': 318.5},
+            {'reservation_id': "r2", 'hotel_name': None, 'room_name': "Habitación 205",
+             'check_in': CHECK_IN, 'check_out': CHECK_OUT, 'total': 318.5},
+        ]
+    },
+    'waitlist_available': {
+        'user_name': "Ana <García>", 'room_type': "suite", 'check_in': CHECK_IN, 'check_out': CHECK_OUT,
+        'hold_id': "66b1f0c2a1b2c3d4e5f60719", 'hold_expires_at': datetime.now() + timedelta(minutes=30)
+    },
+}
+
+
+def test_every_template_has_a_context():
+    assert set(CONTEXTS) == set(TEMPLATES)
+
+
+@pytest.mark.parametrize("name", sorted(TEMPLATES))
+def test_template_renders_booking_context(name):
+    rendered = render_email(name, CONTEXTS[name])
+
+    assert rendered.subject and rendered.body
+    for part in (rendered.subject, rendered.body, rendered.html_body or ""):
+        assert "${" not in part
+    assert "Ana <García>" in rendered.body
+
+    if rendered.html_body is not None:
+        # Los valores del contexto se escapan en HTML
+        assert "Ana &lt;García&gt;" in rendered.html_body
+        assert "Ana <García>" not in rendered.html_body
+
+
+def test_confirmation_lists_extras_and_totals():
+    rendered = render_email('confirmation', CONTEXTS['confirmation'])
+
+    assert "- Desayuno: €12.00" in rendered.body
+    assert "Total: €318.50" in rendered.body
+    assert "Noches: 2" in rendered.body
+    assert "<li>Spa &amp; masaje: €45.50</li>" in rendered.html_body
+
+
+def test_confirmation_without_extras():
+    rendered = render_email('confirmation', {**STAY, 'extras': []})
+
+    assert "- Ninguno" in rendered.body
+    assert "<li>Ninguno</li>" in rendered.html_body
+
+
+def test_cancellation_refund_depends_on_fee():
+    with_fee = render_email('cancellation', CONTEXTS['cancellation']).body
+    without_fee = render_email('cancellation', {**STAY, 'cancellation_fee': 0.0}).body
+
+    assert "Monto a Reembolsar: €286.65" in with_fee
+    assert "5-7 días" in with_fee
+    assert "Monto a Reembolsar: €318.50" in without_fee
+    assert "3-5 días" in without_fee
+
+
+def test_hotel_name_falls_back_when_missing():
+    rendered = render_email('reminder', {**CONTEXTS['reminder'], 'hotel_name': None})
+
+    assert "nuestro hotel" in rendered.subject
+    assert "3 días restantes" in rendered.subject
+
+
+def test_html_template_rejects_unescaped_fields():
+    with pytest.raises(ValueError):
+        EmailTemplate(subject="x", text="x", html="<p>${user_name}</p>")
+
+
+def test_dates_match_strftime_format():
+    rendered = render_email('confirmation', CONTEXTS['confirmation'])
+
+    check_in = CONTEXTS['confirmation']['check_in']
+    assert f"Check-in: {check_in.strftime('%d/%m/%Y %H:%M')}" in rendered.body
@@ -0,0 +1,158 @@
+import smtplib
+import socket
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("mongoengine")
+
+from app.models.EmailOutbox import EmailOutbox  # noqa: E402
+from app.utils import email as email_module  # noqa: E402
+from app.utils import email_worker  # noqa: E402
+from app.utils.email import send_email  # noqa: E402
+from app.utils.email_worker import OutboxWorker, SMTPConnectionPool, backoff_delay  # noqa: E402
+
+
+class StubTransport:
+    """Transporte SMTP falso: registra los mensajes o falla con el error indicado"""
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.sent = []
+
+    def send_message(self, msg):
+        if self.error is not None:
+            raise self.error
+        self.sent.append(msg)
+
+
+class StubPool:
+    def __init__(self, transport: StubTransport):
+        self.transport = transport
+
+    @contextmanager
+    def connection(self):
+        yield self.transport
+
+    def close_all(self):
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    """Servidor SMTP local (aiosmtpd) que guarda los mensajes recibidos"""
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+
+    class Handler:
+        def __init__(self):
+            self.messages = []
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope)
+            return "250 OK"
+
+    handler = Handler()
+    port = _free_port()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    monkeypatch.setattr(email_module, "SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setattr(email_module, "SMTP_PORT", port)
+    monkeypatch.setattr(email_module, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(email_module, "SMTP_USERNAME", None)
+    monkeypatch.setattr(email_module, "SMTP_PASSWORD", None)
+    monkeypatch.setattr(email_module, "FROM_EMAIL", "reservas@example.com")
+    yield handler
+    controller.stop()
+
+
+def test_send_email_only_enqueues(mongo_db):
+    assert send_email("cliente@example.com", "Asunto", "Cuerpo")
+
+    email = EmailOutbox.objects.get()
+    assert email.status == 'pending'
+    assert email.attempts == 0
+
+
+def test_worker_delivers_through_local_smtp(mongo_db, smtp_server):
+    send_email("cliente@example.com", "Confirmación", "Tu reserva", "<p>Tu reserva</p>")
+    send_email("otro@example.com", "Recordatorio", "Mañana llegas")
+    worker = OutboxWorker(workers=1, pool=SMTPConnectionPool(size=1))
+
+    try:
+        assert worker.process_one()
+        assert worker.process_one()
+        assert not worker.process_one()
+    finally:
+        worker.pool.close_all()
+
+    assert sorted(envelope.rcpt_tos[0] for envelope in smtp_server.messages) == [
+        "cliente@example.com", "otro@example.com"
+    ]
+    assert all(email.status == 'sent' and email.sent_at for email in EmailOutbox.objects)
+
+
+def test_transport_error_schedules_retry_with_backoff(mongo_db, monkeypatch):
+    monkeypatch.setattr(email_worker, "EMAIL_BACKOFF_SECONDS", 10)
+    send_email("cliente@example.com", "Asunto", "Cuerpo")
+    worker = OutboxWorker(workers=1, pool=StubPool(StubTransport(smtplib.SMTPServerDisconnected("caído"))))
+
+    before = datetime.utcnow()
+    assert worker.process_one()
+
+    email = EmailOutbox.objects.get()
+    assert email.status == 'pending'
+    assert email.attempts == 1
+    assert "caído" in email.last_error
+    assert email.next_attempt_at >= before + timedelta(seconds=9)
+
+    # Todavía no toca reintentar
+    assert not worker.process_one()
+
+
+def test_backoff_is_exponential_and_capped(monkeypatch):
+    monkeypatch.setattr(email_worker, "EMAIL_BACKOFF_SECONDS", 30)
+    monkeypatch.setattr(email_worker, "EMAIL_MAX_BACKOFF_SECONDS", 100)
+
+    assert [backoff_delay(attempt) for attempt in range(1, 5)] == [30, 60, 100, 100]
+
+
+def test_retry_succeeds_after_transient_error(mongo_db):
+    send_email("cliente@example.com", "Asunto", "Cuerpo")
+    transport = StubTransport(smtplib.SMTPServerDisconnected("caído"))
+    worker = OutboxWorker(workers=1, pool=StubPool(transport))
+    worker.process_one()
+
+    transport.error = None
+    EmailOutbox.objects.update(set__next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+    assert worker.process_one()
+
+    email = EmailOutbox.objects.get()
+    assert email.status == 'sent'
+    assert email.attempts == 2
+    assert len(transport.sent) == 1
+
+
+def test_dead_letter_after_max_attempts(mongo_db, monkeypatch):
+    monkeypatch.setattr(email_worker, "EMAIL_MAX_ATTEMPTS", 2)
+    send_email("cliente@example.com", "Asunto", "Cuerpo")
+    worker = OutboxWorker(workers=1, pool=StubPool(StubTransport(smtplib.SMTPDataError(554, b"rechazado"))))
+
+    for _ in range(2):
+        EmailOutbox.objects.update(set__next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+        assert worker.process_one()
+
+    email = EmailOutbox.objects.get()
+    assert email.status == 'dead'
+    assert email.attempts == 2
+    assert "rechazado" in email.last_error
+
+    # Un mensaje en dead-letter no se vuelve a reclamar
+    assert not worker.process_one()